@@ -1,183 +1,136 @@
 import sys
-import json
+import time
+import queue
+import threading
 from tkinter import (
-    Tk, Toplevel, Label, Button, Listbox, Entry, messagebox, font, simpledialog, StringVar, END, ACTIVE, Menu
+    Tk, Toplevel, Label, Button, Listbox, Entry, messagebox, font, simpledialog, filedialog, END, Menu
 )
 from tkinter.ttk import Combobox, Treeview
-from tkcalendar import DateEntry
-from datetime import datetime
-
-
-# قاموس للغات (عربي وإنجليزي)
-LANGUAGES = {
-    "English": {
-        "Main Menu": "Main Menu",
-        "Student": "Student",
-        "Work": "Work",
-        "Homework": "Homework",
-        "Review": "Review",
-        "Study": "Study",
-        "Leisure Time": "Leisure Time",
-        "Exercise": "Exercise",
-        "Personal Tasks": "Personal Tasks",
-        "Projects": "Projects",
-        "Shopping": "Shopping",
-        "Entertainment": "Entertainment",
-        "Other": "Other",
-        "Task Description": "Task Description",
-        "Priority": "Priority",
-        "Date": "Date",
-        "Add Task": "Add Task",
-        "Mark as Done": "Mark as Done",
-        "Search Task": "Search Task",
-        "Tasks": "Tasks",
-        "Search Task Placeholder": "Enter task description...",
-        "Task Not Found": "Task not found!",
-        "High": "High",
-        "Medium": "Medium",
-        "Low": "Low",
-        "Add Submenu": "Add Submenu",
-        "Submenu Name": "Submenu Name",
-        "Delete Task": "Delete Task",
-        "Completion Rate": "Completion Rate",
-        "Uncompleted Tasks": "Uncompleted Tasks",
-        "Completed Tasks": "Completed Tasks",
-        "Sort By": "Sort By",
-        "Date": "Date",
-        "Priority": "Priority",
-        "Alphabetical": "Alphabetical",
-        "Reset": "Reset",
-        "Confirm Reset": "Are you sure you want to reset all data?"
-    },
-    "Arabic": {
-        "Main Menu": "القائمة الرئيسية",
-        "Student": "طالب",
-        "Work": "عمل",
-        "Homework": "واجب منزلي",
-        "Review": "مراجعة",
-        "Study": "دراسة",
-        "Leisure Time": "وقت راحة",
-        "Exercise": "رياضة",
-        "Personal Tasks": "مهام شخصية",
-        "Projects": "مشاريع",
-        "Shopping": "تسوق",
-        "Entertainment": "ترفيه",
-        "Other": "أخرى",
-        "Task Description": "وصف المهمة",
-        "Priority": "الأولوية",
-        "Date": "التاريخ",
-        "Add Task": "إضافة مهمة",
-        "Mark as Done": "تمت المهمة",
-        "Search Task": "بحث عن المهمة",
-        "Tasks": "المهام",
-        "Search Task Placeholder": "أدخل وصف المهمة...",
-        "Task Not Found": "المهمة غير موجودة!",
-        "High": "عالي",
-        "Medium": "متوسط",
-        "Low": "منخفض",
-        "Add Submenu": "إضافة قائمة فرعية",
-        "Submenu Name": "اسم القائمة الفرعية",
-        "Delete Task": "حذف المهمة",
-        "Completion Rate": "نسبة الإنجاز",
-        "Uncompleted Tasks": "المهام الغير منجزة",
-        "Completed Tasks": "المهام المنجزة",
-        "Sort By": "فرز بواسطة",
-        "Date": "التاريخ",
-        "Priority": "الأولوية",
-        "Alphabetical": "الأبجدي",
-        "Reset": "إعادة ضبط",
-        "Confirm Reset": "هل أنت متأكد من رغبتك في إعادة ضبط جميع البيانات؟"
-    }
-}
-
-# عقدة المهمة (TaskNode)
-class TaskNode:
-    def __init__(self, description, priority, date, completed=False, next_node=None):
-        self.description = description  # وصف المهمة
-        self.priority = priority  # الأولوية
-        self.date = date  # التاريخ
-        self.completed = completed  # حالة الإكمال (افتراضيًا غير مكتملة)
-        self.next = next_node  # العقدة التالية
-
-# قائمة مرتبطة لإدارة المهام (TaskList)
-class TaskList:
-    def __init__(self):
-        self.head = None  # بداية القائمة
-
-    def add_task(self, description, priority, date, completed=False):
-        """إضافة مهمة جديدة إلى القائمة."""
-        new_task = TaskNode(description, priority, date, completed)
-        if not self.head:
-            self.head = new_task
-        else:
-            current = self.head
-            while current.next:
-                current = current.next
-            current.next = new_task
-
-    def get_all_tasks(self):
-        """الحصول على جميع المهام في القائمة."""
-        tasks = []
-        current = self.head
-        while current:
-            tasks.append((current.description, current.priority, current.date, current.completed))
-            current = current.next
-        return tasks
-
-    def mark_task_as_done(self, description):
-        """تحديد المهمة كمكتملة بناءً على الوصف."""
-        current = self.head
-        while current:
-            if current.description == description:
-                current.completed = True
-                break
-            current = current.next
-
-    def delete_task(self, description):
-        """حذف مهمة بناءً على الوصف."""
-        if not self.head:
-            return
-        if self.head.description == description:
-            self.head = self.head.next
-            return
-        current = self.head
-        while current.next:
-            if current.next.description == description:
-                current.next = current.next.next
-                break
-            current = current.next
+from todo_core import (
+    LANGUAGES, PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_MEDIUM, PRIORITY_NAMES, PROFILER, Recurrence, TaskEngine, TaskStats,
+    SQLiteTaskStore, instrument_core, localize_priority, localize_submenu, priority_code, render_cache, task_reader_for,
+    today_ordinal
+)
 
-    def sort_by_date(self):
-        """فرز المهام بناءً على التاريخ."""
-        tasks = self.get_all_tasks()
-        tasks.sort(key=lambda x: datetime.strptime(x[2], "%Y-%m-%d"))
-        self.head = None
-        for task in tasks:
-            self.add_task(task[0], task[1], task[2], task[3])
 
-    def sort_by_priority(self):
-        """فرز المهام بناءً على الأولوية."""
-        priority_order = {
-            LANGUAGES["Arabic"]["High"]: 3,
-            LANGUAGES["Arabic"]["Medium"]: 2,
-            LANGUAGES["Arabic"]["Low"]: 1,
-            LANGUAGES["English"]["High"]: 3,
-            LANGUAGES["English"]["Medium"]: 2,
-            LANGUAGES["English"]["Low"]: 1
-        }
-        tasks = self.get_all_tasks()
-        tasks.sort(key=lambda x: priority_order[x[1]], reverse=True)
-        self.head = None
-        for task in tasks:
-            self.add_task(task[0], task[1], task[2], task[3])
+# مهلة انتظار توقف الكتابة قبل تنفيذ البحث (بالملي ثانية)
+SEARCH_DELAY_MS = 150
 
-    def sort_alphabetically(self):
-        """فرز المهام بناءً على الأبجدية."""
-        tasks = self.get_all_tasks()
-        tasks.sort(key=lambda x: x[0])
-        self.head = None
-        for task in tasks:
-            self.add_task(task[0], task[1], task[2], task[3])
+# الفاصل بين فحوص التذكير بالمهام المستحقة (بالملي ثانية)
+REMINDER_INTERVAL_MS = 60000
+
+# الفاصل بين فحوص تغييرات النسخ الأخرى في الوضع المشترك (بالملي ثانية)
+SHARED_POLL_MS = 1000
+
+# الفاصل بين فحوص أخطاء خيط الحفظ (بالملي ثانية)
+SAVE_CHECK_MS = 2000
+
+# القوائم الثابتة في نهاية القائمة الرئيسية
+STATUS_VIEWS = ("Uncompleted Tasks", "Completed Tasks", "Due Tasks")
+
+
+# الأولويات في نافذة إضافة مهمة بترتيب العرض
+PRIORITY_CHOICES = (PRIORITY_HIGH, PRIORITY_MEDIUM, PRIORITY_LOW)
+
+# خيارات التكرار في نافذة إضافة مهمة (بعد "بدون تكرار")
+REPEAT_CHOICES = tuple(Recurrence.FREQUENCIES)
+
+
+def task_row_values(node, language, submenu=None):
+    """قيم صف المهمة في الجدول (الترجمة تتم هنا عند العرض فقط، من render_cache)."""
+    labels = render_cache(language)
+    date = f"{node.date} ({labels['repeat'][node.recurrence.frequency]})" if node.recurrence else node.date
+    values = (node.description, labels['priority'][node.priority_code], date, labels['status'][node.completed])
+    return values if submenu is None else values + (localize_submenu(submenu, language),)
+
+
+# عرض افتراضي للمهام (TaskTreeView)
+class TaskTreeView:
+    """يربط Treeview بقائمة مهام دون إنشاء صف لكل مهمة دفعة واحدة.
+
+    تُنشأ الصفوف للجزء الظاهر مع هامش إضافي، ثم تُضاف صفحة جديدة كلما اقترب
+    التمرير من النهاية. التعديلات الفردية (إضافة، إكمال، حذف) تغيّر صفًا واحدًا.
+    """
+
+    PAGE_SIZE = 100  # عدد الصفوف المُنشأة في كل دفعة (الظاهر + هامش)
+
+    def __init__(self, tree, language_getter, submenu_getter=None):
+        self.tree = tree
+        self.language_getter = language_getter
+        self.submenu_getter = submenu_getter  # معرف المهمة -> اسم قائمتها (لعمود القائمة الفرعية)
+        self.nodes = []  # جميع المهام المعروضة بالترتيب
+        self.rendered = 0  # عدد المهام التي أُنشئت صفوفها
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.tree.bind("<Configure>", lambda event: self._fill_visible())
+        self.tree.tag_configure("overdue", foreground="red")
+        self.tree.tag_configure("due", foreground="darkorange")
+
+    def show(self, nodes):
+        """استبدال محتوى الجدول بالمهام المعطاة."""
+        self.tree.delete(*self.tree.get_children())
+        self.nodes = list(nodes)
+        self.rendered = 0
+        self._render_more(self.PAGE_SIZE)
+
+    def clear(self):
+        self.show(())
+
+    def _row_values(self, node, language):
+        submenu = self.submenu_getter(node.id) if self.submenu_getter else None
+        return task_row_values(node, language, submenu)
+
+    @staticmethod
+    def _row_tags(node, today):
+        """تلوين المهام غير المنجزة المتأخرة أو المستحقة اليوم."""
+        if node.completed or not node.date_ordinal or node.date_ordinal > today:
+            return ()
+        return ("overdue",) if node.date_ordinal < today else ("due",)
+
+    def _render_more(self, count):
+        language = self.language_getter()
+        today = today_ordinal()
+        end = min(self.rendered + count, len(self.nodes))
+        for node in self.nodes[self.rendered:end]:
+            self.tree.insert("", END, iid=node.id, values=self._row_values(node, language), tags=self._row_tags(node, today))
+        self.rendered = end
+
+    def _on_scroll(self, first, last):
+        """عند اقتراب التمرير من آخر صف مُنشأ تُضاف الصفحة التالية."""
+        if float(last) >= 0.9 and self.rendered < len(self.nodes):
+            self._render_more(self.PAGE_SIZE)
+
+    def _fill_visible(self):
+        visible = int(self.tree.cget("height")) * 2
+        if self.rendered < min(visible, len(self.nodes)):
+            self._render_more(visible - self.rendered)
+
+    def add_node(self, node):
+        """إضافة مهمة في نهاية العرض (صف واحد إذا كان آخر العرض ظاهرًا)."""
+        self.nodes.append(node)
+        if self.rendered == len(self.nodes) - 1:
+            self._render_more(1)
+
+    def refresh_labels(self):
+        """إعادة كتابة قيم الصفوف المُنشأة فقط بعد تغيير اللغة."""
+        language = self.language_getter()
+        for node in self.nodes[:self.rendered]:
+            self.tree.item(node.id, values=self._row_values(node, language))
+
+    def update_node(self, node):
+        """تحديث صف مهمة واحدة إن كان مُنشأً."""
+        if self.tree.exists(node.id):
+            self.tree.item(node.id, values=self._row_values(node, self.language_getter()), tags=self._row_tags(node, today_ordinal()))
+
+    def remove_node(self, task_id):
+        """حذف صف مهمة واحدة من العرض."""
+        for position, node in enumerate(self.nodes):
+            if node.id == task_id:
+                del self.nodes[position]
+                if position < self.rendered:
+                    self.tree.delete(task_id)
+                    self.rendered -= 1
+                    self._render_more(1)  # إبقاء عدد الصفوف المُنشأة ثابتًا
+                return
 
 
 # نافذة إضافة مهمة (AddTaskDialog)
@@ -196,26 +149,55 @@ class AddTaskDialog(simpledialog.Dialog):
 
         self.priority_label = Label(master, text=LANGUAGES[self.language]["Priority"])
         self.priority_label.grid(row=1, column=0, padx=5, pady=5)
-        self.priority_combobox = Combobox(master, values=[
-            LANGUAGES[self.language]["High"],
-            LANGUAGES[self.language]["Medium"],
-            LANGUAGES[self.language]["Low"]
-        ])
+        labels = render_cache(self.language)['priority']
+        self.priority_combobox = Combobox(master, values=[labels[code] for code in PRIORITY_CHOICES])
         self.priority_combobox.grid(row=1, column=1, padx=5, pady=5)
 
         self.date_label = Label(master, text=LANGUAGES[self.language]["Date"])
         self.date_label.grid(row=2, column=0, padx=5, pady=5)
+        from tkcalendar import DateEntry  # تُحمّل فقط عند فتح نافذة إضافة مهمة
         self.date_entry = DateEntry(master, selectmode='day')
         self.date_entry.grid(row=2, column=1, padx=5, pady=5)
 
+        self.repeat_label = Label(master, text=LANGUAGES[self.language]["Repeat"])
+        self.repeat_label.grid(row=3, column=0, padx=5, pady=5)
+        repeat_labels = render_cache(self.language)['repeat']
+        self.repeat_combobox = Combobox(master, state="readonly", values=[LANGUAGES[self.language]["Does Not Repeat"]]
+                                        + [repeat_labels[frequency] for frequency in REPEAT_CHOICES])
+        self.repeat_combobox.current(0)
+        self.repeat_combobox.grid(row=3, column=1, padx=5, pady=5)
+
+        self.until_label = Label(master, text=LANGUAGES[self.language]["Until"])
+        self.until_label.grid(row=4, column=0, padx=5, pady=5)
+        self.until_entry = Entry(master)  # فارغ = بلا نهاية
+        self.until_entry.grid(row=4, column=1, padx=5, pady=5)
+
         return self.task_entry  # التركيز الأولي على مدخل وصف المهمة
 
+    def validate(self):
+        """التحقق من تاريخ نهاية التكرار قبل إغلاق النافذة."""
+        try:
+            self.repeat = self.read_repeat()
+        except ValueError:
+            messagebox.showwarning(LANGUAGES[self.language]["Repeat"], LANGUAGES[self.language]["Until"], parent=self)
+            return False
+        return True
+
+    def read_repeat(self):
+        choice = self.repeat_combobox.current()
+        if choice <= 0:
+            return None
+        date = self.date_entry.get_date().strftime("%Y-%m-%d")
+        return Recurrence.create(REPEAT_CHOICES[choice - 1], date, until=self.until_entry.get().strip() or None)
+
     def apply(self):
         """الحصول على بيانات المهمة المدخلة من المستخدم."""
         description = self.task_entry.get()
-        priority = self.priority_combobox.get()
+        choice = self.priority_combobox.current()
+        code = PRIORITY_CHOICES[choice] if choice >= 0 else priority_code(self.priority_combobox.get())
+        priority = PRIORITY_NAMES[code]  # تُخزن الأولوية بمفتاحها الثابت لا بنصها المترجم
         date = self.date_entry.get_date().strftime("%Y-%m-%d")
-        self.result = (description, priority, date)
+        self.result = (description, priority, date, self.repeat)
 
 
 # نافذة إدارة القائمة الفرعية (SubMenuDialog)
@@ -223,7 +205,7 @@ class SubMenuDialog(Toplevel):
     def __init__(self, parent, submenu_name, language):
         super().__init__(parent)
         self.language = language
-        self.title(submenu_name)
+        self.title(localize_submenu(submenu_name, language))
         self.submenu_name = submenu_name
         self.geometry("400x400")
         self.configure(bg='white')
@@ -241,6 +223,7 @@ class SubMenuDialog(Toplevel):
         self.tasks_tree.column("Date", width=100)
         self.tasks_tree.column("Status", width=100)
         self.tasks_tree.pack(pady=5)
+        self.task_view = TaskTreeView(self.tasks_tree, lambda: self.language)
 
         self.add_task_button = Button(self, text=LANGUAGES[self.language]["Add Task"], command=self.add_new_task, font=('Arial', 10), bg='white', fg='black', relief='raised', bd=2)
         self.add_task_button.pack(pady=5)
@@ -266,21 +249,21 @@ class SubMenuDialog(Toplevel):
 
     def load_tasks(self):
         """تحميل المهام الخاصة بالقائمة الفرعية."""
-        self.tasks_tree.delete(*self.tasks_tree.get_children())
-        tasks = self.master.get_tasks_for_submenu(self.submenu_name)
-        for task in tasks:
-            status = "مكتملة" if task[3] else "قيد التنفيذ"
-            self.tasks_tree.insert("", END, values=(task[0], task[1], task[2], status))
+        self.task_view.show(self.master.task_lists.get(self.submenu_name, ()))
         self.update_completion_rate()
 
     def add_new_task(self):
         """إضافة مهمة جديدة إلى القائمة الفرعية."""
         dialog = AddTaskDialog(self, language=self.language)
         if dialog.result:
-            description, priority, date = dialog.result
+            description, priority, date, repeat = dialog.result
             if description:
-                self.master.add_task(self.submenu_name, description, priority, date)
-                self.load_tasks()
+                node = self.master.add_task(self.submenu_name, description, priority, date, repeat=repeat)
+                if self.master.task_lists[self.submenu_name].sort_order:
+                    self.load_tasks()  # المهمة الجديدة تأخذ موضعها في الترتيب
+                else:
+                    self.task_view.add_node(node)
+                    self.update_completion_rate()
 
     def delete_selected_task(self):
         """حذف المهمة المحددة من القائمة الفرعية."""
@@ -288,9 +271,9 @@ class SubMenuDialog(Toplevel):
         if not selected_item:
             messagebox.showwarning(self, "تنبيه", LANGUAGES[self.language]["Task Not Found"])
             return
-        task_description = self.tasks_tree.item(selected_item, "values")[0]
-        self.master.delete_task(self.submenu_name, task_description)
-        self.load_tasks()
+        self.master.delete_task_by_id(selected_item[0])
+        self.task_view.remove_node(selected_item[0])
+        self.update_completion_rate()
 
     def mark_task_as_done(self):
         """تحديد المهمة كمكتملة في القائمة الفرعية."""
@@ -298,19 +281,18 @@ class SubMenuDialog(Toplevel):
         if not selected_item:
             messagebox.showwarning(self, "تنبيه", LANGUAGES[self.language]["Task Not Found"])
             return
-        task_description = self.tasks_tree.item(selected_item, "values")[0]
-        self.master.mark_task_as_done(self.submenu_name, task_description)
-        self.load_tasks()
+        node = self.master.mark_task_as_done_by_id(selected_item[0])
+        if node:
+            self.task_view.update_node(node)
+        self.update_completion_rate()
 
     def update_completion_rate(self):
         """تحديث نسبة إنجاز المهام في القائمة الفرعية."""
-        tasks = self.master.get_tasks_for_submenu(self.submenu_name)
-        if not tasks:
+        task_list = self.master.task_lists.get(self.submenu_name)
+        if task_list is None or not task_list.stats.total:
             self.completion_rate_label.config(text=f"{LANGUAGES[self.language]['Completion Rate']}: 0%")
             return
-        total_tasks = len(tasks)
-        completed_tasks = sum(1 for task in tasks if task[3])
-        completion_rate = (completed_tasks / total_tasks) * 100
+        completion_rate = task_list.stats.completion_rate
         self.completion_rate_label.config(text=f"{LANGUAGES[self.language]['Completion Rate']}: {completion_rate:.2f}%")
 
     def show_sort_menu(self):
@@ -322,20 +304,168 @@ class SubMenuDialog(Toplevel):
 
     def sort_by_date(self):
         """فرز المهام بناءً على التاريخ."""
-        self.master.task_lists[self.submenu_name].sort_by_date()
+        self.master.sort_tasks(self.submenu_name, "date")
         self.load_tasks()
 
     def sort_by_priority(self):
         """فرز المهام بناءً على الأولوية."""
-        self.master.task_lists[self.submenu_name].sort_by_priority()
+        self.master.sort_tasks(self.submenu_name, "priority")
         self.load_tasks()
 
     def sort_alphabetically(self):
         """فرز المهام بناءً على الأبجدية."""
-        self.master.task_lists[self.submenu_name].sort_alphabetically()
+        self.master.sort_tasks(self.submenu_name, "alphabetical")
         self.load_tasks()
 
 
+# نافذة الإحصائيات (StatisticsDialog)
+class StatisticsDialog(Toplevel):
+    def __init__(self, parent, language):
+        super().__init__(parent)
+        self.language = language
+        self.title(LANGUAGES[self.language]["Statistics"])
+        self.geometry("450x400")
+        self.configure(bg='white')
+
+        self.stats_tree = Treeview(self, columns=("Group", "Total", "Completed", "Rate"), show="headings", height=15)
+        self.stats_tree.heading("Group", text=LANGUAGES[self.language]["Statistics"])
+        self.stats_tree.heading("Total", text=LANGUAGES[self.language]["Total"])
+        self.stats_tree.heading("Completed", text=LANGUAGES[self.language]["Completed Tasks"])
+        self.stats_tree.heading("Rate", text=LANGUAGES[self.language]["Completion Rate"])
+        self.stats_tree.column("Group", width=150)
+        self.stats_tree.column("Total", width=80)
+        self.stats_tree.column("Completed", width=100)
+        self.stats_tree.column("Rate", width=100)
+        self.stats_tree.pack(pady=5, expand=True, fill='both')
+
+        self.load_stats()
+
+    def add_row(self, label, total, completed):
+        rate = TaskStats.rate(total, completed)
+        self.stats_tree.insert("", END, values=(label, total, completed, f"{rate:.2f}%"))
+
+    def load_stats(self):
+        """عرض العدادات المحفوظة (دون المرور على المهام)."""
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        overall = TaskStats()
+        for submenu, task_list in self.master.task_lists.items():
+            overall.merge(task_list.stats)
+        self.add_row(LANGUAGES[self.language]["Tasks"], overall.total, overall.completed)
+        for code in sorted(overall.by_priority, reverse=True):
+            total, completed = overall.by_priority[code]
+            if total:
+                self.add_row(localize_priority(code, self.language) or "-", total, completed)
+        for submenu, task_list in self.master.task_lists.items():
+            self.add_row(localize_submenu(submenu, self.language), task_list.stats.total, task_list.stats.completed)
+        for month in sorted(overall.by_month, key=lambda month: month or (0, 0)):
+            total, completed = overall.by_month[month]
+            if total:
+                self.add_row(f"{month[0]}-{month[1]:02d}" if month else "-", total, completed)
+
+
+# نافذة قياس الأداء (ProfilerDialog)
+class ProfilerDialog(Toplevel):
+    """آخر استدعاءات الواجهة البطيئة وملخص المؤقتات (عند التشغيل مع --profile)."""
+
+    REFRESH_MS = 1000
+
+    def __init__(self, parent, language):
+        super().__init__(parent)
+        self.language = language
+        self.title(LANGUAGES[self.language]["Profiler"])
+        self.geometry("600x500")
+        self.configure(bg='white')
+
+        Label(self, text=LANGUAGES[self.language]["Slow Callbacks"], font=('Arial', 10), bg='white').pack(pady=5)
+        self.slow_tree = Treeview(self, columns=("Name", "Duration", "Ago"), show="headings", height=8)
+        self.slow_tree.heading("Name", text=LANGUAGES[self.language]["Profiler"])
+        self.slow_tree.heading("Duration", text=LANGUAGES[self.language]["Duration"])
+        self.slow_tree.heading("Ago", text="s")
+        self.slow_tree.column("Name", width=300)
+        self.slow_tree.column("Duration", width=100)
+        self.slow_tree.column("Ago", width=80)
+        self.slow_tree.pack(pady=5, expand=True, fill='both')
+
+        self.summary_tree = Treeview(self, columns=("Name", "Calls", "Total", "Slowest"), show="headings", height=10)
+        self.summary_tree.heading("Name", text=LANGUAGES[self.language]["Profiler"])
+        self.summary_tree.heading("Calls", text=LANGUAGES[self.language]["Calls"])
+        self.summary_tree.heading("Total", text=LANGUAGES[self.language]["Total"])
+        self.summary_tree.heading("Slowest", text=LANGUAGES[self.language]["Slowest"])
+        self.summary_tree.column("Name", width=260)
+        self.summary_tree.column("Calls", width=80)
+        self.summary_tree.column("Total", width=100)
+        self.summary_tree.column("Slowest", width=100)
+        self.summary_tree.pack(pady=5, expand=True, fill='both')
+
+        self.export_button = Button(self, text=LANGUAGES[self.language]["Export Trace"], command=self.export_trace, font=('Arial', 10), bg='white', fg='black', relief='raised', bd=2)
+        self.export_button.pack(pady=5)
+
+        self.refresh()
+
+    def refresh(self):
+        """تحديث الجدولين كل ثانية ما دامت النافذة مفتوحة."""
+        now = time.perf_counter()
+        self.slow_tree.delete(*self.slow_tree.get_children())
+        for label, start, duration in reversed(PROFILER.slow_calls):
+            self.slow_tree.insert("", END, values=(label, f"{duration * 1000:.1f}", f"{now - start:.0f}"))
+        self.summary_tree.delete(*self.summary_tree.get_children())
+        for label, calls, total, longest in PROFILER.summary():
+            self.summary_tree.insert("", END, values=(label, calls, f"{total * 1000:.1f}", f"{longest * 1000:.1f}"))
+        self.after(self.REFRESH_MS, self.refresh)
+
+    def export_trace(self):
+        """حفظ الأحداث بصيغة Chrome trace."""
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Chrome trace", "*.json")])
+        if path:
+            PROFILER.export_chrome_trace(path)
+
+
+# نافذة سجل التغييرات (HistoryDialog)
+class HistoryDialog(Toplevel):
+    """الإجراءات المنفذة والمتراجع عنها؛ اختيار إجراء ينقل البيانات إلى ما بعده مباشرة."""
+
+    def __init__(self, parent, language):
+        super().__init__(parent)
+        self.language = language
+        self.title(LANGUAGES[self.language]["History"])
+        self.geometry("450x400")
+        self.configure(bg='white')
+
+        self.history_list = Listbox(self, font=('Arial', 10), bg='white', selectbackground='lightblue')
+        self.history_list.bind('<Double-Button-1>', self.go_to)
+        self.history_list.pack(pady=5, expand=True, fill='both')
+
+        self.go_button = Button(self, text=LANGUAGES[self.language]["Undo"] + " / " + LANGUAGES[self.language]["Redo"], command=self.go_to, font=('Arial', 10), bg='white', fg='black', relief='raised', bd=2)
+        self.go_button.pack(pady=5)
+
+        self.refresh()
+
+    def refresh(self):
+        """عرض الإجراءات من الأقدم إلى الأحدث (المتراجع عنها باللون الرمادي)."""
+        self.history_list.delete(0, END)
+        for action, done in self.master.engine.history():
+            label = LANGUAGES[self.language].get(action['label'], action['label'])
+            moment = time.strftime("%H:%M:%S", time.localtime(action['time']))
+            self.history_list.insert(END, f"{moment}  {label}: {action['detail']}" if action['detail'] else f"{moment}  {label}")
+            if not done:
+                self.history_list.itemconfig(END, fg='gray')
+
+    def go_to(self, event=None):
+        """التراجع أو الإعادة حتى يصبح الإجراء المحدد آخر إجراء منفذ."""
+        selection = self.history_list.curselection()
+        if not selection:
+            return
+        engine = self.master.engine
+        target = selection[0] + 1  # عدد الإجراءات المنفذة بعد الانتقال
+        changed = set()
+        while len(engine.undo_stack) > target:
+            changed |= engine.undo()
+        while len(engine.undo_stack) < target and engine.redo_stack:
+            changed |= engine.redo()
+        self.master.refresh_changed_submenus(changed)
+        self.refresh()
+
+
 # نافذة إضافة قائمة فرعية (AddSubmenuDialog)
 class AddSubmenuDialog(simpledialog.Dialog):
     def __init__(self, parent, language):
@@ -389,9 +519,9 @@ class StudentTasksDialog(Toplevel):
         """فتح نافذة إضافة مهمة."""
         dialog = AddTaskDialog(self, language=self.language)
         if dialog.result:
-            description, priority, date = dialog.result
+            description, priority, date, repeat = dialog.result
             if description:  # التأكد من أن الوصف ليس فارغًا
-                self.master.add_task(LANGUAGES[self.language]["Student"], description, priority, date)
+                self.master.add_task("Student", description, priority, date, repeat=repeat)
 
 
 # نافذة مهام العمل (WorkTasksDialog)
@@ -427,14 +557,14 @@ class WorkTasksDialog(Toplevel):
         """فتح نافذة إضافة مهمة."""
         dialog = AddTaskDialog(self, language=self.language)
         if dialog.result:
-            description, priority, date = dialog.result
+            description, priority, date, repeat = dialog.result
             if description:  # التأكد من أن الوصف ليس فارغًا
-                self.master.add_task(LANGUAGES[self.language]["Work"], description, priority, date)
+                self.master.add_task("Work", description, priority, date, repeat=repeat)
 
 
 # واجهة التطبيق الرئيسي (ToDoApp)
 class ToDoApp(Tk):
-    def __init__(self):
+    def __init__(self, store=None, shared=False, snapshot_path='tasks.json'):
         super().__init__()
         self.title("To-Do List Manager")
         self.geometry("700x700")
@@ -455,6 +585,7 @@ class ToDoApp(Tk):
         self.main_menu_label.pack(pady=5)
 
         self.main_menu_list = Listbox(self, font=self.font, height=5, bg='lightgray', selectbackground='lightblue')
+        self.menu_keys = []  # مفتاح كل صف في القائمة الرئيسية (اسم القائمة الفرعية أو أحد STATUS_VIEWS)
         self.main_menu_list.bind('<<ListboxSelect>>', self.open_sub_menu)
         self.main_menu_list.pack(pady=5)
 
@@ -464,16 +595,20 @@ class ToDoApp(Tk):
         self.tasks_label = Label(self, text=LANGUAGES[self.language]["Tasks"], font=self.font, bg='lightblue')
         self.tasks_label.pack(pady=5)
 
-        self.tasks_tree = Treeview(self, columns=("Description", "Priority", "Date", "Status"), show="headings", height=15)
+        self.tasks_tree = Treeview(self, columns=("Description", "Priority", "Date", "Status", "Submenu"), show="headings", height=15)
         self.tasks_tree.heading("Description", text=LANGUAGES[self.language]["Task Description"])
         self.tasks_tree.heading("Priority", text=LANGUAGES[self.language]["Priority"])
         self.tasks_tree.heading("Date", text=LANGUAGES[self.language]["Date"])
         self.tasks_tree.heading("Status", text=LANGUAGES[self.language]["Completion Rate"])
+        self.tasks_tree.heading("Submenu", text=LANGUAGES[self.language]["Submenu Name"])
         self.tasks_tree.column("Description", width=200)
         self.tasks_tree.column("Priority", width=100)
         self.tasks_tree.column("Date", width=100)
         self.tasks_tree.column("Status", width=100)
+        self.tasks_tree.column("Submenu", width=120)
         self.tasks_tree.pack(pady=5)
+        self.task_view = TaskTreeView(self.tasks_tree, lambda: self.language, lambda task_id: self.task_index.get(task_id, ""))
+        self.current_submenu = None  # القائمة الفرعية المعروضة في الجدول الرئيسي
 
         self.mark_done_button = Button(self, text=LANGUAGES[self.language]["Mark as Done"], command=self.mark_task_as_done, font=self.font, bg='white', fg='black', relief='raised', bd=2)
         self.mark_done_button.pack(pady=5)
@@ -490,12 +625,50 @@ class ToDoApp(Tk):
         self.reset_button = Button(self, text=LANGUAGES[self.language]["Reset"], command=self.confirm_reset, font=self.font, bg='white', fg='black', relief='raised', bd=2)
         self.reset_button.pack(pady=5)
 
-        self.task_lists = {}
+        self.statistics_button = Button(self, text=LANGUAGES[self.language]["Statistics"], command=self.show_statistics, font=self.font, bg='white', fg='black', relief='raised', bd=2)
+        self.statistics_button.pack(pady=5)
+
+        self.import_button = Button(self, text=LANGUAGES[self.language]["Import"], command=self.import_tasks, font=self.font, bg='white', fg='black', relief='raised', bd=2)
+        self.import_button.pack(pady=5)
+
+        self.undo_button = Button(self, text=LANGUAGES[self.language]["Undo"], command=self.undo, font=self.font, bg='white', fg='black', relief='raised', bd=2)
+        self.undo_button.pack(pady=5)
+
+        self.redo_button = Button(self, text=LANGUAGES[self.language]["Redo"], command=self.redo, font=self.font, bg='white', fg='black', relief='raised', bd=2)
+        self.redo_button.pack(pady=5)
+
+        self.history_button = Button(self, text=LANGUAGES[self.language]["History"], command=self.show_history, font=self.font, bg='white', fg='black', relief='raised', bd=2)
+        self.history_button.pack(pady=5)
+
+        self.bind_all("<Control-z>", self.undo)
+        self.bind_all("<Control-y>", self.redo)
+
+        if PROFILER.enabled:
+            self.profiler_button = Button(self, text=LANGUAGES[self.language]["Profiler"], command=self.show_profiler, font=self.font, bg='white', fg='black', relief='raised', bd=2)
+            self.profiler_button.pack(pady=5)
+
+        self.engine = TaskEngine(store, snapshot_path=snapshot_path, shared=shared)  # البيانات وعملياتها (todo_core)
+        self._search_job = None
+        self.loading = False  # القوائم الفرعية لا تزال تُقرأ في الخلفية
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.load_from_json()
 
-        # إضافة قائمة فرعية لمهام الغير منجزة والمهام المنجزة
-        self.main_menu_list.insert(END, LANGUAGES[self.language]["Uncompleted Tasks"])
-        self.main_menu_list.insert(END, LANGUAGES[self.language]["Completed Tasks"])
+        # إضافة قائمة فرعية لمهام الغير منجزة والمنجزة والمستحقة
+        for view in STATUS_VIEWS:
+            self.insert_menu_row(END, view)
+
+    @property
+    def task_lists(self):
+        return self.engine.task_lists
+
+    @property
+    def task_index(self):
+        return self.engine.task_index
+
+    def on_close(self):
+        """كتابة التغييرات المعلقة على القرص قبل إغلاق النافذة."""
+        self.engine.close()
+        self.destroy()
 
     def update_language(self, event):
         """تحديث اللغة لأجزاء الواجهة."""
@@ -509,22 +682,60 @@ class ToDoApp(Tk):
         self.search_box.insert(0, LANGUAGES[self.language]["Search Task Placeholder"])
         self.add_submenu_button.config(text=LANGUAGES[self.language]["Add Submenu"])
         self.reset_button.config(text=LANGUAGES[self.language]["Reset"])
-
+        self.statistics_button.config(text=LANGUAGES[self.language]["Statistics"])
+        self.import_button.config(text=LANGUAGES[self.language]["Import"])
+        self.undo_button.config(text=LANGUAGES[self.language]["Undo"])
+        self.redo_button.config(text=LANGUAGES[self.language]["Redo"])
+        self.history_button.config(text=LANGUAGES[self.language]["History"])
+        for column, key in (("Description", "Task Description"), ("Priority", "Priority"), ("Date", "Date"),
+                            ("Status", "Completion Rate"), ("Submenu", "Submenu Name")):
+            self.tasks_tree.heading(column, text=LANGUAGES[self.language][key])
+        # البيانات لا تتغير؛ تُعاد كتابة التسميات الظاهرة فقط
+        self.relabel_menu()
+        self.task_view.refresh_labels()
+
+    def menu_label(self, key):
+        """تسمية صف القائمة الرئيسية بلغة الواجهة."""
+        if key in STATUS_VIEWS:
+            return LANGUAGES[self.language][key]
+        return localize_submenu(key, self.language)
+
+    def insert_menu_row(self, position, key):
+        """إضافة صف إلى القائمة الرئيسية (END أو رقم الصف)."""
+        if position == END:
+            position = len(self.menu_keys)
+        self.menu_keys.insert(position, key)
+        self.main_menu_list.insert(position, self.menu_label(key))
+
+    def insert_submenu_row(self, submenu):
+        """إضافة قائمة فرعية قبل القوائم الثابتة في نهاية القائمة الرئيسية."""
+        views = sum(1 for key in self.menu_keys if key in STATUS_VIEWS)
+        self.insert_menu_row(len(self.menu_keys) - views, submenu)
+
+    def relabel_menu(self):
+        """إعادة كتابة صفوف القائمة الرئيسية التي تتغير تسميتها مع اللغة فقط."""
+        for position, key in enumerate(self.menu_keys):
+            label = self.menu_label(key)
+            if self.main_menu_list.get(position) != label:
+                self.main_menu_list.delete(position)
+                self.main_menu_list.insert(position, label)
+
+    def refresh_submenu_list(self):
+        """إعادة بناء قائمة القوائم الفرعية."""
         self.main_menu_list.delete(0, END)
+        self.menu_keys = []
         for key in self.task_lists:
-            self.main_menu_list.insert(END, key)
-        self.main_menu_list.insert(END, LANGUAGES[self.language]["Uncompleted Tasks"])
-        self.main_menu_list.insert(END, LANGUAGES[self.language]["Completed Tasks"])
+            self.insert_menu_row(END, key)
+        for view in STATUS_VIEWS:
+            self.insert_menu_row(END, view)
 
     def add_new_submenu(self):
         """إضافة قائمة فرعية جديدة."""
         dialog = AddSubmenuDialog(self, language=self.language)
         if dialog.result:
             submenu_name = dialog.result.strip()
-            if submenu_name and submenu_name not in self.task_lists:
-                self.task_lists[submenu_name] = TaskList()
-                self.main_menu_list.insert(END, submenu_name)
-                self.save_to_json(submenu_name)
+            if self.engine.add_submenu(submenu_name):
+                self.insert_submenu_row(self.engine.resolve_submenu(submenu_name))
                 messagebox.showinfo("نجاح", f"تم إضافة القائمة الفرعية '{submenu_name}' بنجاح!")
             else:
                 messagebox.showwarning("تحذير", "اسم القائمة الفرعية موجود بالفعل أو فارغ!")
@@ -533,29 +744,38 @@ class ToDoApp(Tk):
         """فتح القائمة الفرعية المحددة."""
         selected_index = self.main_menu_list.curselection()
         if selected_index:
-            selected_item = self.main_menu_list.get(selected_index)
+            selected_item = self.menu_keys[selected_index[0]]
             if selected_item in self.task_lists:
                 dialog = SubMenuDialog(self, selected_item, language=self.language)
                 dialog.mainloop()
-            elif selected_item == LANGUAGES[self.language]["Uncompleted Tasks"]:
+            elif selected_item == "Uncompleted Tasks":
                 self.show_uncompleted_tasks()
-            elif selected_item == LANGUAGES[self.language]["Completed Tasks"]:
+            elif selected_item == "Completed Tasks":
                 self.show_completed_tasks()
+            elif selected_item == "Due Tasks":
+                self.show_due_tasks()
 
     def load_tasks_for_submenu(self, submenu):
         """تحميل المهام الخاصة بالقائمة الفرعية."""
-        self.tasks_tree.delete(*self.tasks_tree.get_children())
-        if submenu in self.task_lists:
-            tasks = self.task_lists[submenu].get_all_tasks()
-            for task in tasks:
-                status = "مكتملة" if task[3] else "قيد التنفيذ"
-                self.tasks_tree.insert("", END, values=(task[0], task[1], task[2], status))
-
-    def add_task(self, submenu, description, priority, date, completed=False):
+        self.current_submenu = submenu if submenu in self.task_lists else None
+        self.task_view.show(self.task_lists.get(submenu, ()))
+
+    def add_task(self, submenu, description, priority, date, completed=False, task_id=None, repeat=None):
         """إضافة مهمة جديدة إلى القائمة الفرعية المحددة."""
-        self.task_lists[submenu].add_task(description, priority, date, completed)
-        self.load_tasks_for_submenu(submenu)
-        self.save_to_json(submenu)
+        submenu = self.engine.resolve_submenu(submenu)
+        is_new_submenu = submenu not in self.task_lists
+        if is_new_submenu and self.loading:
+            # القائمة قد تكون في اللقطة ولم تصل بعد؛ إنشاؤها الآن يجعل وصولها يستبدلها
+            messagebox.showinfo("تنبيه", LANGUAGES[self.language]["Still Loading"])
+            return None
+        node = self.engine.add_task(submenu, description, priority, date, completed, task_id=task_id, repeat=repeat)
+        if is_new_submenu:
+            self.refresh_submenu_list()
+        if self.current_submenu == submenu and not self.task_lists[submenu].sort_order:
+            self.task_view.add_node(node)
+        else:
+            self.load_tasks_for_submenu(submenu)
+        return node
 
     def mark_task_as_done(self):
         """تحديد المهمة كمكتملة."""
@@ -563,86 +783,187 @@ class ToDoApp(Tk):
         if not selected_item:
             messagebox.showinfo("تنبيه", LANGUAGES[self.language]["Task Not Found"])
             return
-        task_description = self.tasks_tree.item(selected_item, "values")[0]
-        for submenu, task_list in self.task_lists.items():
-            task_list.mark_task_as_done(task_description)
-        self.load_tasks_for_submenu(self.main_menu_list.get(ACTIVE))
-        self.save_to_json(self.main_menu_list.get(ACTIVE))
+        node = self.mark_task_as_done_by_id(selected_item[0])
+        if node:
+            self.task_view.update_node(node)
+
+    def mark_task_as_done_by_id(self, task_id):
+        """تحديد المهمة كمكتملة بواسطة المعرف في قائمتها الفرعية فقط."""
+        return self.engine.mark_task_as_done_by_id(task_id)
 
     def delete_task(self, submenu, description):
         """حذف مهمة من القائمة الفرعية المحددة."""
-        self.task_lists[submenu].delete_task(description)
-        self.load_tasks_for_submenu(submenu)
-        self.save_to_json(submenu)
+        node = self.engine.delete_task(submenu, description)
+        if node:
+            self.task_view.remove_node(node.id)
+
+    def delete_task_by_id(self, task_id):
+        """حذف مهمة بواسطة المعرف."""
+        node = self.engine.delete_task_by_id(task_id)
+        if node:
+            self.task_view.remove_node(task_id)
+        return node
+
+    def sort_tasks(self, submenu, order):
+        """فرز مهام القائمة الفرعية وتسجيل عملية الفرز."""
+        self.engine.sort_tasks(submenu, order)
 
     def search_task(self, event):
-        """بحث عن مهمة باستخدام الكلمات المفتاحية."""
+        """بحث عن مهمة باستخدام الكلمات المفتاحية (بعد توقف الكتابة لحظة)."""
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DELAY_MS, self._run_search)
+
+    def _run_search(self):
+        """عرض جميع المهام المطابقة من كل القوائم الفرعية مرتبة حسب التطابق."""
+        self._search_job = None
         search_text = self.search_box.get().strip().lower()
-        self.tasks_tree.delete(*self.tasks_tree.get_children())
+        self.current_submenu = None
+        self.task_view.clear()
         if search_text:
-            found = False
-            for submenu, task_list in self.task_lists.items():
-                tasks = task_list.get_all_tasks()
-                for task in tasks:
-                    if search_text in task[0].lower():
-                        self.load_tasks_for_submenu(submenu)
-                        self.tasks_tree.delete(*self.tasks_tree.get_children())
-                        status = "مكتملة" if task[3] else "قيد التنفيذ"
-                        self.tasks_tree.insert("", END, values=(task[0], task[1], task[2], status))
-                        found = True
-                        break
-                if found:
-                    break
-            if not found:
+            self.task_view.show(self.engine.search(search_text))
+            if not self.task_view.nodes:
                 messagebox.showinfo("بحث", LANGUAGES[self.language]["Task Not Found"])
 
     def load_from_json(self):
-        """تحميل البيانات من ملف JSON."""
+        """تحميل البيانات من ملف JSON في الخلفية ثم إعادة تطبيق سجل العمليات."""
+        if self.engine.store:
+            for submenu in self.engine.load_submenu_names():
+                self.insert_menu_row(END, submenu)
+            self.after(0, self.check_reminders)
+            return
+        self._loaded_submenus = queue.Queue()
+        self.set_loading(True)
+        threading.Thread(target=self._read_snapshot, daemon=True).start()
+        self.after(0, self._poll_loaded_submenus)
+        self.after(SAVE_CHECK_MS, self.check_save_errors)
+
+    def set_loading(self, loading):
+        """تعطيل إضافة القوائم الفرعية والاستيراد وإعادة الضبط حتى تكتمل قراءة اللقطة.
+
+        هذه التعديلات قد تنشئ قائمة فرعية لم تصل من اللقطة بعد (أو تحذفها)، فتستبدلها
+        القائمة المقروءة عند وصولها.
+        """
+        self.loading = loading
+        for button in (self.add_submenu_button, self.import_button, self.reset_button):
+            button.config(state='disabled' if loading else 'normal')
+
+    def _read_snapshot(self):
+        """(خيط الخلفية) تحليل ملف JSON وإرسال كل قائمة فرعية فور قراءتها."""
         try:
-            with open('tasks.json', 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                for submenu, tasks in data.items():
-                    self.task_lists[submenu] = TaskList()
-                    for task in tasks:
-                        self.task_lists[submenu].add_task(task['description'], task['priority'], task['date'], task['completed'])
-                    self.main_menu_list.insert(END, submenu)
-        except FileNotFoundError:
-            pass
-
-    def save_to_json(self, submenu):
-        """حفظ البيانات في ملف JSON."""
-        data = {}
-        for key, task_list in self.task_lists.items():
-            tasks = task_list.get_all_tasks()
-            data[key] = [{'description': task[0], 'priority': task[1], 'date': task[2], 'completed': task[3]} for task in tasks]
-        with open('tasks.json', 'w', encoding='utf-8') as file:
-            json.dump(data, file, ensure_ascii=False, indent=4)
+            for item in self.engine.iter_snapshot_lists():
+                self._loaded_submenus.put(item)
+        finally:
+            self._loaded_submenus.put(None)
+
+    def _poll_loaded_submenus(self):
+        """إضافة القوائم الفرعية المقروءة إلى الواجهة تدريجيًا."""
+        while True:
+            try:
+                item = self._loaded_submenus.get_nowait()
+            except queue.Empty:
+                self.after(50, self._poll_loaded_submenus)
+                return
+            if item is None:
+                if self.engine.finish_loading():
+                    self.refresh_submenu_list()
+                self.set_loading(False)
+                self.check_reminders()
+                if self.engine.journal.shared:
+                    self.after(SHARED_POLL_MS, self.poll_shared_changes)
+                return
+            submenu, task_list = item
+            self.engine.register_task_list(submenu, task_list)
+            self.insert_submenu_row(submenu)
+
+    def poll_shared_changes(self):
+        """تطبيق تغييرات النسخ الأخرى وتحديث القوائم المعروضة التي تغيرت فقط."""
+        self.refresh_changed_submenus(self.engine.poll_changes())
+        self.after(SHARED_POLL_MS, self.poll_shared_changes)
+
+    def check_save_errors(self):
+        """عرض أخطاء الكتابة على القرص التي واجهها خيط الحفظ (دون انتظاره)."""
+        error = self.engine.persistence.take_error()
+        if error is not None:
+            messagebox.showerror("خطأ", LANGUAGES[self.language]["Save Failed"].format(error=error), parent=self)
+        self.after(SAVE_CHECK_MS, self.check_save_errors)
+
+    def refresh_changed_submenus(self, changed):
+        """تحديث قائمة القوائم الفرعية والجدول إذا كانت قائمته بين ما تغير (None = الكل)."""
+        if changed:
+            self.refresh_submenu_list()
+            if self.current_submenu is not None and (None in changed or self.current_submenu in changed):
+                self.load_tasks_for_submenu(self.current_submenu)
+
+    def undo(self, event=None):
+        """التراجع عن آخر إجراء (Ctrl+Z)."""
+        self.refresh_changed_submenus(self.engine.undo())
+
+    def redo(self, event=None):
+        """إعادة آخر إجراء تم التراجع عنه (Ctrl+Y)."""
+        self.refresh_changed_submenus(self.engine.redo())
+
+    def show_history(self):
+        """فتح نافذة سجل التغييرات."""
+        HistoryDialog(self, language=self.language)
+
+    def check_reminders(self):
+        """التذكير بالمهام التي حان موعدها منذ آخر فحص ثم جدولة الفحص التالي."""
+        due = self.engine.pop_due_tasks()
+        if due:
+            lines = [f"{node.date}  {node.description}" for node in due[:10]]
+            if len(due) > 10:
+                lines.append(f"... (+{len(due) - 10})")
+            messagebox.showinfo(LANGUAGES[self.language]["Due Tasks"], "\n".join(lines))
+        self.after(REMINDER_INTERVAL_MS, self.check_reminders)
 
     def get_tasks_for_submenu(self, submenu):
         """الحصول على جميع المهام في القائمة الفرعية المحددة."""
-        if submenu in self.task_lists:
-            return self.task_lists[submenu].get_all_tasks()
-        return []
+        return self.engine.get_tasks_for_submenu(submenu)
 
     def show_uncompleted_tasks(self):
         """عرض جميع المهام الغير منجزة."""
-        self.tasks_tree.delete(*self.tasks_tree.get_children())
-        for submenu, task_list in self.task_lists.items():
-            tasks = task_list.get_all_tasks()
-            for task in tasks:
-                if not task[3]:
-                    status = "قيد التنفيذ"
-                    self.tasks_tree.insert("", END, values=(task[0], task[1], task[2], status))
+        self.current_submenu = None
+        self.task_view.show(self.engine.iter_tasks_by_status(False))
 
     def show_completed_tasks(self):
         """عرض جميع المهام المنجزة."""
-        self.tasks_tree.delete(*self.tasks_tree.get_children())
-        for submenu, task_list in self.task_lists.items():
-            tasks = task_list.get_all_tasks()
-            for task in tasks:
-                if task[3]:
-                    status = "مكتملة"
-                    self.tasks_tree.insert("", END, values=(task[0], task[1], task[2], status))
+        self.current_submenu = None
+        self.task_view.show(self.engine.iter_tasks_by_status(True))
+
+    def show_due_tasks(self):
+        """عرض المهام المستحقة اليوم والمتأخرة مجمعة حسب القائمة الفرعية."""
+        self.current_submenu = None
+        self.task_view.show(self.engine.iter_due_tasks())
+
+    def import_tasks(self):
+        """استيراد مهام من ملف CSV أو JSON Lines مع تحديث الواجهة مرة واحدة."""
+        path = filedialog.askopenfilename(parent=self, filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("*", "*")])
+        if not path:
+            return
+        started = time.perf_counter()
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as file:
+                count = self.engine.import_tasks(task_reader_for(path)(file))
+        except (OSError, ValueError) as error:
+            count = None
+            messagebox.showerror("خطأ", LANGUAGES[self.language]["Import Failed"].format(error=error), parent=self)
+        elapsed = time.perf_counter() - started
+        self.refresh_submenu_list()
+        if self.current_submenu is not None:
+            self.load_tasks_for_submenu(self.current_submenu)
+        if count is None:
+            return
+        rate = count / elapsed if elapsed else 0
+        messagebox.showinfo("نجاح", LANGUAGES[self.language]["Imported Tasks"].format(count=count, rate=rate))
+
+    def show_statistics(self):
+        """فتح نافذة الإحصائيات."""
+        StatisticsDialog(self, language=self.language)
+
+    def show_profiler(self):
+        """فتح نافذة قياس الأداء."""
+        ProfilerDialog(self, language=self.language)
 
     def confirm_reset(self):
         """تأكيد إعادة ضبط جميع البيانات."""
@@ -652,13 +973,44 @@ class ToDoApp(Tk):
 
     def reset_data(self):
         """إعادة ضبط جميع البيانات."""
-        self.task_lists = {}
-        self.main_menu_list.delete(0, END)
-        self.tasks_tree.delete(*self.tasks_tree.get_children())
-        self.save_to_json("reset")
+        self.engine.reset()
+        self.refresh_submenu_list()
+        self.current_submenu = None
+        self.task_view.clear()
         messagebox.showinfo("نجاح", "تم إعادة ضبط جميع البيانات بنجاح!")
 
 
+def instrument_ui():
+    """تغليف عمليات القائمة والحفظ واستدعاءات الواجهة بمؤقتات."""
+    instrument_core()
+    PROFILER.instrument(ToDoApp, ['open_sub_menu', 'load_tasks_for_submenu', 'add_task', 'mark_task_as_done', 'delete_task_by_id',
+                                  'sort_tasks', 'search_task', '_run_search', '_poll_loaded_submenus', 'poll_shared_changes', 'check_reminders', 'show_uncompleted_tasks',
+                                  'show_completed_tasks', 'show_due_tasks', 'import_tasks', 'undo', 'redo'], 'ui')
+    PROFILER.instrument(SubMenuDialog, ['load_tasks', 'add_new_task', 'delete_selected_task', 'mark_task_as_done'], 'ui')
+    PROFILER.instrument(TaskTreeView, ['show', '_render_more'], 'render')
+
+
+def option_value(name, default):
+    """قيمة خيار اختيارية من سطر الأوامر (None إذا لم يُذكر الخيار)."""
+    if name not in sys.argv:
+        return None
+    position = sys.argv.index(name)
+    if position + 1 < len(sys.argv) and not sys.argv[position + 1].startswith("--"):
+        return sys.argv[position + 1]
+    return default
+
+
 if __name__ == "__main__":
-    app = ToDoApp()
+    # python To-Do-List-Project.py [--data tasks.json|tasks.bin] [--sqlite [tasks.db]] [--shared] [--profile [trace.json]]
+    store = None
+    sqlite_path = option_value("--sqlite", 'tasks.db')
+    if sqlite_path:
+        store = SQLiteTaskStore(sqlite_path)
+    trace_path = option_value("--profile", 'trace.json')
+    if trace_path:
+        instrument_ui()
+    app = ToDoApp(store, shared="--shared" in sys.argv, snapshot_path=option_value("--data", 'tasks.json') or 'tasks.json')
     app.mainloop()
+    app.engine.close()
+    if trace_path:
+        PROFILER.export_chrome_trace(trace_path)
@@ -0,0 +1,87 @@
+"""مقارنة استهلاك الذاكرة بين عقد المهام القديمة (__dict__ ونصوص) والعقد المضغوطة.
+
+الاستخدام: python memory_benchmark.py [عدد المهام]
+"""
+import sys
+import random
+import tracemalloc
+
+from todo_core import TaskList, TaskNode
+
+
+# العقدة بصيغتها السابقة (للمقارنة فقط)
+class LegacyTaskNode:
+    def __init__(self, description, priority, date, completed=False, next_node=None):
+        self.description = description
+        self.priority = priority
+        self.date = date
+        self.completed = completed
+        self.next = next_node
+
+
+def generate_tasks(count, seed=0):
+    """توليد مهام عشوائية بأولويات ووصف بالعربي والإنجليزي."""
+    rng = random.Random(seed)
+    priorities = ["عالي", "متوسط", "منخفض", "High", "Medium", "Low"]
+    words = ["واجب", "مراجعة", "دراسة", "Homework", "Review", "Project", "Shopping"]
+    for i in range(count):
+        # النصوص تُبنى في كل مرة كما لو قُرئت من ملف JSON
+        description = f"{rng.choice(words)} {i % 500}"
+        priority = "".join(rng.choice(priorities))
+        date = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        yield description, priority, date, rng.random() < 0.3
+
+
+def measure(build, count):
+    """الذاكرة المتبقية بعد بناء المهام (بما فيها النصوص المقروءة)."""
+    tracemalloc.start()
+    keep = build(generate_tasks(count))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del keep
+    return current
+
+
+def build_legacy(tasks):
+    head = tail = None
+    for description, priority, date, completed in tasks:
+        node = LegacyTaskNode(description, priority, date, completed)
+        if tail:
+            tail.next = node
+        else:
+            head = node
+        tail = node
+    return head
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    def build_compact(tasks):
+        task_list = TaskList()
+        for description, priority, date, completed in tasks:
+            task_list.add_task(description, priority, date, completed)
+        return task_list
+
+    def build_compact_nodes(tasks):
+        head = tail = None
+        for description, priority, date, completed in tasks:
+            node = TaskNode(description, priority, date, completed)
+            if tail:
+                tail.next = node
+            else:
+                head = node
+            tail = node
+        return head
+
+    legacy = measure(build_legacy, count)
+    compact_nodes = measure(build_compact_nodes, count)
+    compact_list = measure(build_compact, count)
+    print(f"tasks: {count}")
+    print(f"legacy nodes:            {legacy / count:8.1f} bytes/task")
+    print(f"__slots__ nodes + id:    {compact_nodes / count:8.1f} bytes/task")
+    print(f"TaskList (with indexes): {compact_list / count:8.1f} bytes/task")
+
+
+if __name__ == "__main__":
+    main()
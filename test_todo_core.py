@@ -0,0 +1,666 @@
+"""اختبارات todo_core (مهام في مجلدات مؤقتة، دون واجهة رسومية).
+
+الاستخدام: python -m pytest -q (أو python -m unittest)
+"""
+import os
+import json
+import hashlib
+import time
+import random
+import tempfile
+import threading
+import unittest
+from datetime import date
+
+import todo_cli
+import todo_core
+from todo_core import (
+    FileLock, PersistenceWorker, Recurrence, SQLiteTaskStore, TaskEngine, TaskJournal, TaskList, TaskQuery, TaskStats,
+    convert_snapshot, date_ordinal, priority_code, read_tasks_csv, read_tasks_jsonl
+)
+
+
+def stats_state(stats):
+    """العدادات دون الخانات الفارغة (الحساب التدريجي يُبقي خانة صفرية بعد الحذف)."""
+    return (stats.total, stats.completed,
+            {code: bucket for code, bucket in stats.by_priority.items() if bucket[0]},
+            {month: bucket for month, bucket in stats.by_month.items() if bucket[0]})
+
+
+def recount(task_list):
+    """العدادات محسوبة من جديد بالمرور على المهام."""
+    stats = TaskStats()
+    for node in task_list:
+        stats.add(node.priority_code, node.date_ordinal, node.completed)
+    return stats
+
+
+def file_digest(path):
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def task_state(engine):
+    """المهام وترتيب الفرز لكل قائمة فرعية (للمقارنة بعد إعادة التحميل)."""
+    return ({submenu: [(node.id, node.description, node.priority, node.date, node.completed, node.repeat)
+                       for node in task_list]
+             for submenu, task_list in engine.task_lists.items()},
+            {submenu: task_list.sort_order for submenu, task_list in engine.task_lists.items()})
+
+
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+        self.engines = []
+
+    def tearDown(self):
+        for engine in self.engines:
+            engine.close()
+        self._directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def write_json(self, name, data):
+        with open(self.path(name), 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+
+    def open_engine(self, name='tasks.json', shared=False):
+        engine = TaskEngine(snapshot_path=self.path(name), shared=shared)
+        engine.load_from_json()
+        self.engines.append(engine)
+        return engine
+
+    def reopen(self, engine, name='tasks.json'):
+        """إغلاق المحرك وفتح نسخة جديدة على الملفات نفسها."""
+        engine.close()
+        self.engines.remove(engine)
+        return self.open_engine(name)
+
+    @staticmethod
+    def fill(engine):
+        engine.add_task('Projects', 'Write report', 'High', '2024-05-03')
+        engine.add_task('Projects', 'Review PR', 'Low', '2024-05-01')
+        engine.add_task('Exercise', 'Morning run', 'Medium', '2024-05-01', repeat='daily:2024-05-01:2024-05-10')
+        engine.add_submenu('Empty')
+        engine.sort_tasks('Projects', 'date')
+        engine.mark_task_as_done_by_id(engine.task_lists['Projects'].find_by_description('Review PR').id)
+
+
+# سجل العمليات
+class JournalTest(TempDirTestCase):
+    def test_replay_restores_state(self):
+        engine = self.open_engine()
+        self.fill(engine)
+        expected = task_state(engine)
+        engine = self.reopen(engine)
+        self.assertEqual(task_state(engine), expected)
+
+    def test_compaction_writes_shards_and_empties_log(self):
+        engine = self.open_engine()
+        self.fill(engine)
+        expected = task_state(engine)
+        engine._compact()
+        engine.flush()
+        self.assertTrue(os.path.exists(self.path('tasks.manifest.json')))
+        self.assertFalse(os.path.exists(self.path('tasks.log')))
+        engine = self.reopen(engine)
+        self.assertFalse(any(task_list.loaded for task_list in engine.task_lists.values()))  # الملفات تُقرأ عند الحاجة
+        self.assertEqual(task_state(engine), expected)
+
+    def test_compaction_rewrites_only_changed_shards(self):
+        engine = self.open_engine()
+        self.fill(engine)
+        engine._compact()
+        engine = self.reopen(engine)
+        shard_dir = self.path('tasks.shards')
+        digests = {name: file_digest(os.path.join(shard_dir, name)) for name in os.listdir(shard_dir)}
+        engine.add_task('Projects', 'New', 'Low', '')
+        engine._compact()
+        engine.flush()
+        self.assertFalse(engine.task_lists['Exercise'].loaded)
+        changed = {name for name in os.listdir(shard_dir)
+                   if digests.get(name) != file_digest(os.path.join(shard_dir, name))}
+        self.assertEqual(changed, {engine.shards['Projects']['file']})
+
+    def test_crash_during_compaction(self):
+        engine = self.open_engine()
+        self.fill(engine)
+        engine._compact()
+        engine.add_task('Projects', 'After compaction', 'Low', '')
+        engine.flush()
+        # توقف بعد نقل السجل إلى .compacting وقبل كتابة اللقطة الجديدة
+        os.replace(self.path('tasks.log'), self.path('tasks.log.compacting'))
+        engine.persistence.compact = lambda update: None
+        engine.add_task('Projects', 'After crash', 'Low', '')
+        expected = task_state(engine)
+        engine = self.reopen(engine)
+        self.assertEqual(task_state(engine), expected)
+        engine.flush()  # الضغط بعد إعادة التشغيل يُكمل ما توقف
+        self.assertFalse(os.path.exists(self.path('tasks.log.compacting')))
+
+    def test_torn_last_line_is_ignored(self):
+        engine = self.open_engine()
+        engine.add_task('Projects', 'Kept', 'High', '')
+        engine.flush()
+        with open(self.path('tasks.log'), 'ab') as file:
+            file.write(b'{"op": "add", "submenu": "Projects", "desc')
+        engine = self.reopen(engine)
+        self.assertEqual([node.description for node in engine.task_lists['Projects']], ['Kept'])
+
+    def test_undo_of_reset_survives_skipped_compaction(self):
+        engine = self.open_engine()
+        self.fill(engine)
+        expected = task_state(engine)
+        engine.reset()
+        engine.persistence.compact = lambda update: None  # ضغط أُلغي (الوضع المشترك) أو لم يكتمل
+        engine.undo()
+        self.assertEqual(task_state(engine), expected)
+        engine = self.reopen(engine)
+        self.assertEqual(task_state(engine), expected)
+
+    def test_undo_redo_persist(self):
+        engine = self.open_engine()
+        self.fill(engine)
+        node = engine.add_task('Projects', 'Temporary', 'High', '')
+        engine.delete_task_by_id(node.id)
+        engine.undo()
+        engine.undo()
+        engine.redo()
+        expected = task_state(engine)
+        self.assertIsNotNone(engine.find_task(node.id))
+        engine = self.reopen(engine)
+        self.assertEqual(task_state(engine), expected)
+
+    def test_legacy_single_file_is_migrated(self):
+        self.write_json('tasks.json', {"Projects": [{"description": "Old", "priority": "عالي", "date": "2024-05-01",
+                                                     "completed": False}]})
+        engine = self.open_engine()
+        engine.flush()
+        self.assertTrue(os.path.exists(self.path('tasks.json.bak')))
+        engine = self.reopen(engine)
+        self.assertEqual([(node.description, node.priority) for node in engine.task_lists['Projects']], [('Old', 'High')])
+
+
+# خيط الحفظ
+class PersistenceWorkerTest(TempDirTestCase):
+    def test_worker_survives_and_reports_errors(self):
+        journal = TaskJournal(self.path('tasks.json'), self.path('tasks.log'))
+        worker = PersistenceWorker(journal)
+        try:
+            def broken(update):
+                raise ValueError("truncated snapshot")
+            journal.compact = broken
+            worker.compact({})
+            worker.flush()  # لا يبقى معلقًا
+            self.assertTrue(worker.thread.is_alive())
+            self.assertIsInstance(worker.take_error(), ValueError)
+            self.assertIsNone(worker.take_error())
+            worker.append({'op': 'add_submenu', 'submenu': 'Projects'})
+            worker.flush()
+            self.assertEqual([op['submenu'] for op in journal.read_log(0)[0]], ['Projects'])
+        finally:
+            worker.close()
+
+    def test_file_lock_released_when_lock_call_fails(self):
+        if todo_core.fcntl is None:
+            self.skipTest("fcntl only")
+        lock = FileLock(self.path('tasks.lock'))
+        flock = todo_core.fcntl.flock
+        try:
+            def failing(*args):
+                raise OSError("lock failed")
+            todo_core.fcntl.flock = failing
+            with self.assertRaises(OSError):
+                lock.acquire()
+        finally:
+            todo_core.fcntl.flock = flock
+        with lock.locked():
+            pass
+        lock.close()
+
+    def test_poll_does_not_wait_for_worker(self):
+        engine = self.open_engine(shared=True)
+        engine.poll_changes()
+        release = threading.Event()
+        append_many = engine.journal.append_many
+        engine.journal.append_many = lambda ops: (release.wait(5), append_many(ops))
+        engine.add_task('Projects', 'Slow disk', 'High', '')
+        started = time.perf_counter()
+        self.assertEqual(engine.poll_changes(), set())
+        self.assertLess(time.perf_counter() - started, 1)
+        release.set()
+        engine.flush()
+        self.assertEqual(engine.poll_changes(), set())  # كتابتنا ليست تغييرًا من نسخة أخرى
+
+    def test_foreign_write_between_own_writes_is_seen(self):
+        first = self.open_engine(shared=True)
+        second = self.open_engine(shared=True)
+        first.poll_changes()
+        for engine, submenu in ((first, 'Projects'), (second, 'Other'), (first, 'Projects')):
+            engine.add_task(submenu, 'Task', 'Low', '')
+            engine.flush()
+        self.assertEqual(first.poll_changes(), {'Other'})
+
+
+# الوضع المشترك
+class SharedModeTest(TempDirTestCase):
+    def test_two_engines_merge(self):
+        first = self.open_engine(shared=True)
+        second = self.open_engine(shared=True)
+        a = first.add_task('Projects', 'From first', 'High', '2024-05-01')
+        b = second.add_task('Projects', 'From second', 'Low', '2024-05-02')
+        first.flush()
+        second.flush()
+        self.assertEqual(first.poll_changes(), {'Projects'})
+        self.assertEqual(second.poll_changes(), {'Projects'})
+        for engine in (first, second):
+            self.assertEqual({node.id for node in engine.task_lists['Projects']}, {a.id, b.id})
+
+        first.mark_task_as_done_by_id(b.id)
+        first._compact()
+        first.flush()
+        second.add_task('Other', 'After compaction', 'Low', '')
+        second.flush()
+        self.assertIn('Projects', second.poll_changes())
+        self.assertTrue(second.find_task(b.id).completed)
+        first.poll_changes()
+        self.assertIn('Other', first.task_lists)
+        self.assertEqual(task_state(first), task_state(second))
+
+        expected = task_state(first)
+        for engine in (first, second):
+            engine.close()
+        self.engines.clear()
+        self.assertEqual(task_state(self.open_engine()), expected)
+
+    def test_own_writes_are_not_reported_as_changes(self):
+        engine = self.open_engine(shared=True)
+        engine.poll_changes()
+        engine.add_task('Projects', 'Mine', 'High', '')
+        self.assertEqual(engine.poll_changes(), set())
+        engine.flush()
+        self.assertEqual(engine.poll_changes(), set())
+
+
+# التحويل بين JSON والصيغة الثنائية
+class ConvertTest(TempDirTestCase):
+    def test_round_trip_leaves_source_untouched(self):
+        engine = self.open_engine()
+        self.fill(engine)
+        expected = task_state(engine)
+        engine._compact()
+        engine = self.reopen(engine)
+        engine.close()
+        self.engines.clear()
+        source_files = sorted(os.listdir(self.directory))
+        digest = file_digest(self.path('tasks.manifest.json'))
+
+        self.assertEqual(convert_snapshot(self.path('tasks.json'), self.path('tasks.bin')), 3)
+        self.assertEqual(convert_snapshot(self.path('tasks.bin'), self.path('copy.json')), 3)
+        self.assertEqual(file_digest(self.path('tasks.manifest.json')), digest)
+        self.assertTrue(set(source_files) <= set(os.listdir(self.directory)))
+        self.assertFalse(os.path.exists(self.path('tasks.json.bak')))
+        self.assertEqual(task_state(self.open_engine('tasks.bin')), expected)
+
+        # الهدف JSON ملف واحد بصيغة tasks.json الأصلية، بترتيب العرض ودون ترتيب الفرز
+        with open(self.path('copy.json'), encoding='utf-8') as file:
+            data = json.load(file)
+        self.assertEqual(list(data), list(expected[0]))
+        self.assertFalse(os.path.exists(self.path('copy.manifest.json')))
+        self.assertEqual(task_state(self.open_engine('copy.json'))[0], expected[0])
+
+    def test_legacy_source_is_not_renamed(self):
+        self.write_json('tasks.json', {"Projects": [{"id": "a1", "description": "Old", "priority": "High", "date": "",
+                                                     "completed": False}]})
+        digest = file_digest(self.path('tasks.json'))
+        convert_snapshot(self.path('tasks.json'), self.path('tasks.bin'))
+        engine = self.open_engine('tasks.bin')
+        engine.add_task('Projects', 'New', 'Low', '')
+        engine._compact()
+        engine.flush()
+        self.assertEqual(file_digest(self.path('tasks.json')), digest)
+        self.assertFalse(os.path.exists(self.path('tasks.json.bak')))
+
+    def test_existing_target_is_refused(self):
+        self.write_json('old.json', {})
+        engine = self.open_engine()
+        engine.add_task('Projects', 'Task', 'High', '')
+        engine.close()
+        self.engines.clear()
+        for target in ('old.json', 'tasks.json'):
+            with self.assertRaises(FileExistsError):
+                convert_snapshot(self.path('tasks.json'), self.path(target))
+        self.assertEqual(todo_cli.main(['convert', self.path('tasks.json'), self.path('old.json')]), 1)
+        with open(self.path('old.json'), encoding='utf-8') as file:
+            self.assertEqual(json.load(file), {})
+
+
+# تخزين SQLite
+class SQLiteTest(TempDirTestCase):
+    def open_sqlite(self):
+        engine = TaskEngine(SQLiteTaskStore(self.path('tasks.db')))
+        engine.load_from_json()
+        self.engines.append(engine)
+        return engine
+
+    def reopen_sqlite(self, engine):
+        engine.close()
+        engine.store.connection.close()
+        self.engines.remove(engine)
+        return self.open_sqlite()
+
+    def test_operations_survive_reopen(self):
+        engine = self.open_sqlite()
+        self.fill(engine)
+        engine.delete_task('Projects', 'Write report')
+        engine.add_task('Projects', 'Plan sprint', 'Medium', '2024-04-20')
+        expected = task_state(engine)
+        self.assertEqual([node.description for node in engine.task_lists['Projects']], ['Plan sprint', 'Review PR'])
+        engine = self.reopen_sqlite(engine)
+        self.assertEqual(task_state(engine), expected)
+
+    def test_stats_follow_changes(self):
+        engine = self.open_sqlite()
+        self.fill(engine)
+        for task_list in engine.task_lists.values():  # العدادات تُحسب هنا ثم تُحدَّث مع كل تعديل
+            self.assertEqual(stats_state(task_list.stats), stats_state(recount(task_list)))
+        done = engine.task_lists['Projects'].find_by_description('Write report')
+        engine.mark_task_as_done_by_id(done.id)
+        engine.mark_task_as_done_by_id(done.id)  # إنجاز مهمة منجزة لا يغير العدادات
+        engine.delete_task('Projects', 'Review PR')
+        engine.add_task('Projects', 'Later', 'Low', '2024-07-01')
+        engine.undo()
+        engine.undo()  # يعيد Review PR المنجزة
+        engine.mark_task_as_done_by_id(engine.task_lists['Exercise'].find_by_description('Morning run').id)
+        for task_list in engine.task_lists.values():
+            self.assertEqual(stats_state(task_list.stats), stats_state(recount(task_list)))
+        self.assertEqual((engine.task_lists['Projects'].stats.total, engine.task_lists['Projects'].stats.completed), (2, 2))
+
+    def test_status_due_and_query(self):
+        engine = self.open_sqlite()
+        self.fill(engine)
+        self.assertEqual([node.description for node in engine.iter_tasks_by_status(True)], ['Review PR'])
+        self.assertEqual([node.description for node in engine.iter_due_tasks(date_ordinal('2024-05-02'))],
+                         ['Morning run'])
+        query = TaskQuery(submenus=['Projects'], completed=False, sort=['priority'])
+        self.assertEqual([node.description for submenu, node in engine.query(query)], ['Write report'])
+
+    def test_cli_export(self):
+        engine = self.open_sqlite()
+        self.fill(engine)
+        expected = {submenu: [node.to_record() for node in task_list] for submenu, task_list in engine.task_lists.items()}
+        engine.close()
+        self.assertEqual(todo_cli.main(['--sqlite', self.path('tasks.db'), 'export', '--output', self.path('export.json')]), 0)
+        with open(self.path('export.json'), encoding='utf-8') as file:
+            self.assertEqual(json.load(file), expected)
+
+
+# التكرار
+class RecurrenceTest(unittest.TestCase):
+    @staticmethod
+    def brute_force(rule, date_from, date_to, limit=2000):
+        days = []
+        for n in range(limit):
+            day = rule.occurrence(n)
+            if day > date_to or (rule.end is not None and day > rule.end):
+                break
+            if day >= date_from:
+                days.append(day)
+        return days
+
+    def test_windows_match_brute_force(self):
+        rng = random.Random(7)
+        base = date(2024, 1, 1).toordinal()
+        for _ in range(300):
+            frequency = rng.choice(tuple(Recurrence.FREQUENCIES))
+            start = base + rng.randrange(400)
+            end = start + rng.randrange(900) if rng.random() < 0.5 else None
+            rule = Recurrence(frequency, rng.randint(1, 4), start, end)
+            date_from = start - 30 + rng.randrange(500)
+            date_to = date_from + rng.randrange(200)
+            expected = self.brute_force(rule, date_from, date_to)
+            self.assertEqual(list(rule.occurrences(date_from, date_to)), expected)
+            self.assertEqual(rule.count_between(date_from, date_to), len(expected))
+            following = self.brute_force(rule, date_to + 1, date_to + 400)
+            self.assertEqual(rule.next_after(date_to), following[0] if following else None)
+
+    def test_monthly_clamps_to_month_end(self):
+        rule = Recurrence.parse("monthly:2024-01-31")
+        self.assertEqual([date.fromordinal(rule.occurrence(n)).isoformat() for n in range(3)],
+                         ["2024-01-31", "2024-02-29", "2024-03-31"])
+
+    def test_spec_round_trip(self):
+        rule = Recurrence.create("weekly", "2024-05-01", interval=2, count=5)
+        self.assertEqual(str(Recurrence.parse(str(rule))), str(rule))
+        self.assertEqual(rule.count_until(rule.end), 5)
+
+    def test_completing_advances_to_next_occurrence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = TaskEngine(snapshot_path=os.path.join(directory, 'tasks.json'))
+            engine.load_from_json()
+            node = engine.add_task('Exercise', 'Run', 'Low', '2024-05-01', repeat='daily:2024-05-01:2024-05-03')
+            self.assertEqual(engine.mark_task_as_done_by_id(node.id).date, '2024-05-02')
+            done = engine.mark_task_as_done_by_id(node.id, through='2024-05-31')
+            self.assertTrue(done.completed)
+            self.assertEqual(done.date, '2024-05-03')
+            engine.undo()
+            self.assertEqual(engine.find_task(node.id).date, '2024-05-02')
+            occurrences = [(day, submenu) for day, submenu, _, _ in engine.iter_occurrences('2024-04-30', '2024-05-31')]
+            self.assertEqual(occurrences, [(date_ordinal('2024-05-01'), 'Exercise'), (date_ordinal('2024-05-02'), 'Exercise'),
+                                           (date_ordinal('2024-05-03'), 'Exercise')])
+            self.assertEqual(engine.occurrence_stats('2024-05-01', '2024-05-31'), (3, 1))
+            engine.close()
+
+
+
+# القائمة المرتبطة وفهارسها
+class TaskListTest(unittest.TestCase):
+    @staticmethod
+    def random_list(rng, count):
+        task_list = TaskList()
+        for number in range(count):
+            task_list.add_task(f"task {rng.randrange(20)}", rng.choice(["High", "Medium", "Low"]),
+                               f"2024-05-{rng.randrange(1, 29):02d}" if rng.random() < 0.8 else "",
+                               task_id=f"t{number}")
+        return task_list
+
+    def test_query_resolves_translated_submenu(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tasks.json')
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump({"طالب": [{"id": "a1", "description": "Old", "priority": "High", "date": "", "completed": False}]}, file)
+            engine = TaskEngine(snapshot_path=path)
+            engine.load_from_json()
+            engine.add_task('Student', 'New', 'Low', '')
+            self.assertEqual(list(engine.task_lists), ["طالب"])
+            self.assertEqual([node.description for _, node in engine.query(TaskQuery(submenus=['Student']))], ['Old', 'New'])
+            engine.close()
+
+    def test_unknown_priority_code_is_rejected(self):
+        self.assertEqual(priority_code(3), 3)
+        self.assertEqual(priority_code("unknown"), 0)
+        with self.assertRaises(ValueError):
+            priority_code(7)
+
+    def test_sorted_views_are_cached_until_change(self):
+        rng = random.Random(5)
+        task_list = self.random_list(rng, 200)
+        nodes = list(task_list)
+        for order, (key, reverse) in TaskList.SORT_KEYS.items():
+            view = task_list.sorted_view(order)
+            self.assertEqual(view, sorted(nodes, key=key, reverse=reverse))  # فرز مستقر: التعادل بترتيب الإضافة
+            self.assertIs(task_list.sorted_view(order), view)
+        task_list.sort_by_date()
+        self.assertEqual([node.id for node in task_list], [node.id for node in task_list.sorted_view("date")])
+        new = task_list.add_task("new", "Low", "2024-04-01", task_id="new")
+        self.assertEqual(list(task_list), sorted(nodes + [new], key=lambda node: node.date_ordinal))  # الإضافة تلغي العرض المحفوظ
+        task_list.unsort()
+        self.assertEqual([node.id for node in task_list], [node.id for node in nodes] + ["new"])
+        self.assertTrue(all(task_list.get_task(node.id) is node for node in nodes))  # الفرز لا ينشئ عقدًا جديدة
+
+    def test_status_and_due_views_follow_changes(self):
+        rng = random.Random(3)
+        task_list = TaskList()
+        for number in range(300):
+            task_list.add_task(f"task {number}", "High", f"2024-05-{number % 28 + 1:02d}", task_id=f"t{number}")
+        for step in range(3000):
+            task_id = f"t{rng.randrange(300)}"
+            done = 0.6 if step < 1500 else 0.1  # تتبدل الحالة الأقل عددًا في منتصف الاختبار
+            action = rng.random()
+            if action < done:
+                task_list.mark_task_as_done_by_id(task_id)
+            elif action < 0.7:
+                task_list.mark_task_as_undone_by_id(task_id)
+            elif action < 0.85:
+                task_list.reschedule_task_by_id(task_id, f"2024-05-{rng.randint(1, 28):02d}")
+            elif action < 0.9:
+                task_list.delete_task_by_id(task_id)
+            elif task_list.get_task(task_id) is None:
+                task_list.add_task("again", "Low", "2024-05-02", completed=rng.random() < 0.5, task_id=task_id)
+            live = list(task_list)
+            for completed in (True, False):
+                self.assertEqual(sorted(node.id for node in task_list.tasks_with_status(completed)),
+                                 sorted(node.id for node in live if node.completed == completed))
+            until = date_ordinal("2024-05-01") + rng.randrange(30)
+            self.assertEqual(sorted(node.id for node in task_list.due_tasks(until)),
+                             sorted(node.id for node in live if not node.completed and node.date_ordinal <= until))
+
+
+# عدادات الإنجاز
+class StatsTest(TempDirTestCase):
+    def assertStatsMatch(self, engine):
+        for submenu, task_list in engine.task_lists.items():
+            self.assertEqual(stats_state(task_list.stats), stats_state(recount(task_list)), submenu)
+
+    def test_counters_follow_changes_and_reload(self):
+        engine = self.open_engine()
+        rng = random.Random(10)
+        for number in range(200):
+            action = rng.random()
+            ids = list(engine.task_index)
+            if action < 0.5 or not ids:
+                engine.add_task(rng.choice(['A', 'B']), f"task {number}", rng.choice(["High", "Medium", "Low", ""]),
+                                f"2024-{rng.randrange(1, 13):02d}-01" if rng.random() < 0.8 else "")
+            elif action < 0.7:
+                engine.mark_task_as_done_by_id(rng.choice(ids))
+            elif action < 0.85:
+                engine.delete_task_by_id(rng.choice(ids))
+            else:
+                engine.undo()
+        self.assertStatsMatch(engine)
+        engine._compact()
+        engine = self.reopen(engine)
+        self.assertFalse(any(task_list.loaded for task_list in engine.task_lists.values()))  # العدادات من الملف الوصفي
+        expected = [stats_state(task_list.stats) for task_list in engine.task_lists.values()]
+        self.assertEqual(expected, [stats_state(recount(task_list)) for task_list in engine.task_lists.values()])
+
+
+# التذكير بالمهام المستحقة
+class SchedulerTest(TempDirTestCase):
+    def test_due_tasks_after_reload(self):
+        engine = self.open_engine()
+        self.fill(engine)
+        engine.add_task('Later', 'Next month', 'Low', '2024-06-15')
+        engine._compact()
+        engine = self.reopen(engine)
+        until = date_ordinal('2024-05-02')
+        self.assertEqual([node.description for node in engine.iter_due_tasks(until)], ['Morning run'])
+        self.assertFalse(engine.task_lists['Later'].loaded)  # تاريخها في الملف الوصفي بعد until
+        self.assertEqual([node.description for node in engine.pop_due_tasks(until)], ['Morning run'])
+        self.assertEqual(engine.pop_due_tasks(until), [])  # كل مهمة يُذكَّر بها مرة واحدة
+        self.assertFalse(engine.task_lists['Later'].loaded)
+
+        run = engine.task_lists['Exercise'].find_by_description('Morning run')
+        engine.mark_task_as_done_by_id(run.id)  # ينتقل إلى تكراره التالي 2024-05-02
+        engine.add_task('Projects', 'Overdue', 'High', '2024-04-30')
+        self.assertEqual([node.description for node in engine.pop_due_tasks(until)], ['Overdue', 'Morning run'])
+        engine.mark_task_as_done_by_id(engine.task_lists['Projects'].find_by_description('Write report').id)
+        self.assertEqual(engine.pop_due_tasks(date_ordinal('2024-05-03')), [])  # المنجزة تُتجاهل
+        engine.mark_task_as_done_by_id(run.id)
+        self.assertEqual([node.description for node in engine.pop_due_tasks(date_ordinal('2024-05-03'))], ['Morning run'])
+        self.assertEqual([node.description for node in engine.pop_due_tasks(date_ordinal('2024-06-30'))], ['Next month'])
+
+
+# الاستيراد الجماعي
+class ImportTest(TempDirTestCase):
+    def write_lines(self, name, lines):
+        with open(self.path(name), 'w', encoding='utf-8', newline='') as file:
+            file.write('\n'.join(lines) + '\n')
+        return self.path(name)
+
+    def test_csv_rows_are_normalized(self):
+        path = self.write_lines('tasks.csv', [
+            'submenu,description,priority,date,completed,repeat',
+            'Projects,Write report,عالي,2024-05-03,yes,',
+            'طالب,Homework,,,0,weekly:2024-05-06',
+        ])
+        engine = self.open_engine()
+        with open(path, encoding='utf-8', newline='') as file:
+            self.assertEqual(engine.import_tasks(read_tasks_csv(file), batch_size=1), 2)
+        expected = task_state(engine)
+        self.assertEqual([(node.priority, node.completed) for node in engine.task_lists['Projects']], [('High', True)])
+        self.assertEqual([node.repeat for node in engine.task_lists['Student']], ['weekly:2024-05-06'])
+        engine = self.reopen(engine)
+        self.assertEqual(task_state(engine), expected)
+
+    def test_invalid_row_keeps_earlier_rows_undoable(self):
+        rows = [json.dumps({'submenu': 'Projects', 'description': f'task {number}', 'date': '2024-01-02'})
+                for number in range(5)]
+        for bad in ({'date': '2024/01/03'}, {'priority': 'Urgent'}, {'repeat': 'hourly:2024-01-01'}, {'description': ''}):
+            with self.subTest(bad=bad):
+                path = self.write_lines('tasks.jsonl', rows + [json.dumps(dict(json.loads(rows[0]), **bad))] + rows)
+                with open(path, encoding='utf-8') as file:
+                    with self.assertRaisesRegex(ValueError, 'line 6'):
+                        list(read_tasks_jsonl(file))
+        engine = self.open_engine()
+        engine.add_task('Projects', 'Existing', 'Low', '')
+        for attempt in range(2):
+            with open(path, encoding='utf-8') as file, self.assertRaises(ValueError):
+                engine.import_tasks(read_tasks_jsonl(file), batch_size=2)
+        self.assertEqual(len(engine.task_lists['Projects']), 11)
+        engine.undo()
+        self.assertEqual(len(engine.task_lists['Projects']), 6)  # التراجع يزيل الاستيراد الجزئي كإجراء واحد
+        engine = self.reopen(engine)  # المهام المضافة قبل الصف غير الصالح محفوظة في السجل
+        self.assertEqual(len(engine.task_lists['Projects']), 6)
+        engine.close()
+        self.assertEqual(todo_cli.main(['--data', self.path('tasks.json'), 'import', path]), 1)
+        engine = self.reopen(engine)
+        self.assertEqual(len(engine.task_lists['Projects']), 11)
+
+
+
+# فهرس البحث
+class SearchTest(TempDirTestCase):
+    def test_search_across_submenus_ranked(self):
+        engine = self.open_engine()
+        engine.add_task('Projects', 'Reports archive', 'Low', '')
+        engine.add_task('Projects', 'Write report', 'High', '')
+        engine.add_task('Exercise', 'report', 'Medium', '')
+        engine.add_task('Exercise', 'Morning run', 'Medium', '')
+        self.assertEqual([node.description for node in engine.search('REPORT')],
+                         ['report', 'Reports archive', 'Write report'])
+        self.assertEqual([node.description for node in engine.search('rep')],
+                         ['report', 'Reports archive', 'Write report'])
+        self.assertEqual([node.description for node in engine.search('or')],  # موضع التطابق في الوصف
+                         ['Morning run', 'report', 'Reports archive', 'Write report'])
+
+    def test_index_follows_changes_and_refinement(self):
+        engine = self.open_engine()
+        rng = random.Random(8)
+        words = ['alpha', 'beta', 'gamma', 'delta', 'alphabet']
+        for number in range(300):
+            engine.add_task(rng.choice(['A', 'B', 'C']), ' '.join(rng.sample(words, 2)), 'Low', '')
+        engine.search('al')  # يُبنى الفهرس هنا ثم يُحدَّث مع الإضافة والحذف
+        for node in list(engine.search('gamma'))[:50]:
+            engine.delete_task_by_id(node.id)
+        engine.add_task('A', 'alphabet soup', 'Low', '')
+        for query in ['a', 'al', 'alp', 'alph', 'alphab', 'lta', 'gamma', 'soup']:  # الاستعلام المتزايد يصفّي النتائج السابقة
+            expected = sorted(node.id for task_list in engine.task_lists.values() for node in task_list
+                              if query in node.description.lower())
+            self.assertEqual(sorted(node.id for node in engine.search(query)), expected, query)
+
+
+if __name__ == "__main__":
+    unittest.main()
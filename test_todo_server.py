@@ -0,0 +1,125 @@
+"""اختبارات todo_server: التحقق من المدخلات، أخطاء HTTP، والقراءات المحفوظة.
+
+الاستخدام: python -m pytest -q (أو python -m unittest)
+"""
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+
+from todo_core import TaskEngine
+from todo_server import HTTPError, TaskService
+
+
+class TaskServiceTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self._directory.name, 'tasks.json')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def run_service(self, scenario, prepare=None):
+        """تشغيل scenario(request، service) على خدمة فوق محرك جديد (prepare يملأ البيانات ويضغطها أولًا)."""
+        if prepare is not None:
+            engine = TaskEngine(snapshot_path=self.snapshot)
+            engine.load_from_json()
+            prepare(engine)
+            engine._compact()
+            engine.close()
+
+        async def main():
+            engine = TaskEngine(snapshot_path=self.snapshot)
+            engine.load_from_json()
+            service = TaskService(engine)
+            writer = asyncio.ensure_future(service.run_writer())
+
+            async def request(method, target, body=None):
+                try:
+                    status, result = await service.route(method, target, json.dumps(body).encode('utf-8') if body else b'')
+                except HTTPError as error:
+                    return error.status, str(error)
+                return status, json.loads(result) if isinstance(result, bytes) else result
+
+            try:
+                return await scenario(request, service)
+            finally:
+                writer.cancel()
+                engine.close()
+
+        return asyncio.run(main())
+
+    def test_invalid_input_is_rejected(self):
+        async def scenario(request, service):
+            invalid = [
+                {'description': 'No submenu'},
+                {'submenu': 'Projects'},
+                {'submenu': 'Projects', 'description': 'Bad priority', 'priority': 7},
+                {'submenu': 'Projects', 'description': 'Bad priority', 'priority': 'Urgent'},
+                {'submenu': 'Projects', 'description': 'Bad priority', 'priority': [1]},
+                {'submenu': 'Projects', 'description': 'Bad date', 'date': '01/05/2024'},
+                {'submenu': 'Projects', 'description': 'Bad rule', 'repeat': 'hourly:2024-05-01'},
+                {'submenu': 'Projects', 'description': 'Not an occurrence', 'repeat': 'weekly:2024-05-01', 'date': '2024-05-02'},
+            ]
+            for body in invalid:
+                self.assertEqual((await request("POST", "/tasks", body))[0], 400, body)
+            self.assertEqual((await request("POST", "/tasks/x/complete?through=soon"))[0], 400)
+            self.assertEqual((await request("GET", "/tasks?completed=maybe"))[0], 400)
+            self.assertEqual((await request("GET", "/tasks?sort=colour"))[0], 400)
+            self.assertEqual((await request("GET", "/nothing"))[0], 404)
+            self.assertEqual((await request("DELETE", "/tasks/missing"))[0], 404)
+            self.assertEqual((await request("PUT", "/tasks"))[0], 405)
+            self.assertEqual(await request("GET", "/tasks"), (200, []))  # لم تُضف أي مهمة
+            self.assertEqual((await request("GET", "/stats"))[1]['total'], 0)
+
+        self.run_service(scenario)
+
+    def test_recurring_task_starts_at_rule_anchor(self):
+        async def scenario(request, service):
+            status, task = await request("POST", "/tasks", {'submenu': 'Review', 'description': 'Weekly review',
+                                                            'priority': 'High', 'repeat': 'weekly:2024-05-01'})
+            self.assertEqual((status, task['date']), (201, '2024-05-01'))
+            status, task = await request("POST", f"/tasks/{task['id']}/complete?through=2024-05-20")
+            self.assertEqual((status, task['date'], task['submenu']), (200, '2024-05-22', 'Review'))
+
+        self.run_service(scenario)
+
+    def test_tasks_in_unread_shards_are_found_after_restart(self):
+        ids = {}
+
+        def prepare(engine):
+            ids['project'] = engine.add_task('Projects', 'Write report', 'High', '2024-05-01').id
+            ids['other'] = engine.add_task('Other', 'Call', 'Low', '').id
+
+        async def scenario(request, service):
+            self.assertFalse(service.engine.task_lists['Projects'].loaded)
+            status, task = await request("GET", f"/tasks/{ids['project']}")
+            self.assertEqual((status, task['submenu']), (200, 'Projects'))
+            await request("GET", "/tasks?submenu=Other")
+            status, task = await request("POST", f"/tasks/{ids['project']}/complete")
+            self.assertEqual((status, task['submenu'], task['completed']), (200, 'Projects', True))
+            # تعديل Projects لا يحذف نتائج القراءة المعتمدة على Other فقط
+            self.assertIn("/tasks?submenu=Other", service._reads)
+            self.assertNotIn(f"/tasks/{ids['project']}", service._reads)
+            status, task = await request("DELETE", f"/tasks/{ids['other']}")
+            self.assertEqual((status, task['submenu']), (200, 'Other'))
+            self.assertEqual(await request("GET", "/tasks?submenu=Other"), (200, []))
+
+        self.run_service(scenario, prepare)
+
+    def test_writes_are_visible_to_the_next_read(self):
+        async def scenario(request, service):
+            self.assertEqual(await request("GET", "/tasks?submenu=Student"), (200, []))
+            await request("POST", "/tasks", {'submenu': 'Student', 'description': 'Homework', 'date': ''})
+            status, tasks = await request("GET", "/tasks?submenu=Student")
+            self.assertEqual([task['description'] for task in tasks], ['Homework'])
+            status, result = await request("POST", "/undo")
+            self.assertEqual((status, result['changed']), (200, ['Student']))
+            self.assertEqual(await request("GET", "/tasks?submenu=Student"), (200, []))
+
+        self.run_service(scenario)
+
+
+if __name__ == "__main__":
+    unittest.main()
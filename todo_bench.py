@@ -0,0 +1,214 @@
+"""قياس أداء عمليات TaskList ومسار الحفظ والتحميل دون واجهة رسومية.
+
+تُولَّد بيانات عشوائية (عربي/إنجليزي) بالأحجام المطلوبة، ويُطبع لكل عملية
+الزمن وذروة الذاكرة بصيغة JSON لمقارنة النتائج بين الإصدارات.
+
+الاستخدام: python todo_bench.py [--sizes 1000 10000 100000] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+from todo_core import Recurrence, TaskEngine, TaskList, date_ordinal
+
+SUBMENUS = ["الدراسة", "العمل", "Home", "Shopping", "Projects"]
+WORDS = ["واجب", "مراجعة", "دراسة", "اجتماع", "Homework", "Review", "Project", "Shopping", "Report"]
+PRIORITIES = ["عالي", "متوسط", "منخفض", "High", "Medium", "Low"]
+SAMPLE_SIZE = 1000  # عدد عمليات الإكمال والحذف في كل قياس
+ROUTINE_SHARE = 100  # مهمة متكررة لكل ROUTINE_SHARE مهمة (تتكرر منذ عام 2000 بلا نهاية)
+
+
+def generate_tasks(count, seed=0):
+    """توليد مهام عشوائية بصيغة ملف JSON موزعة على القوائم الفرعية."""
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(count):
+        tasks.append({
+            'submenu': SUBMENUS[i % len(SUBMENUS)],
+            'description': f"{rng.choice(WORDS)} {i}",
+            'priority': rng.choice(PRIORITIES),
+            'date': f"{rng.randint(2023, 2026)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'completed': rng.random() < 0.3,
+        })
+    return tasks
+
+
+def build_task_list(tasks):
+    task_list = TaskList()
+    for task in tasks:
+        task_list.add_task(task['description'], task['priority'], task['date'], task['completed'])
+    return task_list
+
+
+def sample_descriptions(tasks, seed=1):
+    rng = random.Random(seed)
+    return [task['description'] for task in rng.sample(tasks, min(SAMPLE_SIZE, len(tasks)))]
+
+
+def sort_benchmark(method):
+    def run(task_list):
+        getattr(task_list, method)()
+        return sum(1 for _ in task_list)  # الفرز يُنفذ عند أول مرور على القائمة
+    return run
+
+
+def task_list_benchmarks(tasks):
+    """(الاسم، عدد العمليات، التجهيز، التنفيذ) لكل عملية على TaskList."""
+    descriptions = sample_descriptions(tasks)
+
+    def mark_all(task_list):
+        for description in descriptions:
+            task_list.mark_task_as_done(description)
+
+    def delete_all(task_list):
+        for description in descriptions:
+            task_list.delete_task(description)
+
+    def prepared():
+        return build_task_list(tasks)
+
+    return [
+        ("add_task", len(tasks), lambda: tasks, build_task_list),
+        ("get_all_tasks", len(tasks), prepared, lambda task_list: task_list.get_all_tasks()),
+        ("mark_task_as_done", len(descriptions), prepared, mark_all),
+        ("delete_task", len(descriptions), prepared, delete_all),
+        ("sort_by_date", len(tasks), prepared, sort_benchmark("sort_by_date")),
+        ("sort_by_priority", len(tasks), prepared, sort_benchmark("sort_by_priority")),
+        ("sort_alphabetically", len(tasks), prepared, sort_benchmark("sort_alphabetically")),
+    ]
+
+
+def recurrence_benchmarks(tasks):
+    """تكرارات المهام في نافذة تواريخ مع مهام متكررة طويلة (لا تُخزن تكراراتها)."""
+    frequencies = list(Recurrence.FREQUENCIES)
+    routines = max(1, len(tasks) // ROUTINE_SHARE)
+    week, year = (date_ordinal("2025-03-01"), date_ordinal("2025-03-07")), (date_ordinal("2025-01-01"), date_ordinal("2025-12-31"))
+
+    def prepared():
+        task_list = build_task_list(tasks)
+        for i in range(routines):
+            task_list.add_task(f"routine {i}", "Low", "2000-01-01", repeat=f"{frequencies[i % len(frequencies)]}:2000-01-01")
+        task_list.sorted_view("date")  # العرض المرتب يُبنى مرة واحدة ويُعاد استخدامه
+        return task_list
+
+    return [
+        ("iter_occurrences_week", routines, prepared, lambda task_list: sum(1 for _ in task_list.iter_occurrences(*week))),
+        ("occurrence_counts_year", routines, prepared, lambda task_list: task_list.occurrence_counts(*year)),
+    ]
+
+
+def persistence_benchmarks(tasks, directory, file_name='tasks.json', suffix=''):
+    """قياس كتابة اللقطة وقراءتها عبر TaskEngine (ملفات JSON أو لقطة ثنائية .bin)."""
+    snapshot_path = os.path.join(directory, file_name)
+
+    def filled_engine():
+        engine = TaskEngine(snapshot_path=snapshot_path)
+        for task in tasks:
+            task_list = engine.task_lists.setdefault(task['submenu'], TaskList())
+            task_list.add_task(task['description'], task['priority'], task['date'], task['completed'])
+        return engine
+
+    def save(engine):
+        engine.journal.compact(engine.shard_update(engine.task_lists))
+        engine.close()
+
+    def saved_snapshot():
+        save(filled_engine())
+
+    def load(_):
+        engine = TaskEngine(snapshot_path=snapshot_path)
+        engine.load_from_json()
+        engine.close()
+        return engine
+
+    def load_and_open(_):
+        engine = load(None)
+        for task_list in engine.task_lists.values():
+            for _ in task_list:
+                pass
+        return engine
+
+    def load_and_open_one(_):
+        engine = load(None)
+        for _ in next(iter(engine.task_lists.values()), ()):
+            pass
+        return engine
+
+    return [
+        ("save" + suffix, len(tasks), filled_engine, save),
+        ("load" + suffix, len(tasks), saved_snapshot, load),
+        ("load_and_open" + suffix, len(tasks), saved_snapshot, load_and_open),
+        ("load_and_open_one" + suffix, len(tasks), saved_snapshot, load_and_open_one),
+    ]
+
+
+def measure(setup, run):
+    """الزمن في تشغيل عادي، ثم ذروة الذاكرة في تشغيل ثانٍ تحت tracemalloc."""
+    state = setup()
+    start = time.perf_counter()
+    run(state)
+    seconds = time.perf_counter() - start
+    del state
+
+    state = setup()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def run_benchmarks(sizes, seed=0, only=None):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            tasks = generate_tasks(size, seed)
+            benchmarks = (task_list_benchmarks(tasks) + recurrence_benchmarks(tasks) + persistence_benchmarks(tasks, directory)
+                          + persistence_benchmarks(tasks, directory, 'tasks.bin', '_binary'))
+            for name, ops, setup, run in benchmarks:
+                if only and name not in only:
+                    continue
+                seconds, peak = measure(setup, run)
+                results.append({
+                    'benchmark': name,
+                    'size': size,
+                    'ops': ops,
+                    'seconds': round(seconds, 6),
+                    'ops_per_second': round(ops / seconds) if seconds else None,
+                    'peak_memory_bytes': peak,
+                })
+                print(f"{name:<20} {size:>9} {seconds:10.4f}s {peak / 1024 / 1024:10.1f} MiB", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="قياس أداء قائمة المهام")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help="أحجام البيانات (حتى 1000000)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='+', help="تشغيل قياسات محددة بالاسم")
+    parser.add_argument('--output', help="ملف النتائج (الافتراضي: الطباعة)")
+    args = parser.parse_args(argv)
+
+    report = {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'results': run_benchmarks(args.sizes, args.seed, args.only),
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
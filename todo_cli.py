@@ -0,0 +1,301 @@
+"""إدارة المهام من سطر الأوامر دون تشغيل الواجهة الرسومية.
+
+أمثلة:
+    python todo_cli.py add Projects "Write report" "Review PR" --priority High --date 2024-05-01
+    python todo_cli.py add Exercise "Morning run" --date 2024-05-01 --repeat daily --until 2024-12-31
+    python todo_cli.py add Review "Weekly review" --repeat weekly --every 2 --count 10
+    python todo_cli.py list --uncompleted
+    python todo_cli.py list --due
+    python todo_cli.py list --search report --sort date --json
+    python todo_cli.py list --submenu Projects --uncompleted --priority High --to 2024-05-07 --sort date priority --limit 20
+    python todo_cli.py complete <id> <id>
+    python todo_cli.py complete <id> --through 2024-05-31
+    python todo_cli.py agenda --from 2024-05-01 --to 2024-05-07
+    python todo_cli.py delete <id>
+    python todo_cli.py export --output backup.json
+    python todo_cli.py import tasks.csv --batch-size 5000
+    python todo_cli.py export --format jsonl --output tasks.jsonl
+    python todo_cli.py --profile trace.json import tasks.csv
+    python todo_cli.py convert tasks.json tasks.bin
+    python todo_cli.py --data tasks.bin list
+    python todo_cli.py gui
+    python todo_cli.py serve --port 8765
+"""
+import os
+import sys
+import json
+import time
+import runpy
+import argparse
+from datetime import date
+
+from todo_core import (
+    IMPORT_BATCH_SIZE, PROFILER, Recurrence, TaskEngine, TaskList, TaskQuery, TaskStats, SQLiteTaskStore, convert_snapshot,
+    date_ordinal, date_string, task_reader_for, today_ordinal, instrument_core, write_tasks_csv, write_tasks_jsonl
+)
+
+
+def open_engine(args):
+    """فتح المحرك على ملف JSON أو قاعدة SQLite وتحميل البيانات."""
+    store = SQLiteTaskStore(args.sqlite) if args.sqlite else None
+    engine = TaskEngine(store, snapshot_path=args.data, shared=args.shared)
+    engine.load_from_json()
+    return engine
+
+
+def task_to_dict(submenu, node):
+    return dict(node.to_record(), submenu=submenu)
+
+
+def build_query(args):
+    """استعلام TaskQuery من خيارات الأمر list."""
+    completed = True if args.completed else False if args.uncompleted or args.due else None
+    date_to = date_ordinal(args.to) if args.to else None
+    if args.due:
+        date_to = min(date_to or today_ordinal(), today_ordinal())
+    return TaskQuery(submenus=args.submenu, completed=completed, priorities=args.priority, date_from=args.date_from,
+                     date_to=date_to, text=args.search, sort=args.sort or (), limit=args.limit)
+
+
+def iter_selected_tasks(engine, args):
+    """المهام المطابقة لخيارات الأمر list كأزواج (القائمة الفرعية، العقدة)."""
+    return engine.query(build_query(args))
+
+
+def cmd_add(engine, args):
+    repeat = None
+    if args.repeat:
+        try:
+            repeat = Recurrence.create(args.repeat, args.date, args.every, args.until, args.count)
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            return 1
+    for description in args.descriptions:
+        node = engine.add_task(args.submenu, description, args.priority, args.date, args.completed, repeat=repeat)
+        print(node.id)
+
+
+def cmd_complete(engine, args):
+    return _for_each_id(args.ids, lambda task_id: engine.mark_task_as_done_by_id(task_id, args.through))
+
+
+def cmd_delete(engine, args):
+    return _for_each_id(args.ids, engine.delete_task_by_id)
+
+
+def _for_each_id(task_ids, action):
+    missing = [task_id for task_id in task_ids if action(task_id) is None]
+    for task_id in missing:
+        print(f"task not found: {task_id}", file=sys.stderr)
+    return 1 if missing else 0
+
+
+def cmd_list(engine, args):
+    for submenu, node in iter_selected_tasks(engine, args):
+        if args.json:
+            print(json.dumps(task_to_dict(submenu, node), ensure_ascii=False))
+        else:
+            status = "done" if node.completed else "pending"
+            print("\t".join((node.id, submenu, node.description, node.priority, node.date, status)))
+
+
+def cmd_agenda(engine, args):
+    """تكرارات المهام (العادية والمتكررة) بين تاريخين بترتيب التاريخ، مع نسبة الإنجاز في الفترة."""
+    date_from = date_ordinal(args.date_from) if args.date_from else today_ordinal()
+    date_to = date_ordinal(args.to) if args.to else date_from + 6
+    for day, submenu, node, done in engine.iter_occurrences(date_from, date_to, args.submenu):
+        if args.json:
+            print(json.dumps(dict(task_to_dict(submenu, node), date=date_string(day), completed=done), ensure_ascii=False))
+        else:
+            status = "done" if done else "pending"
+            print("\t".join((date_string(day), node.id, submenu, node.description, node.priority, status)))
+    total, completed = engine.occurrence_stats(date_from, date_to, args.submenu)
+    print(f"{completed}/{total} done ({TaskStats.rate(total, completed):.0f}%)", file=sys.stderr)
+
+
+def cmd_submenus(engine, args):
+    for submenu, task_list in engine.task_lists.items():
+        print(f"{submenu}\t{task_list.stats.completed}/{task_list.stats.total}")
+
+
+def cmd_import(engine, args):
+    """استيراد مهام من CSV أو JSON Lines على دفعات مع قياس عدد المهام في الثانية."""
+    reader = task_reader_for(args.format or args.file)
+    started = time.perf_counter()
+    try:
+        with open(args.file, 'r', encoding='utf-8', newline='') as file:
+            count = engine.import_tasks(reader(file), batch_size=args.batch_size)
+    except (OSError, ValueError) as error:
+        print(f"import failed: {error}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else float('inf')
+    print(f"imported {count} tasks in {elapsed:.2f}s ({rate:.0f} tasks/s)", file=sys.stderr)
+
+
+def cmd_export(engine, args):
+    """تصدير جميع البيانات بصيغة ملف tasks.json أو JSON Lines أو CSV."""
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.format == "csv":
+            write_tasks_csv(engine.export_tasks(), output)
+        elif args.format == "jsonl":
+            write_tasks_jsonl(engine.export_tasks(), output)
+        else:
+            json.dump(engine.snapshot_data(), output, ensure_ascii=False, indent=4)
+            output.write('\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def run_convert(args):
+    """تحويل اللقطة بين ملفات JSON واللقطة الثنائية (.bin) حسب الامتداد."""
+    started = time.perf_counter()
+    try:
+        count = convert_snapshot(args.source, args.target)
+    except FileExistsError:
+        print(f"target already exists: {args.target}", file=sys.stderr)
+        return 1
+    except (OSError, ValueError) as error:
+        print(f"convert failed: {error}", file=sys.stderr)
+        return 1
+    print(f"converted {count} tasks to {args.target} in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return 0
+
+
+def run_gui(args):
+    """تشغيل الواجهة الرسومية (tkinter يُستورد هنا فقط)."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "To-Do-List-Project.py")
+    sys.argv = [script, "--data", args.data] + (["--sqlite", args.sqlite] if args.sqlite else []) + (["--shared"] if args.shared else [])
+    sys.argv += ["--profile", args.profile] if args.profile else []
+    runpy.run_path(script, run_name="__main__")
+
+
+def run_serve(args):
+    """تشغيل خدمة HTTP/JSON المحلية (todo_server.py) على نفس البيانات."""
+    import todo_server
+    argv = ["--data", args.data, "--host", args.host, "--port", str(args.port)]
+    argv += (["--sqlite", args.sqlite] if args.sqlite else []) + (["--shared"] if args.shared else [])
+    return todo_server.main(argv + (["--profile", args.profile] if args.profile else []))
+
+
+def valid_date(value):
+    date_ordinal(value)  # يرفع ValueError إذا لم يكن التاريخ بصيغة YYYY-MM-DD
+    return value
+
+
+def sort_field(value):
+    """مفتاح فرز بصيغة KEY أو KEY:asc أو KEY:desc إلى صيغة TaskQuery (البادئة - تعكس الاتجاه المعتاد)."""
+    name, _, direction = value.partition(':')
+    if name not in TaskList.SORT_KEYS or direction not in ('', 'asc', 'desc'):
+        raise ValueError(value)
+    if direction and (direction == 'desc') != TaskList.SORT_KEYS[name][1]:
+        return '-' + name
+    return name
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="To-Do List Manager (command line)")
+    parser.add_argument("--data", default="tasks.json", help="ملف المهام (JSON، أو لقطة ثنائية بامتداد .bin)")
+    parser.add_argument("--sqlite", metavar="PATH", help="استخدام قاعدة SQLite بدل ملف JSON")
+    parser.add_argument("--shared", action="store_true", help="ملفات مشتركة بين عدة نسخ (قفل ودمج العمليات)")
+    parser.add_argument("--profile", metavar="TRACE", help="قياس زمن العمليات وحفظه بصيغة Chrome trace")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="إضافة مهمة أو أكثر إلى قائمة فرعية")
+    add.add_argument("submenu")
+    add.add_argument("descriptions", nargs="+")
+    add.add_argument("--priority", default="")
+    add.add_argument("--date", type=valid_date, default=date.today().strftime("%Y-%m-%d"))
+    add.add_argument("--completed", action="store_true")
+    add.add_argument("--repeat", choices=tuple(Recurrence.FREQUENCIES), help="مهمة متكررة بدءًا من --date")
+    add.add_argument("--every", type=int, default=1, metavar="N", help="كل N أيام/أسابيع/أشهر")
+    ends = add.add_mutually_exclusive_group()
+    ends.add_argument("--until", type=valid_date, help="آخر تاريخ للتكرار")
+    ends.add_argument("--count", type=int, help="عدد التكرارات")
+    add.set_defaults(handler=cmd_add)
+
+    complete = commands.add_parser("complete", help="تحديد مهام كمكتملة بواسطة المعرف")
+    complete.add_argument("ids", nargs="+")
+    complete.add_argument("--through", type=valid_date, help="للمهام المتكررة: إنجاز جميع التكرارات حتى هذا التاريخ")
+    complete.set_defaults(handler=cmd_complete)
+
+    delete = commands.add_parser("delete", help="حذف مهام بواسطة المعرف")
+    delete.add_argument("ids", nargs="+")
+    delete.set_defaults(handler=cmd_delete)
+
+    query = commands.add_parser("list", help="عرض المهام")
+    query.add_argument("--submenu", action="append", help="يمكن تكراره لعدة قوائم فرعية")
+    query.add_argument("--search")
+    query.add_argument("--priority", action="append", help="يمكن تكراره (High/Medium/Low أو بالعربية)")
+    query.add_argument("--from", dest="date_from", type=valid_date, help="من تاريخ YYYY-MM-DD")
+    query.add_argument("--to", type=valid_date, help="حتى تاريخ YYYY-MM-DD")
+    status = query.add_mutually_exclusive_group()
+    status.add_argument("--completed", action="store_true")
+    status.add_argument("--uncompleted", action="store_true")
+    status.add_argument("--due", action="store_true", help="المهام المستحقة اليوم أو المتأخرة")
+    query.add_argument("--sort", type=sort_field, nargs="+", metavar="KEY",
+                       help=f"مفتاح أو أكثر من {', '.join(sorted(TaskList.SORT_KEYS))}، مع :asc أو :desc اختياريًا")
+    query.add_argument("--limit", type=int, help="أول N نتيجة فقط (دون فرز جميع المطابقات)")
+    query.add_argument("--json", action="store_true", help="سطر JSON لكل مهمة")
+    query.set_defaults(handler=cmd_list)
+
+    agenda = commands.add_parser("agenda", help="تكرارات المهام بين تاريخين (الافتراضي: الأيام السبعة القادمة)")
+    agenda.add_argument("--submenu", action="append", help="يمكن تكراره لعدة قوائم فرعية")
+    agenda.add_argument("--from", dest="date_from", type=valid_date, help="من تاريخ YYYY-MM-DD (الافتراضي: اليوم)")
+    agenda.add_argument("--to", type=valid_date, help="حتى تاريخ YYYY-MM-DD")
+    agenda.add_argument("--json", action="store_true", help="سطر JSON لكل تكرار")
+    agenda.set_defaults(handler=cmd_agenda)
+
+    submenus = commands.add_parser("submenus", help="عرض القوائم الفرعية وعدد المهام المنجزة")
+    submenus.set_defaults(handler=cmd_submenus)
+
+    bulk = commands.add_parser("import", help="استيراد مهام من ملف CSV أو JSON Lines")
+    bulk.add_argument("file")
+    bulk.add_argument("--format", choices=("csv", "jsonl"), help="افتراضيًا حسب امتداد الملف")
+    bulk.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    bulk.set_defaults(handler=cmd_import)
+
+    export = commands.add_parser("export", help="تصدير البيانات")
+    export.add_argument("--output", "-o")
+    export.add_argument("--format", choices=("json", "jsonl", "csv"), default="json")
+    export.set_defaults(handler=cmd_export)
+
+    convert = commands.add_parser("convert", help="تحويل اللقطة بين JSON والصيغة الثنائية (.bin)")
+    convert.add_argument("source")
+    convert.add_argument("target", help="لقطة ثنائية (.bin) أو ملف JSON واحد {القائمة الفرعية: [المهام]}")
+    convert.set_defaults(handler=None)
+
+    gui = commands.add_parser("gui", help="تشغيل الواجهة الرسومية")
+    gui.set_defaults(handler=None)
+
+    serve = commands.add_parser("serve", help="تشغيل خدمة HTTP/JSON محلية للسكربتات ولوحات المتابعة")
+    serve.add_argument("--host", default="127.0.0.1", help="الافتراضي: الجهاز المحلي فقط")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.set_defaults(handler=None)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "gui":
+        run_gui(args)
+        return 0
+    if args.command == "convert":
+        return run_convert(args)
+    if args.command == "serve":
+        return run_serve(args)
+    if args.profile:
+        instrument_core()
+    engine = open_engine(args)
+    try:
+        return args.handler(engine, args) or 0
+    finally:
+        engine.close()
+        if args.profile:
+            PROFILER.export_chrome_trace(args.profile)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
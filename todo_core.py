@@ -0,0 +1,3054 @@
+"""نواة إدارة المهام دون واجهة رسومية (لا تستورد tkinter).
+
+تحتوي نموذج البيانات (TaskNode، TaskList)، الفهارس، التخزين (سجل العمليات وSQLite)
+ومحرك المهام TaskEngine الذي تستخدمه الواجهة وسطر الأوامر.
+"""
+import os
+import csv
+import sys
+import copy
+import json
+import time
+import uuid
+import mmap
+import heapq
+import queue
+import struct
+import sqlite3
+import calendar
+import threading
+import functools
+import itertools
+import traceback
+import contextlib
+from collections import deque
+from datetime import date as Date, datetime
+
+try:
+    import fcntl  # قفل الملفات على لينكس وماك
+except ImportError:
+    fcntl = None
+    import msvcrt  # ويندوز
+
+
+# قاموس للغات (عربي وإنجليزي)
+LANGUAGES = {
+    "English": {
+        "Main Menu": "Main Menu",
+        "Student": "Student",
+        "Work": "Work",
+        "Homework": "Homework",
+        "Review": "Review",
+        "Study": "Study",
+        "Leisure Time": "Leisure Time",
+        "Exercise": "Exercise",
+        "Personal Tasks": "Personal Tasks",
+        "Projects": "Projects",
+        "Shopping": "Shopping",
+        "Entertainment": "Entertainment",
+        "Other": "Other",
+        "Task Description": "Task Description",
+        "Priority": "Priority",
+        "Date": "Date",
+        "Add Task": "Add Task",
+        "Mark as Done": "Mark as Done",
+        "Search Task": "Search Task",
+        "Tasks": "Tasks",
+        "Search Task Placeholder": "Enter task description...",
+        "Task Not Found": "Task not found!",
+        "High": "High",
+        "Medium": "Medium",
+        "Low": "Low",
+        "Add Submenu": "Add Submenu",
+        "Submenu Name": "Submenu Name",
+        "Delete Task": "Delete Task",
+        "Completion Rate": "Completion Rate",
+        "Uncompleted Tasks": "Uncompleted Tasks",
+        "Completed Tasks": "Completed Tasks",
+        "Due Tasks": "Due Today / Overdue",
+        "Sort By": "Sort By",
+        "Date": "Date",
+        "Priority": "Priority",
+        "Alphabetical": "Alphabetical",
+        "Reset": "Reset",
+        "Import": "Import",
+        "Imported Tasks": "Imported {count} tasks ({rate:.0f} tasks/s)",
+        "Import Failed": "Import stopped: {error}\nTasks imported before this row were kept and can be undone.",
+        "Save Failed": "Saving tasks failed: {error}\nRecent changes may not be on disk.",
+        "Statistics": "Statistics",
+        "Total": "Total",
+        "Profiler": "Profiler",
+        "Slow Callbacks": "Slow Callbacks",
+        "Calls": "Calls",
+        "Duration": "Duration (ms)",
+        "Slowest": "Slowest (ms)",
+        "Export Trace": "Export Trace",
+        "Undo": "Undo",
+        "Redo": "Redo",
+        "History": "History",
+        "Done": "Done",
+        "In Progress": "In Progress",
+        "Repeat": "Repeat",
+        "Does Not Repeat": "Does not repeat",
+        "daily": "Daily",
+        "weekly": "Weekly",
+        "monthly": "Monthly",
+        "Until": "Until (YYYY-MM-DD)",
+        "Still Loading": "Tasks are still loading, please try again in a moment.",
+        "Confirm Reset": "Are you sure you want to reset all data?"
+    },
+    "Arabic": {
+        "Main Menu": "القائمة الرئيسية",
+        "Student": "طالب",
+        "Work": "عمل",
+        "Homework": "واجب منزلي",
+        "Review": "مراجعة",
+        "Study": "دراسة",
+        "Leisure Time": "وقت راحة",
+        "Exercise": "رياضة",
+        "Personal Tasks": "مهام شخصية",
+        "Projects": "مشاريع",
+        "Shopping": "تسوق",
+        "Entertainment": "ترفيه",
+        "Other": "أخرى",
+        "Task Description": "وصف المهمة",
+        "Priority": "الأولوية",
+        "Date": "التاريخ",
+        "Add Task": "إضافة مهمة",
+        "Mark as Done": "تمت المهمة",
+        "Search Task": "بحث عن المهمة",
+        "Tasks": "المهام",
+        "Search Task Placeholder": "أدخل وصف المهمة...",
+        "Task Not Found": "المهمة غير موجودة!",
+        "High": "عالي",
+        "Medium": "متوسط",
+        "Low": "منخفض",
+        "Add Submenu": "إضافة قائمة فرعية",
+        "Submenu Name": "اسم القائمة الفرعية",
+        "Delete Task": "حذف المهمة",
+        "Completion Rate": "نسبة الإنجاز",
+        "Uncompleted Tasks": "المهام الغير منجزة",
+        "Completed Tasks": "المهام المنجزة",
+        "Due Tasks": "مستحقة اليوم / متأخرة",
+        "Sort By": "فرز بواسطة",
+        "Date": "التاريخ",
+        "Priority": "الأولوية",
+        "Alphabetical": "الأبجدي",
+        "Reset": "إعادة ضبط",
+        "Import": "استيراد",
+        "Imported Tasks": "تم استيراد {count} مهمة ({rate:.0f} مهمة/ثانية)",
+        "Import Failed": "توقف الاستيراد: {error}\nالمهام المستوردة قبل هذا الصف محفوظة ويمكن التراجع عنها.",
+        "Save Failed": "تعذر حفظ المهام: {error}\nقد لا تكون التغييرات الأخيرة محفوظة على القرص.",
+        "Statistics": "الإحصائيات",
+        "Total": "الإجمالي",
+        "Profiler": "قياس الأداء",
+        "Slow Callbacks": "العمليات البطيئة",
+        "Calls": "عدد الاستدعاءات",
+        "Duration": "المدة (ms)",
+        "Slowest": "الأبطأ (ms)",
+        "Export Trace": "تصدير التتبع",
+        "Undo": "تراجع",
+        "Redo": "إعادة",
+        "History": "سجل التغييرات",
+        "Done": "مكتملة",
+        "In Progress": "قيد التنفيذ",
+        "Repeat": "التكرار",
+        "Does Not Repeat": "بدون تكرار",
+        "daily": "يومي",
+        "weekly": "أسبوعي",
+        "monthly": "شهري",
+        "Until": "حتى (YYYY-MM-DD)",
+        "Still Loading": "لا تزال المهام قيد التحميل، حاول مرة أخرى بعد لحظات.",
+        "Confirm Reset": "هل أنت متأكد من رغبتك في إعادة ضبط جميع البيانات؟"
+    }
+}
+
+# رموز الأولوية: تُخزن كأعداد صغيرة وتُترجم عند العرض فقط
+PRIORITY_NONE, PRIORITY_LOW, PRIORITY_MEDIUM, PRIORITY_HIGH = 0, 1, 2, 3
+PRIORITY_NAMES = {PRIORITY_NONE: "", PRIORITY_LOW: "Low", PRIORITY_MEDIUM: "Medium", PRIORITY_HIGH: "High"}
+
+# ترتيب الأولويات (بالعربي والإنجليزي)
+PRIORITY_ORDER = {
+    LANGUAGES["Arabic"]["High"]: PRIORITY_HIGH,
+    LANGUAGES["Arabic"]["Medium"]: PRIORITY_MEDIUM,
+    LANGUAGES["Arabic"]["Low"]: PRIORITY_LOW,
+    LANGUAGES["English"]["High"]: PRIORITY_HIGH,
+    LANGUAGES["English"]["Medium"]: PRIORITY_MEDIUM,
+    LANGUAGES["English"]["Low"]: PRIORITY_LOW
+}
+
+
+def priority_code(priority):
+    """تحويل الأولوية (بأي لغة) إلى رمزها العددي؛ الأولوية الفارغة أو غير المعروفة = 0.
+
+    الرمز العددي غير المعروف يرفع ValueError (لا يمكن عرضه ولا حفظه).
+    """
+    if isinstance(priority, int):
+        if priority not in PRIORITY_NAMES:
+            raise ValueError(f"invalid priority: {priority}")
+        return priority
+    return PRIORITY_ORDER.get(priority, PRIORITY_NONE)
+
+
+# القوائم الفرعية المعرّفة مسبقًا: تُخزن بمفتاحها في LANGUAGES وتُترجم عند العرض فقط
+BUILTIN_SUBMENUS = ("Student", "Work", "Homework", "Review", "Study", "Leisure Time", "Exercise",
+                    "Personal Tasks", "Projects", "Shopping", "Entertainment", "Other")
+
+# اسم القائمة المعرّفة مسبقًا بأي لغة -> مفتاحها
+SUBMENU_KEYS = {LANGUAGES[language][key]: key for language in LANGUAGES for key in BUILTIN_SUBMENUS}
+
+
+def submenu_key(name):
+    """المفتاح الثابت لاسم قائمة فرعية معرّفة مسبقًا بأي لغة (الأسماء الأخرى تبقى كما هي)."""
+    return SUBMENU_KEYS.get(name, name)
+
+
+@functools.lru_cache(maxsize=None)
+def render_cache(language):
+    """تسميات العرض للغة محسوبة مرة واحدة: الأولوية حسب رمزها، حالة الإكمال، والقوائم المعرّفة مسبقًا."""
+    labels = LANGUAGES[language]
+    return {
+        'priority': {code: labels.get(name, name) for code, name in PRIORITY_NAMES.items()},
+        'status': {False: labels["In Progress"], True: labels["Done"]},
+        'submenus': {key: labels[key] for key in BUILTIN_SUBMENUS},
+        'repeat': {frequency: labels[frequency] for frequency in Recurrence.FREQUENCIES},
+    }
+
+
+def localize_priority(priority, language):
+    """ترجمة الأولوية (اسمها بأي لغة أو رمزها) إلى لغة الواجهة عند العرض."""
+    return render_cache(language)['priority'][priority_code(priority)]
+
+
+def localize_submenu(submenu, language):
+    """اسم القائمة الفرعية بلغة الواجهة (القوائم التي أنشأها المستخدم تبقى كما هي)."""
+    return render_cache(language)['submenus'].get(submenu_key(submenu), submenu)
+
+
+def date_ordinal(date):
+    """تحويل التاريخ YYYY-MM-DD إلى رقم اليوم (0 = بدون تاريخ)."""
+    return datetime.fromisoformat(date).toordinal() if date else 0
+
+
+def today_ordinal():
+    """رقم يوم اليوم (للمقارنة مع TaskNode.date_ordinal)."""
+    return Date.today().toordinal()
+
+
+def date_string(ordinal):
+    """تحويل رقم اليوم إلى نص التاريخ YYYY-MM-DD."""
+    return datetime.fromordinal(ordinal).strftime("%Y-%m-%d") if ordinal else ""
+
+
+def iter_json_submenus(path, chunk_size=1 << 20):
+    """قراءة ملف المهام {القائمة الفرعية: [المهام]} قائمة فرعية تلو الأخرى.
+
+    يُقرأ الملف على دفعات ولا يُحتفظ في الذاكرة إلا بالقائمة الفرعية الجاري تحليلها.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as file:
+        buffer = ''
+        position = 0
+        eof = False
+
+        def read_more():
+            nonlocal buffer, position, eof
+            # مضاعفة حجم القراءة حتى لا يُعاد تحليل قائمة كبيرة مرات كثيرة
+            chunk = file.read(max(chunk_size, len(buffer) - position))
+            buffer = buffer[position:] + chunk
+            position = 0
+            eof = not chunk
+
+        def next_token():
+            """تخطي المسافات وإرجاع الحرف التالي (أو '' في نهاية الملف)."""
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position].isspace():
+                    position += 1
+                if position < len(buffer) or eof:
+                    return buffer[position:position + 1]
+                read_more()
+
+        def decode_value():
+            nonlocal position
+            while True:
+                next_token()
+                try:
+                    value, position = decoder.raw_decode(buffer, position)
+                    return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    read_more()
+
+        read_more()
+        if next_token() != '{':
+            raise ValueError(f"{path}: expected a JSON object")
+        position += 1
+        while True:
+            token = next_token()
+            if token == '}':
+                return
+            if token == ',':
+                position += 1
+                continue
+            submenu = decode_value()
+            if next_token() != ':':
+                raise ValueError(f"{path}: expected ':' after {submenu!r}")
+            position += 1
+            yield submenu, decode_value()
+
+
+# قواعد التكرار (Recurrence)
+class Recurrence:
+    """قاعدة تكرار مهمة: كل interval يوم أو أسبوع أو شهر بدءًا من start حتى end (أو بلا نهاية).
+
+    التكرارات لا تُخزن: occurrence(n) يحسب التكرار رقم n مباشرة، وcount_until يعدّ
+    التكرارات حتى يوم ما دون المرور عليها، وoccurrences مولّد على نافذة تواريخ.
+    التكرار الشهري في يوم غير موجود في الشهر (مثل 31) يقع في آخر يوم منه.
+
+    الصيغة النصية في الملفات والسجل: "weekly/2:2024-05-01:2024-12-31"
+    (التكرار[/الفاصل]:أول تكرار[:آخر تكرار]).
+    """
+
+    FREQUENCIES = {"daily": 1, "weekly": 7, "monthly": 0}  # طول الخطوة بالأيام (0 = حسب التقويم)
+
+    __slots__ = ('frequency', 'interval', 'start', 'end')
+
+    def __init__(self, frequency, interval, start, end=None):
+        if frequency not in self.FREQUENCIES or interval < 1 or not start or (end is not None and end < start):
+            raise ValueError(f"invalid recurrence: {frequency}/{interval}")
+        self.frequency = frequency
+        self.interval = interval
+        self.start = start  # رقم يوم أول تكرار
+        self.end = end  # رقم يوم آخر تكرار (None = بلا نهاية)
+
+    @classmethod
+    def create(cls, frequency, start, interval=1, until=None, count=None):
+        """قاعدة من مدخلات المستخدم: حتى اليوم until، أو count تكرارًا (وإلا بلا نهاية)."""
+        rule = cls(frequency, interval, date_ordinal(start) if isinstance(start, str) else start)
+        if count is not None:
+            if count < 1:
+                raise ValueError(f"invalid recurrence count: {count}")
+            rule.end = rule.occurrence(count - 1)
+        elif until:
+            last = rule.count_until(date_ordinal(until) if isinstance(until, str) else until)
+            if not last:
+                raise ValueError(f"recurrence ends before it starts: {until}")
+            rule.end = rule.occurrence(last - 1)
+        return rule
+
+    @classmethod
+    @functools.lru_cache(maxsize=4096)
+    def parse(cls, spec):
+        """القاعدة من صيغتها النصية (القواعد ثابتة، فتُشارك بين المهام ذات الصيغة نفسها)."""
+        rule, _, dates = spec.partition(':')
+        frequency, _, interval = rule.partition('/')
+        start, _, end = dates.partition(':')
+        return cls(frequency, int(interval or 1), date_ordinal(start), date_ordinal(end) if end else None)
+
+    def __str__(self):
+        rule = self.frequency if self.interval == 1 else f"{self.frequency}/{self.interval}"
+        return ':'.join([rule, date_string(self.start)] + ([date_string(self.end)] if self.end else []))
+
+    def occurrence(self, n):
+        """رقم يوم التكرار رقم n (من 0) دون حساب ما قبله."""
+        step = self.FREQUENCIES[self.frequency] * self.interval
+        if step:
+            return self.start + n * step
+        first = Date.fromordinal(self.start)
+        month = first.month - 1 + n * self.interval
+        year, month = first.year + month // 12, month % 12 + 1
+        return Date(year, month, min(first.day, calendar.monthrange(year, month)[1])).toordinal()
+
+    def _count_from_start(self, day):
+        if day < self.start:
+            return 0
+        step = self.FREQUENCIES[self.frequency] * self.interval
+        if step:
+            return (day - self.start) // step + 1
+        first, last = Date.fromordinal(self.start), Date.fromordinal(day)
+        n = ((last.year - first.year) * 12 + last.month - first.month) // self.interval
+        return n + 1 if self.occurrence(n) <= day else n
+
+    def count_until(self, day):
+        """عدد التكرارات حتى اليوم day (شاملًا) في زمن ثابت."""
+        count = self._count_from_start(day)
+        return count if self.end is None else min(count, self._count_from_start(self.end))
+
+    def count_between(self, date_from, date_to):
+        """عدد التكرارات بين يومين (شاملًا)."""
+        return max(0, self.count_until(date_to) - self.count_until(date_from - 1))
+
+    def next_after(self, day):
+        """أول تكرار بعد اليوم day، أو None إذا انتهت التكرارات."""
+        following = self.occurrence(self.count_until(day))
+        return following if self.end is None or following <= self.end else None
+
+    def occurrences(self, date_from, date_to=None):
+        """مولّد أرقام أيام التكرارات من date_from حتى date_to (أو حتى آخر تكرار).
+
+        بدون date_to ولا نهاية للقاعدة لا يتوقف المولّد (يُقطع بـ itertools.islice مثلًا).
+        """
+        n = self.count_until(date_from - 1)
+        last = self.end if date_to is None else min(date_to, self.end or date_to)
+        while True:
+            day = self.occurrence(n)
+            if last is not None and day > last:
+                return
+            yield day
+            n += 1
+
+
+# عقدة المهمة (TaskNode)
+class TaskNode:
+    # __slots__ بدل __dict__ لتقليل استهلاك الذاكرة لكل مهمة
+    __slots__ = ('id', 'description', 'priority_code', 'date_ordinal', 'completed', 'recurrence', 'next', 'prev')
+
+    def __init__(self, description, priority, date, completed=False, next_node=None, task_id=None, repeat=None):
+        self.id = task_id if task_id is not None else uuid.uuid4().hex  # معرف ثابت للمهمة
+        self.description = sys.intern(description)  # وصف المهمة (نص مشترك للأوصاف المكررة)
+        self.priority_code = priority_code(priority)  # الأولوية كرمز عددي
+        self.date_ordinal = date_ordinal(date)  # التاريخ كرقم اليوم (للمهمة المتكررة: تكرارها الحالي)
+        self.completed = completed  # حالة الإكمال (للمهمة المتكررة: بعد آخر تكرار)
+        self.recurrence = Recurrence.parse(repeat) if repeat else None  # قاعدة التكرار (None = مهمة واحدة)
+        self.next = next_node  # العقدة التالية
+        self.prev = None  # العقدة السابقة (للحذف في زمن ثابت)
+
+    @property
+    def priority(self):
+        """اسم الأولوية غير المترجم (High/Medium/Low)."""
+        return PRIORITY_NAMES[self.priority_code]
+
+    @property
+    def date(self):
+        """التاريخ بصيغة YYYY-MM-DD."""
+        return date_string(self.date_ordinal)
+
+    @property
+    def repeat(self):
+        """قاعدة التكرار بصيغتها النصية ("" للمهمة غير المتكررة)."""
+        return str(self.recurrence) if self.recurrence else ""
+
+    def to_record(self):
+        """المهمة بصيغة ملف JSON (المفتاح repeat للمهام المتكررة فقط)."""
+        record = {'id': self.id, 'description': self.description, 'priority': self.priority, 'date': self.date,
+                  'completed': self.completed}
+        if self.recurrence:
+            record['repeat'] = str(self.recurrence)
+        return record
+
+    def occurrences(self, date_from, date_to=None):
+        """(رقم اليوم، العقدة، منجز؟) لتكرارات المهمة بين يومين؛ ما قبل التكرار الحالي منجز."""
+        if self.recurrence is None:
+            if self.date_ordinal and date_from <= self.date_ordinal and (date_to is None or self.date_ordinal <= date_to):
+                yield self.date_ordinal, self, self.completed
+            return
+        for day in self.recurrence.occurrences(date_from, date_to):
+            yield day, self, self.completed or day < self.date_ordinal
+
+    def occurrence_counts(self, date_from, date_to):
+        """(عدد التكرارات، المنجز منها) بين يومين في زمن ثابت مهما طالت القاعدة."""
+        if self.recurrence is None:
+            inside = bool(self.date_ordinal) and date_from <= self.date_ordinal <= date_to
+            return int(inside), int(inside and self.completed)
+        total = self.recurrence.count_between(date_from, date_to)
+        if self.completed:
+            return total, total
+        return total, self.recurrence.count_between(date_from, min(date_to, self.date_ordinal - 1))
+
+
+# عدادات المهام (TaskStats)
+class TaskStats:
+    """عدادات تُحدّث مع كل إضافة أو إكمال أو حذف بدل إعادة حسابها عند كل عرض.
+
+    تحتفظ بالإجمالي والمنجز، ومثلهما لكل أولوية ولكل شهر (حسب تاريخ المهمة).
+    """
+
+    __slots__ = ('total', 'completed', 'by_priority', 'by_month')
+
+    def __init__(self):
+        self.total = 0
+        self.completed = 0
+        self.by_priority = {}  # رمز الأولوية -> [الإجمالي، المنجز]
+        self.by_month = {}  # (السنة، الشهر) -> [الإجمالي، المنجز]
+
+    @staticmethod
+    def month_of(ordinal):
+        if not ordinal:
+            return None
+        day = datetime.fromordinal(ordinal)
+        return day.year, day.month
+
+    def _buckets(self, priority, ordinal):
+        return (self.by_priority.setdefault(priority, [0, 0]),
+                self.by_month.setdefault(self.month_of(ordinal), [0, 0]))
+
+    def add(self, priority, ordinal, completed):
+        self.total += 1
+        self.completed += bool(completed)
+        for bucket in self._buckets(priority, ordinal):
+            bucket[0] += 1
+            bucket[1] += bool(completed)
+
+    def remove(self, priority, ordinal, completed):
+        self.total -= 1
+        self.completed -= bool(completed)
+        for bucket in self._buckets(priority, ordinal):
+            bucket[0] -= 1
+            bucket[1] -= bool(completed)
+
+    def complete(self, priority, ordinal):
+        self.completed += 1
+        for bucket in self._buckets(priority, ordinal):
+            bucket[1] += 1
+
+    def uncomplete(self, priority, ordinal):
+        self.completed -= 1
+        for bucket in self._buckets(priority, ordinal):
+            bucket[1] -= 1
+
+    def merge(self, other):
+        """إضافة عدادات أخرى (لحساب الإجمالي عبر القوائم الفرعية)."""
+        self.total += other.total
+        self.completed += other.completed
+        for mine, theirs in ((self.by_priority, other.by_priority), (self.by_month, other.by_month)):
+            for key, (total, completed) in theirs.items():
+                bucket = mine.setdefault(key, [0, 0])
+                bucket[0] += total
+                bucket[1] += completed
+        return self
+
+    def to_dict(self):
+        """العدادات بصيغة JSON (للملف الوصفي للقوائم الفرعية)."""
+        return {
+            'total': self.total,
+            'completed': self.completed,
+            'by_priority': [[code, total, completed] for code, (total, completed) in self.by_priority.items()],
+            'by_month': [[*(month or (0, 0)), total, completed] for month, (total, completed) in self.by_month.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.total = data['total']
+        stats.completed = data['completed']
+        stats.by_priority = {code: [total, completed] for code, total, completed in data['by_priority']}
+        stats.by_month = {(year, month) if year else None: [total, completed] for year, month, total, completed in data['by_month']}
+        return stats
+
+    @staticmethod
+    def rate(total, completed):
+        """نسبة الإنجاز المئوية."""
+        return (completed / total) * 100 if total else 0
+
+    @property
+    def completion_rate(self):
+        return self.rate(self.total, self.completed)
+
+
+# سجلات قائمة فرعية في ملف منفصل (LazyRecords)
+class LazyRecords:
+    """سجلات قائمة فرعية محفوظة في ملفها الخاص، تُقرأ عند أول مرور عليها.
+
+    عددها معروف من الملف الوصفي، لذلك لا يحتاج len() إلى قراءة الملف.
+    """
+
+    __slots__ = ('loader', 'count', 'records')
+
+    def __init__(self, loader, count):
+        self.loader = loader
+        self.count = count
+        self.records = None
+
+    @property
+    def loaded(self):
+        return self.records is not None
+
+    def load(self):
+        if self.records is None:
+            self.records = self.loader()
+        return self.records
+
+    def __len__(self):
+        return self.count if self.records is None else len(self.records)
+
+    def __iter__(self):
+        return iter(self.load())
+
+
+# قائمة مرتبطة لإدارة المهام (TaskList)
+class TaskList:
+    def __init__(self, records=None, stats=None):
+        self._pending = records  # مهام مقروءة من الملف (أو LazyRecords) لم تتحول إلى عقد بعد
+        self.head = None  # بداية القائمة
+        self.tail = None  # نهاية القائمة (للإضافة في زمن ثابت)
+        self._nodes = {}  # فهرس: المعرف -> العقدة
+        self._by_description = {}  # فهرس: الوصف -> {المعرف: العقدة} بترتيب القائمة
+        self.sort_order = None  # ترتيب العرض الحالي (None = ترتيب الإضافة)
+        self._sorted_views = {}  # ترتيب -> قائمة عقد مرتبة (تُلغى عند تغير المهام)
+        self.stats = stats or TaskStats()  # عدادات الإجمالي والمنجز
+        self._due = None  # كومة (التاريخ، المعرف) للمهام غير المنجزة ذات التاريخ (تُبنى عند أول طلب)
+        self._due_stale = 0  # عناصر في الكومة لمهام أُنجزت أو حُذفت (تُحذف عند إعادة البناء)
+        self._status = None  # (الحالة الأقل عددًا، {المعرف: العقدة} لمهامها) تُبنى عند أول عرض حسب الحالة
+        self._recurring = {}  # المعرف -> العقدة للمهام المتكررة (تُولَّد تكراراتها عند الطلب)
+        if stats is None:
+            for task in records or ():
+                self.stats.add(priority_code(task['priority']), date_ordinal(task['date']), task['completed'])
+
+    def __len__(self):
+        if self._pending is not None:
+            return len(self._pending)
+        return len(self._nodes)
+
+    def _load_pending(self):
+        """تحويل المهام المقروءة من الملف إلى عقد عند أول استخدام للقائمة."""
+        records, self._pending = self._pending, None
+        self.stats = TaskStats()  # تُعاد العدادات أثناء الإضافة
+        for task in records:
+            self.add_task(task['description'], task['priority'], task['date'], task['completed'], task_id=task.get('id'),
+                          repeat=task.get('repeat'))
+
+    @property
+    def loaded(self):
+        """هل قُرئت مهام القائمة من ملفها؟"""
+        return not isinstance(self._pending, LazyRecords) or self._pending.loaded
+
+    def load(self):
+        """قراءة مهام القائمة من ملفها دون تحويلها إلى عقد."""
+        if isinstance(self._pending, LazyRecords):
+            self._pending.load()
+
+    def to_records(self):
+        """المهام بصيغة ملف JSON (دون تحويل قائمة لم تُفتح بعد)."""
+        if self._pending is not None:
+            return list(self._pending)
+        return [node.to_record() for node in self]
+
+    def iter_descriptions(self):
+        """أزواج (المعرف، الوصف) دون تحويل قائمة لم تُفتح بعد."""
+        if self._pending is not None:
+            return ((task['id'], task['description']) for task in self._pending)
+        return ((node.id, node.description) for node in self._iter_linked())
+
+    def __iter__(self):
+        """المرور على عقد القائمة بترتيب العرض الحالي."""
+        if self._pending is not None:
+            self._load_pending()
+        if self.sort_order:
+            return iter(self.sorted_view(self.sort_order))
+        return self._iter_linked()
+
+    def _iter_linked(self):
+        """المرور على عقد القائمة المرتبطة بترتيب الإضافة."""
+        current = self.head
+        while current:
+            yield current
+            current = current.next
+
+    def add_task(self, description, priority, date, completed=False, task_id=None, before=None, repeat=None):
+        """إضافة مهمة جديدة إلى القائمة (في نهايتها، أو قبل المهمة before إن وُجدت).
+
+        repeat: قاعدة تكرار بصيغة Recurrence النصية؛ المهمة المتكررة عقدة واحدة تاريخها تكرارها الحالي.
+        """
+        if self._pending is not None:
+            self._load_pending()
+        new_task = TaskNode(description, priority, date, completed, task_id=task_id, repeat=repeat)
+        successor = self._nodes.get(before) if before else None
+        if successor:
+            self._insert_before(new_task, successor)
+        else:
+            self._append_node(new_task)
+        self._sorted_views.clear()
+        self.stats.add(new_task.priority_code, new_task.date_ordinal, new_task.completed)
+        self._nodes[new_task.id] = new_task
+        if self._due is not None and not new_task.completed and new_task.date_ordinal:
+            heapq.heappush(self._due, (new_task.date_ordinal, new_task.id))
+        self._track_status(new_task)
+        self._by_description.setdefault(description, {})[new_task.id] = new_task
+        if new_task.recurrence:
+            self._recurring[new_task.id] = new_task
+        return new_task
+
+    def _append_node(self, node):
+        """ربط عقدة في نهاية القائمة."""
+        node.next = None
+        node.prev = self.tail
+        if self.tail:
+            self.tail.next = node
+        else:
+            self.head = node
+        self.tail = node
+
+    def _insert_before(self, node, successor):
+        """ربط عقدة قبل عقدة موجودة (لاستعادة مهمة محذوفة في موضعها)."""
+        node.next = successor
+        node.prev = successor.prev
+        if successor.prev:
+            successor.prev.next = node
+        else:
+            self.head = node
+        successor.prev = node
+
+    def _unlink_node(self, node):
+        """فصل عقدة من القائمة."""
+        if node.prev:
+            node.prev.next = node.next
+        else:
+            self.head = node.next
+        if node.next:
+            node.next.prev = node.prev
+        else:
+            self.tail = node.prev
+        node.next = node.prev = None
+
+    def find_by_description(self, description):
+        """الحصول على أول عقدة تطابق الوصف."""
+        if self._pending is not None:
+            self._load_pending()
+        matches = self._by_description.get(description)
+        if matches:
+            return next(iter(matches.values()))
+        return None
+
+    def get_task(self, task_id):
+        """الحصول على عقدة المهمة بواسطة المعرف."""
+        if self._pending is not None:
+            self._load_pending()
+        return self._nodes.get(task_id)
+
+    def get_all_tasks(self):
+        """الحصول على جميع المهام في القائمة."""
+        return [(node.description, node.priority, node.date, node.completed) for node in self]
+
+    def mark_task_as_done(self, description):
+        """تحديد المهمة كمكتملة بناءً على الوصف."""
+        node = self.find_by_description(description)
+        if node:
+            self.mark_task_as_done_by_id(node.id)
+
+    def mark_task_as_done_by_id(self, task_id):
+        """تحديد المهمة كمكتملة بناءً على المعرف."""
+        node = self.get_task(task_id)
+        if node and not node.completed:
+            node.completed = True
+            self.stats.complete(node.priority_code, node.date_ordinal)
+            self._track_status(node)
+            self._forget_due(node)
+        return node
+
+    def mark_task_as_undone_by_id(self, task_id):
+        """إلغاء إكمال المهمة بناءً على المعرف (للتراجع)."""
+        node = self.get_task(task_id)
+        if node and node.completed:
+            node.completed = False
+            self.stats.uncomplete(node.priority_code, node.date_ordinal)
+            self._track_status(node)
+            if self._due is not None and node.date_ordinal:
+                heapq.heappush(self._due, (node.date_ordinal, node.id))
+        return node
+
+    def delete_task(self, description):
+        """حذف مهمة بناءً على الوصف."""
+        node = self.find_by_description(description)
+        if node:
+            return self.delete_task_by_id(node.id)
+        return None
+
+    def delete_task_by_id(self, task_id):
+        """حذف مهمة بناءً على المعرف."""
+        if self._pending is not None:
+            self._load_pending()
+        node = self._nodes.pop(task_id, None)
+        if not node:
+            return None
+        matches = self._by_description[node.description]
+        del matches[task_id]
+        if not matches:
+            del self._by_description[node.description]
+        self._unlink_node(node)
+        self._sorted_views.clear()
+        self.stats.remove(node.priority_code, node.date_ordinal, node.completed)
+        if self._status is not None:
+            self._status[1].pop(task_id, None)
+        self._recurring.pop(task_id, None)
+        if not node.completed:
+            self._forget_due(node)
+        return node
+
+    def reschedule_task_by_id(self, task_id, date):
+        """نقل المهمة إلى تاريخ آخر (التكرار التالي لمهمة متكررة، أو تكرار سابق عند التراجع)."""
+        node = self.get_task(task_id)
+        ordinal = date_ordinal(date)
+        if node and node.date_ordinal != ordinal:
+            self.stats.remove(node.priority_code, node.date_ordinal, node.completed)
+            node.date_ordinal = ordinal
+            self.stats.add(node.priority_code, ordinal, node.completed)
+            self._sorted_views.clear()
+            if self._due is not None and not node.completed and ordinal:
+                heapq.heappush(self._due, (ordinal, node.id))
+                self._forget_due(node)  # عنصر التاريخ السابق يبقى في الكومة حتى إعادة بنائها
+        return node
+
+    def _forget_due(self, node):
+        """عنصر الكومة لمهمة لم تعد غير منجزة يبقى حتى تُعاد بناء الكومة."""
+        if self._due is not None and node.date_ordinal:
+            self._due_stale += 1
+            if self._due_stale > len(self._due) // 2:
+                self._due = None  # تُبنى من جديد عند الطلب التالي
+
+    def iter_due_entries(self):
+        """أزواج (التاريخ، المعرف) للمهام غير المنجزة ذات التاريخ دون تحويل قائمة لم تُفتح بعد."""
+        if self._pending is not None:
+            return ((date_ordinal(task['date']), task['id']) for task in self._pending if task['date'] and not task['completed'])
+        return ((node.date_ordinal, node.id) for node in self._nodes.values() if node.date_ordinal and not node.completed)
+
+    def _track_status(self, node):
+        """تحديث فهرس الحالة بعد إضافة العقدة أو تغير حالتها."""
+        if self._status is None:
+            return
+        tracked, members = self._status
+        if node.completed != tracked:
+            members.pop(node.id, None)
+            return
+        members[node.id] = node
+        if len(members) > 2 * (len(self._nodes) - len(members)) + 64:
+            self._status = None  # أصبحت الحالة الأخرى الأقل عددًا؛ يُبنى فهرسها عند الطلب التالي
+
+    def tasks_with_status(self, completed):
+        """المهام المنجزة أو غير المنجزة (الزمن يتناسب مع حجم النتيجة).
+
+        يُفهرس بالمعرف مهام الحالة الأقل عددًا فقط، بترتيب دخولها في الحالة؛ مهام الحالة
+        الأخرى تُؤخذ بالمرور على فهرس المعرفات بترتيب الإضافة، ويُعاد بناء الفهرس للحالة
+        الأخرى إذا أصبحت أقل من نصف الحالة المفهرسة.
+        """
+        if self._pending is not None:
+            self._load_pending()
+        count = self.stats.completed if completed else self.stats.total - self.stats.completed
+        if count == 0:
+            return ()
+        if count == len(self._nodes):
+            return self._nodes.values()
+        if self._status is None:
+            tracked = self.stats.completed <= self.stats.total - self.stats.completed
+            self._status = (tracked, {node.id: node for node in self._nodes.values() if node.completed == tracked})
+        tracked, members = self._status
+        if completed == tracked:
+            return members.values()
+        return (node for node in self._nodes.values() if node.id not in members)
+
+    def due_tasks(self, until):
+        """المهام غير المنجزة التي يحين تاريخها حتى اليوم until (رقم اليوم)، الأقدم أولًا.
+
+        يُمر على فروع الكومة التي لا يتجاوز جذرها until فقط، فالزمن يتناسب مع حجم النتيجة.
+        """
+        if self._pending is not None:
+            self._load_pending()
+        if self._due is None:
+            self._due = [(node.date_ordinal, node.id) for node in self._nodes.values()
+                         if node.date_ordinal and not node.completed]
+            heapq.heapify(self._due)
+            self._due_stale = 0
+        heap, nodes = self._due, self._nodes
+        due, seen, stack = [], set(), [0]
+        while stack:
+            position = stack.pop()
+            if position >= len(heap) or heap[position][0] > until:
+                continue
+            node = nodes.get(heap[position][1])
+            # مهمة أُعيدت غير منجزة أو نُقل تاريخها قد يكون لها أكثر من عنصر
+            if node and not node.completed and node.date_ordinal <= until and node.id not in seen:
+                seen.add(node.id)
+                due.append(node)
+            stack.extend((2 * position + 1, 2 * position + 2))
+        due.sort(key=lambda node: node.date_ordinal)
+        return due
+
+    # مفاتيح الفرز محسوبة مسبقًا في العقدة (أعداد صحيحة)
+    SORT_KEYS = {
+        "date": (lambda node: node.date_ordinal, False),
+        "priority": (lambda node: node.priority_code, True),
+        "alphabetical": (lambda node: node.description, False),
+    }
+
+    def sorted_view(self, order):
+        """عرض مرتب للمهام يُبنى عند أول طلب ويُعاد استخدامه حتى تتغير القائمة."""
+        if self._pending is not None:
+            self._load_pending()
+        view = self._sorted_views.get(order)
+        if view is None:
+            key, reverse = self.SORT_KEYS[order]
+            view = sorted(self._iter_linked(), key=key, reverse=reverse)
+            self._sorted_views[order] = view
+        return view
+
+    def _dated_between(self, date_from, date_to):
+        """المهام غير المتكررة بين يومين بترتيب التاريخ (بحث ثنائي في العرض المرتب حسب التاريخ)."""
+        view = self.sorted_view("date")
+        low, high = 0, len(view)
+        while low < high:
+            middle = (low + high) // 2
+            if view[middle].date_ordinal < date_from:
+                low = middle + 1
+            else:
+                high = middle
+        for position in range(low, len(view)):
+            node = view[position]
+            if date_to is not None and node.date_ordinal > date_to:
+                return
+            if node.recurrence is None:
+                yield node
+
+    def iter_occurrences(self, date_from, date_to=None):
+        """تكرارات المهام بين يومين بترتيب التاريخ كمولّد: (رقم اليوم، العقدة، منجز؟).
+
+        المهمة العادية تظهر مرة واحدة في تاريخها، والمتكررة تُولَّد تكراراتها داخل
+        النافذة فقط عند المرور عليها، فلا يتغير الزمن مهما طالت القاعدة.
+        """
+        if self._pending is not None:
+            self._load_pending()
+        singles = ((node.date_ordinal, node, node.completed) for node in self._dated_between(date_from, date_to))
+        streams = [node.occurrences(date_from, date_to) for node in self._recurring.values()]
+        return heapq.merge(singles, *streams, key=lambda occurrence: occurrence[0])
+
+    def occurrence_counts(self, date_from, date_to):
+        """(عدد التكرارات، المنجز منها) بين يومين؛ المهام المتكررة تُعد حسابيًا دون توليد تكراراتها."""
+        if self._pending is not None:
+            self._load_pending()
+        total = completed = 0
+        for node in self._dated_between(date_from, date_to):
+            total += 1
+            completed += node.completed
+        for node in self._recurring.values():
+            count, done = node.occurrence_counts(date_from, date_to)
+            total += count
+            completed += done
+        return total, completed
+
+    def sort_by_date(self):
+        """فرز المهام بناءً على التاريخ."""
+        self.sort_order = "date"
+
+    def sort_by_priority(self):
+        """فرز المهام بناءً على الأولوية."""
+        self.sort_order = "priority"
+
+    def sort_alphabetically(self):
+        """فرز المهام بناءً على الأبجدية."""
+        self.sort_order = "alphabetical"
+
+    def unsort(self):
+        """العودة إلى ترتيب الإضافة."""
+        self.sort_order = None
+
+
+# فهرس البحث (SearchIndex)
+class SearchIndex:
+    """فهرس مقاطع ثلاثية (trigrams) لأوصاف المهام يُحدّث عند الإضافة والحذف.
+
+    البحث يطابق أي جزء من الوصف، ويعيد جميع النتائج مرتبة حسب قوة التطابق.
+    إذا كان الاستعلام الجديد امتدادًا للسابق تُصفّى النتائج السابقة فقط.
+    """
+
+    GRAM = 3
+
+    def __init__(self):
+        self.descriptions = {}  # المعرف -> الوصف بأحرف صغيرة
+        self.grams = {}  # المقطع -> مجموعة المعرفات
+        self._last_query = None
+        self._last_results = None
+
+    def __len__(self):
+        return len(self.descriptions)
+
+    def _grams(self, text):
+        return {text[i:i + self.GRAM] for i in range(len(text) - self.GRAM + 1)}
+
+    def add(self, task_id, description):
+        """إضافة وصف مهمة إلى الفهرس."""
+        text = description.lower()
+        self.descriptions[task_id] = text
+        for gram in self._grams(text):
+            self.grams.setdefault(gram, set()).add(task_id)
+        self._last_query = None
+
+    def remove(self, task_id):
+        """حذف مهمة من الفهرس."""
+        text = self.descriptions.pop(task_id, None)
+        if text is None:
+            return
+        for gram in self._grams(text):
+            ids = self.grams.get(gram)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del self.grams[gram]
+        self._last_query = None
+
+    def search(self, query):
+        """جميع المهام التي يحتوي وصفها على الاستعلام، الأقوى تطابقًا أولًا."""
+        query = query.lower()
+        if not query:
+            return []
+        if self._last_query is not None and self._last_query in query:
+            candidates = self._last_results  # النتائج الجديدة جزء من السابقة
+        elif len(query) >= self.GRAM:
+            sets = sorted((self.grams.get(gram, ()) for gram in self._grams(query)), key=len)
+            candidates = set(sets[0]).intersection(*sets[1:])
+        else:
+            candidates = self.descriptions
+        descriptions = self.descriptions
+        matches = [task_id for task_id in candidates if query in descriptions[task_id]]
+        self._last_query, self._last_results = query, matches
+        return sorted(matches, key=lambda task_id: self._rank(query, descriptions[task_id]))
+
+    @staticmethod
+    def _rank(query, text):
+        """ترتيب التطابق: تطابق تام، ثم بداية الوصف، ثم بداية كلمة، ثم أي موضع."""
+        if text == query:
+            kind = 0
+        elif text.startswith(query):
+            kind = 1
+        elif (" " + query) in text:
+            kind = 2
+        else:
+            kind = 3
+        return kind, text.find(query), len(text)
+
+
+# جدولة مواعيد الاستحقاق (DueScheduler)
+class DueScheduler:
+    """كومة صغرى (التاريخ، المعرف) لمهام جميع القوائم الفرعية غير المنجزة.
+
+    كل فحص يُخرج من الكومة المهام التي حان موعدها فقط. عناصر المهام التي
+    أُنجزت أو حُذفت لا تُحذف فورًا، بل تُتجاهل عند خروجها.
+    """
+
+    def __init__(self, entries, find_task):
+        self.heap = [entry for entry in entries if entry[0]]
+        heapq.heapify(self.heap)
+        self.find_task = find_task  # المعرف -> العقدة (أو None إذا حُذفت)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, node):
+        if node.date_ordinal and not node.completed:
+            heapq.heappush(self.heap, (node.date_ordinal, node.id))
+
+    def extend(self, entries):
+        for entry in entries:
+            if entry[0]:
+                heapq.heappush(self.heap, entry)
+
+    def _live(self, entry):
+        node = self.find_task(entry[1])
+        if node and not node.completed and node.date_ordinal == entry[0]:
+            return node
+        return None
+
+    def pop_due(self, until):
+        """إخراج المهام غير المنجزة التي يحين تاريخها حتى اليوم until، الأقدم أولًا."""
+        due, seen = [], set()
+        while self.heap and self.heap[0][0] <= until:
+            node = self._live(heapq.heappop(self.heap))
+            if node and node.id not in seen:
+                seen.add(node.id)
+                due.append(node)
+        return due
+
+    def next_due(self):
+        """أقرب تاريخ استحقاق قادم (رقم اليوم) أو None."""
+        while self.heap:
+            if self._live(self.heap[0]):
+                return self.heap[0][0]
+            heapq.heappop(self.heap)
+        return None
+
+
+# استعلامات المهام (TaskQuery)
+@functools.total_ordering
+class _Descending:
+    """عكس ترتيب قيمة (للفرز التنازلي حسب النص داخل مفتاح مركب)."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+class TaskQuery:
+    """استعلام على المهام: شروط تصفية، مفاتيح فرز مركبة، وحد لعدد النتائج.
+
+    مثال: المهام عالية الأولوية غير المنجزة المستحقة خلال أسبوع في Projects،
+    مرتبة حسب التاريخ ثم الأولوية، أول 20 فقط:
+
+        TaskQuery(submenus=["Projects"], completed=False, priorities=["High"],
+                  date_to=today_ordinal() + 7, sort=["date", "priority"], limit=20)
+
+    مفاتيح الفرز من TaskList.SORT_KEYS باتجاهها المعتاد، والبادئة "-" تعكسه.
+    التواريخ نص YYYY-MM-DD أو رقم اليوم، والمهام بدون تاريخ لا تطابق شرط التاريخ.
+    """
+
+    def __init__(self, submenus=None, completed=None, priorities=None, date_from=None, date_to=None,
+                 text=None, sort=(), limit=None):
+        self.submenus = set(submenus) if submenus else None
+        self.completed = completed  # None = الكل
+        self.priorities = {priority_code(priority) for priority in priorities} if priorities else None
+        self.date_from = self._day(date_from)
+        self.date_to = self._day(date_to)
+        self.text = text.lower() if text else None
+        self.sort = []  # (الحقل، تنازلي؟)
+        for field in sort:
+            name = field.lstrip('-')
+            if name not in TaskList.SORT_KEYS:
+                raise ValueError(f"unknown sort key: {field}")
+            self.sort.append((name, TaskList.SORT_KEYS[name][1] != field.startswith('-')))
+        self.limit = limit
+
+    @staticmethod
+    def _day(value):
+        return date_ordinal(value) if isinstance(value, str) else value
+
+    def matches(self, node):
+        """هل تحقق المهمة جميع الشروط؟"""
+        if self.completed is not None and node.completed != self.completed:
+            return False
+        if self.priorities is not None and node.priority_code not in self.priorities:
+            return False
+        if self.date_from is not None or self.date_to is not None:
+            day = node.date_ordinal
+            if not day or (self.date_from is not None and day < self.date_from) or (self.date_to is not None and day > self.date_to):
+                return False
+        return self.text is None or self.text in node.description.lower()
+
+    def _count(self, bucket):
+        total, completed = bucket
+        if self.completed is None:
+            return total
+        return completed if self.completed else total - completed
+
+    def may_match(self, stats):
+        """هل قد تحتوي قائمة بهذه العدادات نتائج؟ (تغني عن قراءة ملف قائمة لا تطابق)"""
+        if not self._count((stats.total, stats.completed)):
+            return False
+        if self.priorities is not None and not any(self._count(stats.by_priority.get(code, (0, 0))) for code in self.priorities):
+            return False
+        if self.date_from is not None or self.date_to is not None:
+            first = TaskStats.month_of(self.date_from) or (0, 0)
+            last = TaskStats.month_of(self.date_to) or (9999, 12)
+            return any(month and first <= month <= last and self._count(bucket) for month, bucket in stats.by_month.items())
+        return True
+
+    def sort_key(self):
+        """دالة مفتاح الفرز المركب للعقد (None إذا لم يُطلب فرز)."""
+        if not self.sort:
+            return None
+        getters = []
+        for name, descending in self.sort:
+            getter = TaskList.SORT_KEYS[name][0]
+            if descending:
+                getter = (lambda get: lambda node: _Descending(get(node)))(getter)
+            getters.append(getter)
+        if len(getters) == 1:
+            return getters[0]
+        return lambda node: tuple(getter(node) for getter in getters)
+
+
+# مخزن المهام في SQLite (SQLiteTaskStore)
+class SQLiteTaskStore:
+    """تخزين اختياري للمهام في قاعدة SQLite بدل تحميلها كاملة في الذاكرة.
+
+    الجداول مفهرسة على (القائمة الفرعية، التاريخ) و(القائمة الفرعية، الأولوية)
+    وحالة الإكمال، لذلك يصبح الفرز وعرض المهام المنجزة استعلامات مفهرسة.
+    """
+
+    # أعمدة المهمة بترتيب row_to_node
+    COLUMNS = "id, description, priority, date, completed, repeat"
+
+    SORT_ORDERS = {
+        None: "rowid",
+        "date": "date, rowid",
+        "priority": "priority_rank DESC, rowid",
+        "alphabetical": "description, rowid",
+    }
+
+    def __init__(self, path='tasks.db'):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS submenus (
+                name TEXT PRIMARY KEY,
+                sort_order TEXT
+            );
+            CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                submenu TEXT NOT NULL,
+                description TEXT NOT NULL,
+                priority TEXT NOT NULL,
+                priority_rank INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                repeat TEXT NOT NULL DEFAULT ''
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_submenu ON tasks (submenu);
+            CREATE INDEX IF NOT EXISTS idx_tasks_submenu_date ON tasks (submenu, date);
+            CREATE INDEX IF NOT EXISTS idx_tasks_submenu_priority ON tasks (submenu, priority_rank);
+            CREATE INDEX IF NOT EXISTS idx_tasks_submenu_description ON tasks (submenu, description);
+            CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks (completed, submenu);
+        """)
+        if 'repeat' not in {row[1] for row in self.connection.execute("PRAGMA table_info(tasks)")}:
+            self.connection.execute("ALTER TABLE tasks ADD COLUMN repeat TEXT NOT NULL DEFAULT ''")  # قاعدة من إصدار سابق
+
+    def commit(self):
+        self.connection.commit()
+
+    def submenus(self):
+        """أسماء القوائم الفرعية دون تحميل مهامها."""
+        return [row[0] for row in self.connection.execute("SELECT name FROM submenus ORDER BY rowid")]
+
+    def task_list(self, submenu):
+        """الحصول على قائمة مهام مرتبطة بالقاعدة لقائمة فرعية."""
+        self.connection.execute("INSERT OR IGNORE INTO submenus (name) VALUES (?)", (submenu,))
+        return SQLiteTaskList(self, submenu)
+
+    def submenu_of(self, task_id):
+        """اسم القائمة الفرعية التي تحتوي المهمة."""
+        row = self.connection.execute("SELECT submenu FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return row[0] if row else None
+
+    def tasks_with_status(self, completed):
+        """جميع المهام المنجزة أو غير المنجزة عبر فهرس حالة الإكمال."""
+        rows = self.connection.execute(
+            f"SELECT {self.COLUMNS} FROM tasks WHERE completed = ? ORDER BY submenu, rowid",
+            (int(completed),))
+        return (self.row_to_node(row) for row in rows)
+
+    def due_tasks(self, until):
+        """المهام غير المنجزة التي يحين تاريخها حتى اليوم until، مرتبة حسب القائمة الفرعية."""
+        rows = self.connection.execute(
+            f"SELECT {self.COLUMNS} FROM tasks"
+            " WHERE completed = 0 AND date != '' AND date <= ? ORDER BY submenu, date, rowid",
+            (date_string(until),))
+        return (self.row_to_node(row) for row in rows)
+
+    def remove_submenu(self, submenu):
+        """حذف قائمة فرعية ومهامها."""
+        self.connection.execute("DELETE FROM tasks WHERE submenu = ?", (submenu,))
+        self.connection.execute("DELETE FROM submenus WHERE name = ?", (submenu,))
+
+    SORT_COLUMNS = {"date": "date", "priority": "priority_rank", "alphabetical": "description"}
+
+    def query(self, query):
+        """تنفيذ TaskQuery كاستعلام SQL واحد (فهارس الجداول، ORDER BY وLIMIT في القاعدة)."""
+        where, params = [], []
+        if query.submenus is not None:
+            where.append(f"submenu IN ({', '.join('?' * len(query.submenus))})")
+            params.extend(query.submenus)
+        if query.completed is not None:
+            where.append("completed = ?")
+            params.append(int(query.completed))
+        if query.priorities is not None:
+            where.append(f"priority_rank IN ({', '.join('?' * len(query.priorities))})")
+            params.extend(query.priorities)
+        if query.date_from is not None or query.date_to is not None:
+            where.append("date != ''")
+        if query.date_from is not None:
+            where.append("date >= ?")
+            params.append(date_string(query.date_from))
+        if query.date_to is not None:
+            where.append("date <= ?")
+            params.append(date_string(query.date_to))
+        if query.text is not None:
+            where.append("lower(description) LIKE ? ESCAPE '\\'")
+            params.append('%' + query.text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        sql = f"SELECT submenu, {self.COLUMNS} FROM tasks"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        order = [self.SORT_COLUMNS[name] + (" DESC" if descending else "") for name, descending in query.sort]
+        sql += " ORDER BY " + ", ".join(order + ["rowid"] if order else ["submenu", "rowid"])
+        if query.limit is not None:
+            sql += " LIMIT ?"
+            params.append(query.limit)
+        return [(row[0], self.row_to_node(row[1:])) for row in self.connection.execute(sql, params)]
+
+    def reset(self):
+        self.connection.execute("DELETE FROM tasks")
+        self.connection.execute("DELETE FROM submenus")
+
+    @staticmethod
+    def row_to_node(row):
+        return TaskNode(row[1], row[2], row[3], bool(row[4]), task_id=row[0], repeat=row[5])
+
+
+class SQLiteTaskIndex:
+    """بديل لفهرس (معرف المهمة -> القائمة الفرعية) يستعلم من القاعدة مباشرة."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __contains__(self, task_id):
+        return self.store.submenu_of(task_id) is not None
+
+    def __setitem__(self, task_id, submenu):
+        pass  # القائمة الفرعية محفوظة مع المهمة نفسها
+
+    def get(self, task_id, default=None):
+        submenu = self.store.submenu_of(task_id)
+        return default if submenu is None else submenu
+
+    def pop(self, task_id, default=None):
+        return self.get(task_id, default)
+
+
+class SQLiteTaskList:
+    """قائمة مهام بنفس واجهة TaskList لكن بياناتها في SQLite."""
+
+    def __init__(self, store, submenu):
+        self.store = store
+        self.submenu = submenu
+        self._stats = None  # عدادات محسوبة عند أول طلب ثم تُحدَّث مع كل تعديل
+
+    def _execute(self, sql, params=()):
+        return self.store.connection.execute(sql, params)
+
+    def _order_by(self):
+        return SQLiteTaskStore.SORT_ORDERS[self.sort_order]
+
+    def __len__(self):
+        return self._execute("SELECT COUNT(*) FROM tasks WHERE submenu = ?", (self.submenu,)).fetchone()[0]
+
+    def __iter__(self):
+        rows = self._execute(
+            f"SELECT {SQLiteTaskStore.COLUMNS} FROM tasks WHERE submenu = ? ORDER BY " + self._order_by(),
+            (self.submenu,))
+        return (SQLiteTaskStore.row_to_node(row) for row in rows)
+
+    def add_task(self, description, priority, date, completed=False, task_id=None, before=None, repeat=None):
+        """إضافة مهمة جديدة إلى القائمة (الموضع حسب ترتيب الإدراج في القاعدة، فلا يُستخدم before)."""
+        node = TaskNode(description, priority, date, completed, task_id=task_id, repeat=repeat)
+        self._execute(
+            "INSERT INTO tasks (id, submenu, description, priority, priority_rank, date, completed, repeat)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (node.id, self.submenu, description, node.priority, node.priority_code, node.date, int(completed), node.repeat))
+        if self._stats is not None:
+            self._stats.add(node.priority_code, node.date_ordinal, node.completed)
+        return node
+
+    def get_task(self, task_id):
+        """الحصول على المهمة بواسطة المعرف."""
+        row = self._execute(
+            f"SELECT {SQLiteTaskStore.COLUMNS} FROM tasks WHERE id = ? AND submenu = ?",
+            (task_id, self.submenu)).fetchone()
+        return SQLiteTaskStore.row_to_node(row) if row else None
+
+    def get_all_tasks(self):
+        """الحصول على جميع المهام في القائمة."""
+        return [(node.description, node.priority, node.date, node.completed) for node in self]
+
+    def to_records(self):
+        """المهام بصيغة ملف JSON (للتصدير)."""
+        return [node.to_record() for node in self]
+
+    @property
+    def stats(self):
+        """عدادات القائمة الفرعية: تُحسب في SQLite مرة واحدة ثم تُحدَّث مع كل تعديل كما في TaskList."""
+        if self._stats is None:
+            self._stats = self._count_stats()
+        return self._stats
+
+    def _count_stats(self):
+        """العدادات من القاعدة عبر فهرس (القائمة الفرعية، الأولوية)."""
+        stats = TaskStats()
+        rows = self._execute(
+            "SELECT priority_rank, substr(date, 1, 7), COUNT(*), SUM(completed) FROM tasks WHERE submenu = ? GROUP BY 1, 2",
+            (self.submenu,))
+        for code, month, total, completed in rows:
+            other = TaskStats()
+            other.total, other.completed = total, completed
+            other.by_priority[code] = [total, completed]
+            other.by_month[tuple(map(int, month.split('-'))) if month else None] = [total, completed]
+            stats.merge(other)
+        return stats
+
+    def iter_descriptions(self):
+        """أزواج (المعرف، الوصف) للقائمة الفرعية."""
+        return self._execute("SELECT id, description FROM tasks WHERE submenu = ?", (self.submenu,))
+
+    def _first_id_by_description(self, description):
+        row = self._execute(
+            "SELECT id FROM tasks WHERE submenu = ? AND description = ? ORDER BY " + self._order_by() + " LIMIT 1",
+            (self.submenu, description)).fetchone()
+        return row[0] if row else None
+
+    def find_by_description(self, description):
+        """الحصول على أول مهمة تطابق الوصف."""
+        task_id = self._first_id_by_description(description)
+        return self.get_task(task_id) if task_id else None
+
+    def mark_task_as_done(self, description):
+        """تحديد المهمة كمكتملة بناءً على الوصف."""
+        task_id = self._first_id_by_description(description)
+        return self.mark_task_as_done_by_id(task_id) if task_id else None
+
+    def mark_task_as_done_by_id(self, task_id):
+        """تحديد المهمة كمكتملة بناءً على المعرف."""
+        node = self.get_task(task_id)
+        if node and not node.completed:
+            self._execute("UPDATE tasks SET completed = 1 WHERE id = ?", (task_id,))
+            node.completed = True
+            if self._stats is not None:
+                self._stats.complete(node.priority_code, node.date_ordinal)
+        return node
+
+    def mark_task_as_undone_by_id(self, task_id):
+        """إلغاء إكمال المهمة بناءً على المعرف (للتراجع)."""
+        node = self.get_task(task_id)
+        if node and node.completed:
+            self._execute("UPDATE tasks SET completed = 0 WHERE id = ?", (task_id,))
+            node.completed = False
+            if self._stats is not None:
+                self._stats.uncomplete(node.priority_code, node.date_ordinal)
+        return node
+
+    def delete_task(self, description):
+        """حذف مهمة بناءً على الوصف."""
+        task_id = self._first_id_by_description(description)
+        return self.delete_task_by_id(task_id) if task_id else None
+
+    def reschedule_task_by_id(self, task_id, date):
+        """نقل المهمة إلى تاريخ آخر (التكرار التالي لمهمة متكررة، أو تكرار سابق عند التراجع)."""
+        node = self.get_task(task_id)
+        ordinal = date_ordinal(date)
+        if node and node.date_ordinal != ordinal:
+            self._execute("UPDATE tasks SET date = ? WHERE id = ?", (date_string(ordinal), task_id))
+            if self._stats is not None:
+                self._stats.remove(node.priority_code, node.date_ordinal, node.completed)
+                self._stats.add(node.priority_code, ordinal, node.completed)
+            node.date_ordinal = ordinal
+        return node
+
+    def _dated_between(self, date_from, date_to):
+        rows = self._execute(
+            f"SELECT {SQLiteTaskStore.COLUMNS} FROM tasks WHERE submenu = ? AND repeat = '' AND date >= ? AND date <= ?"
+            " ORDER BY date, rowid", (self.submenu, date_string(date_from), date_string(date_to) if date_to else '9999-12-31'))
+        return (SQLiteTaskStore.row_to_node(row) for row in rows)
+
+    def _recurring(self):
+        rows = self._execute(f"SELECT {SQLiteTaskStore.COLUMNS} FROM tasks WHERE submenu = ? AND repeat != ''", (self.submenu,))
+        return [SQLiteTaskStore.row_to_node(row) for row in rows]
+
+    def iter_occurrences(self, date_from, date_to=None):
+        """تكرارات المهام بين يومين بترتيب التاريخ (المهام العادية عبر فهرس التاريخ)."""
+        singles = ((node.date_ordinal, node, node.completed) for node in self._dated_between(date_from, date_to))
+        streams = [node.occurrences(date_from, date_to) for node in self._recurring()]
+        return heapq.merge(singles, *streams, key=lambda occurrence: occurrence[0])
+
+    def occurrence_counts(self, date_from, date_to):
+        """(عدد التكرارات، المنجز منها) بين يومين؛ المهام العادية تُعد في SQLite."""
+        total, completed = self._execute(
+            "SELECT COUNT(*), COALESCE(SUM(completed), 0) FROM tasks WHERE submenu = ? AND repeat = '' AND date >= ? AND date <= ?",
+            (self.submenu, date_string(date_from), date_string(date_to))).fetchone()
+        for node in self._recurring():
+            count, done = node.occurrence_counts(date_from, date_to)
+            total += count
+            completed += done
+        return total, completed
+
+    def delete_task_by_id(self, task_id):
+        """حذف مهمة بناءً على المعرف."""
+        node = self.get_task(task_id)
+        if node:
+            self._execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            if self._stats is not None:
+                self._stats.remove(node.priority_code, node.date_ordinal, node.completed)
+        return node
+
+    @property
+    def sort_order(self):
+        row = self._execute("SELECT sort_order FROM submenus WHERE name = ?", (self.submenu,)).fetchone()
+        return row[0] if row else None
+
+    def _set_sort_order(self, order):
+        self._execute("UPDATE submenus SET sort_order = ? WHERE name = ?", (order, self.submenu))
+
+    def sort_by_date(self):
+        """فرز المهام بناءً على التاريخ (عبر الفهرس)."""
+        self._set_sort_order("date")
+
+    def sort_by_priority(self):
+        """فرز المهام بناءً على الأولوية (عبر الفهرس)."""
+        self._set_sort_order("priority")
+
+    def sort_alphabetically(self):
+        """فرز المهام بناءً على الأبجدية."""
+        self._set_sort_order("alphabetical")
+
+    def unsort(self):
+        """العودة إلى ترتيب الإضافة."""
+        self._set_sort_order(None)
+
+
+# قفل ملف بين عدة نسخ من البرنامج (FileLock)
+class FileLock:
+    """قفل استشاري على ملف (fcntl.flock، أو msvcrt.locking على ويندوز) بين العمليات.
+
+    الخيوط داخل العملية الواحدة تتناوب على القفل عبر threading.Lock لأن
+    قفل الملف نفسه مشترك بين خيوط العملية.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a+b')
+        self._threads = threading.Lock()
+
+    def acquire(self, shared=False):
+        self._threads.acquire()
+        try:
+            self._lock_file(shared)
+        except BaseException:
+            self._threads.release()  # وإلا بقيت الخيوط الأخرى تنتظر قفلًا لن يُحرر
+            raise
+
+    def _lock_file(self, shared):
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            return
+        self._file.seek(0)
+        while True:  # msvcrt لا يدعم القفل المشترك، وLK_LOCK يستسلم بعد عشر ثوانٍ
+            try:
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def release(self):
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._threads.release()
+
+    @contextlib.contextmanager
+    def locked(self, shared=False):
+        self.acquire(shared)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def close(self):
+        self._file.close()
+
+
+# لقطة ثنائية (BinarySnapshot)
+class BinarySnapshot:
+    """لقطة ثنائية مدمجة لجميع القوائم الفرعية تُقرأ عبر mmap.
+
+    الملف: MAGIC، ثم كتلة لكل قائمة فرعية، ثم فهرس JSON صغير (مدخلات الملف الوصفي
+    وموضع كل كتلة وطولها)، ثم موضع الفهرس وطوله وMAGIC. الكتلة مستقلة بذاتها:
+    جدول نصوص (كل معرف ووصف مرة واحدة) ثم سجلات بطول ثابت تشير إليه، ثم أزواج
+    (رقم السجل، قاعدة التكرار في جدول النصوص) للمهام المتكررة فقط. فتح قائمة
+    فرعية يفك كتلتها فقط، والضغط ينسخ كتل القوائم التي لم تتغير كما هي.
+    """
+
+    MAGIC = b'TODOBIN1'
+    TRAILER = struct.Struct('<QI8s')  # موضع الفهرس، طوله، MAGIC
+    COUNT = struct.Struct('<I')
+    RECORD = struct.Struct('<IIIBB')  # المعرف، الوصف (في جدول النصوص)، رقم اليوم، رمز الأولوية، الإكمال
+    REPEAT = struct.Struct('<II')  # رقم السجل، قاعدة التكرار (في جدول النصوص)
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            offset, length, magic = self.TRAILER.unpack_from(self._map, len(self._map) - self.TRAILER.size)
+            if self._map[:len(self.MAGIC)] != self.MAGIC or magic != self.MAGIC:
+                raise ValueError(f"{path}: not a binary task snapshot")
+        except (ValueError, struct.error):
+            self.close()
+            raise ValueError(f"{path}: not a binary task snapshot")
+        self.index = json.loads(self._map[offset:offset + length].decode('utf-8'))
+        self.blocks = self.index.pop('blocks')  # اسم الكتلة -> [الموضع، الطول]
+
+    def raw_block(self, name):
+        """بايتات كتلة كما هي (لنسخها إلى لقطة جديدة دون فكها)."""
+        offset, length = self.blocks[name]
+        return self._map[offset:offset + length]
+
+    def read_block(self, name):
+        """سجلات قائمة فرعية واحدة بصيغة ملف JSON."""
+        if name not in self.blocks:
+            return []
+        return self.decode_block(self.raw_block(name))
+
+    @classmethod
+    def encode_block(cls, records):
+        strings, table, rows = [], {}, []
+
+        def ref(text):
+            position = table.get(text)
+            if position is None:
+                position = table[text] = len(strings)
+                strings.append(text)
+            return position
+
+        repeats = []
+        for position, task in enumerate(records):
+            rows.append(cls.RECORD.pack(ref(task['id']), ref(task['description']), date_ordinal(task['date']),
+                                        priority_code(task['priority']), bool(task['completed'])))
+            if task.get('repeat'):
+                repeats.append(cls.REPEAT.pack(position, ref(task['repeat'])))
+        offsets = [0]
+        for text in strings:
+            offsets.append(offsets[-1] + len(text))  # مواضع بالأحرف بعد فك جدول النصوص مرة واحدة
+        return b''.join([cls.COUNT.pack(len(strings)), struct.pack(f'<{len(offsets)}I', *offsets),
+                         cls.COUNT.pack(len(''.join(strings).encode('utf-8'))), ''.join(strings).encode('utf-8'),
+                         cls.COUNT.pack(len(rows))] + rows + [cls.COUNT.pack(len(repeats))] + repeats)
+
+    @classmethod
+    def decode_block(cls, data):
+        count, = cls.COUNT.unpack_from(data, 0)
+        offsets = struct.unpack_from(f'<{count + 1}I', data, cls.COUNT.size)
+        position = cls.COUNT.size * (count + 2)
+        size, = cls.COUNT.unpack_from(data, position)
+        position += cls.COUNT.size
+        text = data[position:position + size].decode('utf-8')
+        strings = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+        position += size
+        rows, = cls.COUNT.unpack_from(data, position)
+        position += cls.COUNT.size
+        names = PRIORITY_NAMES
+        dates = {}  # رقم اليوم -> نص التاريخ (التواريخ تتكرر كثيرًا)
+        records = []
+        for task_id, description, ordinal, priority, completed in cls.RECORD.iter_unpack(data[position:position + rows * cls.RECORD.size]):
+            date = dates.get(ordinal)
+            if date is None:
+                date = dates[ordinal] = date_string(ordinal)
+            records.append({'id': strings[task_id], 'description': strings[description], 'priority': names[priority],
+                            'date': date, 'completed': completed == 1})
+        position += rows * cls.RECORD.size
+        if position < len(data):  # كتل الإصدارات السابقة تنتهي بعد السجلات
+            repeats, = cls.COUNT.unpack_from(data, position)
+            position += cls.COUNT.size
+            for row, spec in cls.REPEAT.iter_unpack(data[position:position + repeats * cls.REPEAT.size]):
+                records[row]['repeat'] = strings[spec]
+        return records
+
+    @classmethod
+    def write(cls, path, index, blocks):
+        """كتابة لقطة جديدة (ملف مؤقت ثم إعادة تسمية). blocks: اسم الكتلة -> بايتاتها."""
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(cls.MAGIC)
+            position = len(cls.MAGIC)
+            table = {}
+            for name, block in blocks.items():
+                file.write(block)
+                table[name] = [position, len(block)]
+                position += len(block)
+            data = json.dumps(dict(index, blocks=table), ensure_ascii=False).encode('utf-8')
+            file.write(data)
+            file.write(cls.TRAILER.pack(position, len(data), cls.MAGIC))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+
+    def close(self):
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+# سجل العمليات (TaskJournal)
+class TaskJournal:
+    """سجل عمليات للإضافة فقط بجانب لقطة مجزأة حسب القوائم الفرعية.
+
+    كل عملية (إضافة، إكمال، حذف، فرز...) تُكتب كسطر JSON وتُثبّت على القرص،
+    ويُعاد تشغيل السجل عند التحميل ثم يُضغط. اللقطة ملف لكل قائمة فرعية في
+    المجلد tasks.shards وملف وصفي صغير tasks.manifest.json، والضغط يعيد كتابة
+    ملفات القوائم التي تغيرت فقط. الكتابة الفعلية تتم في خيط PersistenceWorker.
+
+    في الوضع المشترك (shared) تكتب عدة نسخ من البرنامج في السجل نفسه تحت قفل
+    tasks.lock، وكل نسخة تقرأ ما أضافته النسخ الأخرى من آخر موضع قرأته (offset).
+
+    إذا انتهى snapshot_path بـ .bin تكون اللقطة ملفًا ثنائيًا واحدًا (BinarySnapshot)
+    يحل محل الملف الوصفي وملفات القوائم.
+    """
+
+    MANIFEST_VERSION = 1
+
+    def __init__(self, snapshot_path='tasks.json', log_path='tasks.log', compact_threshold=1000, shared=False):
+        base = os.path.splitext(snapshot_path)[0]
+        self.binary = snapshot_path.endswith('.bin')
+        # لقطة الملف الواحد القديمة (تُقرأ مرة واحدة للتحويل)؛ لا توجد في الوضع الثنائي،
+        # والتحويل من JSON إلى .bin يتم عبر convert_snapshot دون لمس الملف المصدر
+        self.snapshot_path = None if self.binary else snapshot_path
+        self.manifest_path = snapshot_path if self.binary else base + '.manifest.json'
+        self.shard_dir = base + '.shards'
+        self._binary = None  # اللقطة الثنائية المفتوحة (mmap)
+        self._binary_lock = threading.Lock()  # خيط الحفظ يستبدل الملف بينما يقرأ الخيط الرئيسي منه
+        if self.binary:
+            base = snapshot_path
+        self.log_path = log_path
+        self.compacting_path = log_path + '.compacting'
+        self.compact_threshold = compact_threshold
+        self.pending = 0  # عدد العمليات منذ آخر ضغط
+        self.shared = shared
+        self.lock = FileLock(base + '.lock') if shared else None
+        self.instance = uuid.uuid4().hex  # يميز عمليات هذه النسخة في السجل المشترك
+        self.offset = 0  # عدد بايتات السجل التي قُرئت
+        # (حالة الملفات قبل أول كتابة، وبعد آخر كتابة) لكتابات هذه النسخة المتتالية في السجل المشترك
+        self.own_writes = None
+        self._file = None
+
+    def locked(self, shared=False):
+        """قفل الملفات في الوضع المشترك (لا شيء في الوضع العادي)."""
+        return self.lock.locked(shared) if self.shared else contextlib.nullcontext()
+
+    def signature(self):
+        """(وقت التعديل، الحجم) للملف الوصفي والسجل؛ تتغير مع أي كتابة من أي نسخة."""
+        result = []
+        for path in (self.manifest_path, self.log_path):
+            try:
+                stat = os.stat(path)
+                result.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                result.append(None)
+        return tuple(result)
+
+    def read_manifest(self):
+        """محتوى الملف الوصفي {'generation', 'submenus'} (None إذا لم يوجد)."""
+        if self.binary:
+            with self._binary_lock:
+                self._close_binary()
+                snapshot = self._open_binary()
+                return dict(snapshot.index) if snapshot else None
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def _open_binary(self):
+        if self._binary is None:
+            try:
+                self._binary = BinarySnapshot(self.manifest_path)
+            except FileNotFoundError:
+                return None
+        return self._binary
+
+    def _close_binary(self):
+        if self._binary is not None:
+            self._binary.close()
+            self._binary = None
+
+    def read_shard(self, file_name):
+        """قراءة مهام قائمة فرعية واحدة من ملفها (أو من كتلتها في اللقطة الثنائية)."""
+        if self.binary:
+            with self._binary_lock:
+                snapshot = self._open_binary()
+                return snapshot.read_block(file_name) if snapshot else []
+        try:
+            with open(os.path.join(self.shard_dir, file_name), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return []
+
+    def iter_snapshot(self):
+        """قراءة لقطة الملف الواحد القديمة قائمة فرعية تلو الأخرى."""
+        if self.snapshot_path is None:
+            return
+        try:
+            for submenu, records in iter_json_submenus(self.snapshot_path):
+                for task in records:
+                    if 'id' not in task:
+                        task['id'] = uuid.uuid4().hex  # ملفات قديمة بدون معرفات
+                yield submenu, records
+        except FileNotFoundError:
+            return
+
+    @staticmethod
+    def _parse(data):
+        """العمليات في الأسطر المكتملة، وعدد البايتات حتى آخر سطر مكتمل."""
+        end = data.rfind(b'\n') + 1
+        ops = []
+        for line in data[:end].splitlines():
+            try:
+                ops.append(json.loads(line))
+            except ValueError:
+                continue  # سطر تالف بسبب توقف مفاجئ أثناء الكتابة
+        return ops, end
+
+    def read_log(self, offset):
+        """العمليات المكتوبة في السجل بعد الموضع offset والموضع الجديد."""
+        try:
+            with open(self.log_path, 'rb') as file:
+                file.seek(offset)
+                data = file.read()
+        except FileNotFoundError:
+            return [], 0
+        ops, consumed = self._parse(data)
+        return ops, offset + consumed
+
+    def replay(self):
+        """إرجاع العمليات المسجلة بعد اللقطة بالترتيب."""
+        ops = []
+        with self.locked(shared=True):
+            try:
+                with open(self.compacting_path, 'rb') as file:
+                    ops.extend(self._parse(file.read() + b'\n')[0])
+            except FileNotFoundError:
+                pass
+            log_ops, self.offset = self.read_log(0)
+        ops.extend(log_ops)
+        for op in ops:
+            self.pending += self.weight(op)
+            yield op
+
+    def append(self, op):
+        """إضافة عملية إلى السجل وتثبيتها على القرص."""
+        self.append_many([op])
+
+    def append_many(self, ops):
+        """كتابة عدة عمليات دفعة واحدة مع تثبيت واحد على القرص."""
+        if self.shared:
+            # السجل قد يُستبدل بضغط من نسخة أخرى، لذلك يُفتح مع كل كتابة تحت القفل
+            data = ''.join(json.dumps(dict(op, origin=self.instance), ensure_ascii=False) + '\n' for op in ops)
+            with self.lock.locked():
+                before = self.signature()
+                with open(self.log_path, 'ab') as file:
+                    file.write(data.encode('utf-8'))
+                    file.flush()
+                    os.fsync(file.fileno())
+                # تحت القفل نفسه، فلا كتابة من نسخة أخرى بين الحالتين
+                own = self.own_writes
+                self.own_writes = (own[0] if own and own[1] == before else before, self.signature())
+            return
+        if self._file is None:
+            self._file = open(self.log_path, 'a', encoding='utf-8')
+        self._file.write(''.join(json.dumps(op, ensure_ascii=False) + '\n' for op in ops))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    @staticmethod
+    def weight(op):
+        """عدد المهام التي تمثلها العملية (لحساب موعد الضغط)."""
+        return len(op['tasks']) if op.get('op') == 'add_batch' else 1
+
+    def should_compact(self):
+        """هل تجاوز السجل الحد المسموح به؟"""
+        return self.pending >= self.compact_threshold
+
+    def _write_snapshot(self, update):
+        """كتابة ملفات القوائم المتغيرة ثم الملف الوصفي (ملف مؤقت ثم إعادة تسمية)."""
+        if self.binary:
+            self._write_binary(update)
+            return
+        os.makedirs(self.shard_dir, exist_ok=True)
+        for file_name, records in update['shards'].items():
+            write_json_atomic(os.path.join(self.shard_dir, file_name), records)
+        write_json_atomic(self.manifest_path, {'version': self.MANIFEST_VERSION, 'generation': update['new_generation'],
+                                               'submenus': update['submenus']})
+        # ملفات القوائم المحذوفة (بعد إعادة الضبط) لم تعد في الملف الوصفي
+        live = {entry['file'] for entry in update['submenus']}
+        for file_name in os.listdir(self.shard_dir):
+            if file_name.endswith('.json') and file_name not in live:
+                os.remove(os.path.join(self.shard_dir, file_name))
+        if os.path.exists(self.snapshot_path):
+            os.replace(self.snapshot_path, self.snapshot_path + '.bak')  # تحويل اللقطة القديمة اكتمل
+
+    def _write_binary(self, update):
+        """لقطة ثنائية جديدة: كتل القوائم المتغيرة تُرمّز، وغيرها يُنسخ من اللقطة الحالية."""
+        with self._binary_lock:
+            current = self._open_binary()
+            blocks = {}
+            for entry in update['submenus']:
+                name = entry['file']
+                if name in update['shards']:
+                    blocks[name] = BinarySnapshot.encode_block(update['shards'][name])
+                elif current is not None and name in current.blocks:
+                    blocks[name] = current.raw_block(name)
+                else:
+                    blocks[name] = BinarySnapshot.encode_block([])
+            self._close_binary()
+            BinarySnapshot.write(self.manifest_path, {'version': self.MANIFEST_VERSION, 'generation': update['new_generation'],
+                                                      'submenus': update['submenus']}, blocks)
+
+    def compact(self, update):
+        """كتابة ملفات القوائم المتغيرة والملف الوصفي ثم التخلص من السجل القديم.
+
+        update = {'submenus': مدخلات الملف الوصفي, 'shards': {اسم الملف: المهام},
+                  'generation': الضغط الذي بُنيت عليه البيانات, 'new_generation', 'offset'}.
+        جميع العمليات قابلة لإعادة التطبيق دون أثر مكرر (بالاعتماد على المعرفات)،
+        لذلك يبقى التحميل صحيحًا إذا توقف البرنامج في أي مرحلة من الضغط.
+        """
+        if self.shared:
+            self._compact_shared(update)
+            return
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.compacting_path) and os.path.exists(self.log_path):
+            # بقايا ضغط سابق لم يكتمل: ندمج السجل الحالي معه بدل استبداله
+            with open(self.log_path, 'r', encoding='utf-8') as src, open(self.compacting_path, 'a', encoding='utf-8') as dst:
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(self.log_path)
+        elif os.path.exists(self.log_path):
+            os.replace(self.log_path, self.compacting_path)
+        self._write_snapshot(update)
+        if os.path.exists(self.compacting_path):
+            os.remove(self.compacting_path)
+
+    def _compact_shared(self, update):
+        """الضغط في الوضع المشترك: تُحذف من السجل العمليات حتى update['offset'] فقط.
+
+        العمليات بعد هذا الموضع (من نسخ أخرى لم تُقرأ بعد) تبقى في السجل الجديد.
+        إذا سبقتنا نسخة أخرى بضغط (تغير generation) يُلغى الضغط.
+        """
+        with self.lock.locked():
+            self.own_writes = None  # بعد الضغط يُعاد فحص الملف الوصفي والسجل كاملين
+            manifest = self.read_manifest()
+            if (manifest or {}).get('generation') != update['generation']:
+                return
+            with open(self.log_path, 'a+b') as file:
+                file.seek(update['offset'])
+                tail = file.read()
+            self._write_snapshot(update)
+            temp_path = self.log_path + '.tmp'
+            with open(temp_path, 'wb') as file:
+                file.write(tail)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.log_path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        with self._binary_lock:
+            self._close_binary()
+        if self.lock is not None:
+            self.lock.close()
+
+
+def write_json_atomic(path, data):
+    """كتابة ملف JSON في ملف مؤقت ثم استبداله، فلا يبقى الملف مقطوعًا عند توقف مفاجئ."""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False, indent=4)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+# خيط الحفظ (PersistenceWorker)
+class PersistenceWorker:
+    """خيط واحد يكتب على القرص بالترتيب حتى لا تنتظر الواجهة عمليات القرص.
+
+    العمليات المتراكمة في الطابور تُكتب معًا بتثبيت واحد، وطلبات الضغط
+    المتتالية تُدمج في كتابة واحدة لآخر لقطة.
+    """
+
+    def __init__(self, journal):
+        self.journal = journal
+        self.queue = queue.Queue()
+        self.error = None  # آخر خطأ كتابة لم تعرضه الواجهة بعد (انظر take_error)
+        self._closed = False
+        self.thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self.thread.start()
+
+    def append(self, op):
+        """(من أي خيط) جدولة كتابة عملية في السجل."""
+        self.journal.pending += self.journal.weight(op)
+        self.queue.put(('append', op))
+
+    def compact(self, data):
+        """(من أي خيط) جدولة كتابة لقطة جديدة."""
+        self.journal.pending = 0
+        self.queue.put(('compact', data))
+
+    def flush(self):
+        """انتظار كتابة كل ما في الطابور."""
+        done = threading.Event()
+        self.queue.put(('flush', done))
+        done.wait()
+
+    def take_error(self):
+        """(من أي خيط) آخر خطأ كتابة منذ الاستدعاء السابق، أو None."""
+        error, self.error = self.error, None
+        return error
+
+    def close(self):
+        """كتابة ما تبقى ثم إيقاف الخيط (عند إغلاق النافذة)."""
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put(('stop', None))
+        self.thread.join()
+
+    def _drain(self):
+        items = [self.queue.get()]
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _run(self):
+        while True:
+            items = self._drain()
+            # آخر طلب ضغط في الدفعة يغني عما قبله (بياناته تشمل كل ما سبقه)
+            last_compact = max((i for i, (kind, _) in enumerate(items) if kind == 'compact'), default=-1)
+            ops = []
+            stop = False
+            try:
+                for position, (kind, payload) in enumerate(items):
+                    if kind == 'append':
+                        ops.append(payload)
+                    elif kind == 'compact' and position == last_compact:
+                        self._write(ops)
+                        ops = []
+                        self._guard(self.journal.compact, payload)
+                    elif kind == 'stop':
+                        stop = True
+                self._write(ops)
+            finally:
+                # من ينتظر flush لا يبقى معلقًا مهما حدث أثناء الكتابة
+                for kind, payload in items:
+                    if kind == 'flush':
+                        payload.set()
+            if stop:
+                self.journal.close()
+                return
+
+    def _write(self, ops):
+        if ops:
+            self._guard(self.journal.append_many, ops)
+
+    def _guard(self, action, payload):
+        try:
+            action(payload)
+        except Exception as error:
+            # خطأ قرص أو لقطة تالفة لا يوقف الخيط؛ العمليات التالية تُكتب كالمعتاد
+            traceback.print_exc()
+            self.error = error
+
+
+# عدد المهام في كل دفعة عند الاستيراد الجماعي (حفظ واحد لكل دفعة)
+IMPORT_BATCH_SIZE = 10000
+
+# أقصى عدد من الإجراءات المحفوظة للتراجع
+HISTORY_LIMIT = 500
+
+# أعمدة ملفات CSV / JSON Lines للاستيراد والتصدير
+TASK_FIELDS = ('id', 'submenu', 'description', 'priority', 'date', 'completed', 'repeat')
+
+
+def _parse_completed(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'done')
+
+
+def _normalize_task(task, line):
+    """التحقق من صف مستورد وتوحيد قيمه؛ الصف غير الصالح يرفع ValueError برقم سطره.
+
+    يُتحقق من الصف قبل إضافته، فلا يتوقف الاستيراد في منتصف إضافة مهمة.
+    """
+    if not all(isinstance(task.get(field), str) and task[field] for field in ('submenu', 'description')):
+        raise ValueError(f"line {line}: submenu and description are required")
+    priority = task.get('priority') or ''
+    if priority and (not isinstance(priority, str) or priority not in PRIORITY_ORDER):
+        raise ValueError(f"line {line}: invalid priority: {priority}")
+    try:
+        day = date_ordinal(task.get('date') or '')
+    except (TypeError, ValueError):
+        raise ValueError(f"line {line}: invalid date (expected YYYY-MM-DD): {task.get('date')}") from None
+    repeat = task.get('repeat') or None
+    if repeat:
+        try:
+            repeat = str(Recurrence.parse(str(repeat)))
+        except (TypeError, ValueError):
+            raise ValueError(f"line {line}: invalid repeat rule: {repeat}") from None
+    return {
+        'id': task.get('id') or None,
+        'submenu': task['submenu'],
+        'description': task['description'],
+        'priority': priority,
+        'date': date_string(day),
+        'completed': _parse_completed(task.get('completed', False)),
+        'repeat': repeat,
+    }
+
+
+def read_tasks_csv(file):
+    """قراءة المهام من ملف CSV (سطر رأس بأسماء الأعمدة) كمولّد."""
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield _normalize_task(row, reader.line_num)
+
+
+def read_tasks_jsonl(file):
+    """قراءة المهام من ملف JSON Lines (كائن JSON في كل سطر) كمولّد."""
+    for number, line in enumerate(file, 1):
+        if line.strip():
+            try:
+                task = json.loads(line)
+            except json.JSONDecodeError as error:
+                raise ValueError(f"line {number}: {error}") from None
+            if not isinstance(task, dict):
+                raise ValueError(f"line {number}: expected a JSON object")
+            yield _normalize_task(task, number)
+
+
+def task_reader_for(path):
+    """اختيار قارئ المهام حسب امتداد الملف أو اسم الصيغة (csv أو JSON Lines)."""
+    return read_tasks_csv if path.lower().endswith('csv') else read_tasks_jsonl
+
+
+def write_tasks_csv(tasks, file):
+    """كتابة المهام (قواميس بأعمدة TASK_FIELDS) إلى ملف CSV."""
+    writer = csv.DictWriter(file, fieldnames=TASK_FIELDS)
+    writer.writeheader()
+    writer.writerows(tasks)
+
+
+def write_tasks_jsonl(tasks, file):
+    """كتابة المهام إلى ملف JSON Lines."""
+    for task in tasks:
+        file.write(json.dumps(task, ensure_ascii=False) + '\n')
+
+
+def journal_path(snapshot_path):
+    """ملف سجل العمليات للقطة (tasks.json -> tasks.log، tasks.bin -> tasks.bin.log)."""
+    if snapshot_path.endswith('.bin'):
+        return snapshot_path + '.log'
+    return os.path.splitext(snapshot_path)[0] + '.log'
+
+
+def convert_snapshot(source, target):
+    """نسخ جميع البيانات من لقطة إلى أخرى حسب امتداد الهدف.
+
+    الهدف .bin لقطة ثنائية، وغير ذلك ملف JSON واحد {القائمة الفرعية: [المهام]} بترتيب
+    العرض (صيغة tasks.json الأصلية؛ تُجزأ عند أول فتح لها، ولا تحفظ ترتيب الفرز نفسه).
+    المصدر يُقرأ دون أي كتابة عليه (لا ضغط ولا تحويل). تعيد عدد المهام المنسوخة.
+    """
+    reader = TaskEngine(snapshot_path=source)
+    writer = TaskEngine(snapshot_path=target)
+    try:
+        if (writer.journal.read_manifest() is not None or os.path.exists(writer.journal.log_path)
+                or os.path.exists(target)):
+            raise FileExistsError(target)
+        for submenu, task_list in reader.iter_snapshot_lists():
+            reader.register_task_list(submenu, task_list)
+        for op in reader.journal.replay():
+            reader.apply_operation(op)
+        if not writer.journal.binary:
+            data = {submenu: [node.to_record() for node in task_list] for submenu, task_list in reader.task_lists.items()}
+            write_json_atomic(target, data)
+            return sum(map(len, data.values()))
+        count = 0
+        for submenu, task_list in reader.task_lists.items():
+            task_copy = TaskList(task_list.to_records())
+            task_copy.sort_order = task_list.sort_order
+            writer.task_lists[submenu] = task_copy
+            count += len(task_copy)
+        writer.persistence.compact(writer.shard_update(writer.task_lists))
+    finally:
+        reader.close()
+        writer.close()
+    error = writer.persistence.take_error()
+    if error is not None:
+        raise error
+    return count
+
+
+# محرك المهام (TaskEngine)
+class TaskEngine:
+    """حالة المهام وعملياتها دون أي واجهة رسومية.
+
+    تستخدمه الواجهة (ToDoApp) وسطر الأوامر (todo_cli.py) على حد سواء:
+    القوائم الفرعية، فهرس المعرفات، فهرس البحث، والحفظ عبر سجل العمليات أو SQLite.
+    """
+
+    def __init__(self, store=None, snapshot_path='tasks.json', shared=False):
+        self.store = store  # مخزن SQLite اختياري بدل ملف JSON
+        self.task_lists = {}
+        self.task_index = self.new_task_index()  # فهرس: معرف المهمة -> اسم القائمة الفرعية
+        self.journal = None if store else TaskJournal(snapshot_path, journal_path(snapshot_path), shared=shared)
+        self.persistence = PersistenceWorker(self.journal) if self.journal else None
+        self.search_index = None  # يُبنى عند أول بحث
+        self.scheduler = None  # كومة مواعيد الاستحقاق (تُبنى عند أول طلب للتذكيرات)
+        self.shards = {}  # القائمة الفرعية -> مدخلها في الملف الوصفي (اسم الملف، العدد، العدادات...)
+        self._dirty = set()  # قوائم فرعية تغيرت منذ آخر ضغط (تُعاد كتابة ملفاتها فقط)
+        self._migrate = False  # البيانات قُرئت من لقطة الملف الواحد القديمة
+        self.generation = None  # معرف الضغط الذي قُرئ ملفه الوصفي
+        self._own_generation = None  # معرف آخر ضغط طلبته هذه النسخة
+        self._signature = None  # حالة الملفات عند آخر فحص للتغييرات (الوضع المشترك)
+        self._unreported = set()  # تغييرات قُرئت أثناء الضغط ولم تُبلغ للواجهة بعد
+        # كل إجراء: الوصف، عملياته، والعمليات العكسية التي تلغيه (لا نسخ كاملة للبيانات)
+        self.undo_stack = deque(maxlen=HISTORY_LIMIT)
+        self.redo_stack = []  # إجراءات تم التراجع عنها؛ يُمسح عند أي إجراء جديد
+
+    def new_task_list(self, submenu):
+        """إنشاء قائمة مهام فارغة حسب نوع التخزين."""
+        if self.store:
+            return self.store.task_list(submenu)
+        return TaskList()
+
+    def new_task_index(self):
+        """إنشاء فهرس المعرفات حسب نوع التخزين."""
+        if self.store:
+            return SQLiteTaskIndex(self.store)
+        return {}
+
+    def load_from_json(self):
+        """تحميل جميع البيانات دفعة واحدة (للاستخدام دون واجهة)."""
+        if self.store:
+            self.load_submenu_names()
+            return
+        for submenu, task_list in self.iter_snapshot_lists():
+            self.register_task_list(submenu, task_list)
+        self.finish_loading()
+
+    def load_submenu_names(self):
+        """مع SQLite نكتفي بأسماء القوائم الفرعية؛ المهام تُقرأ عند الحاجة."""
+        for submenu in self.store.submenus():
+            self.task_lists[submenu] = self.store.task_list(submenu)
+        return list(self.task_lists)
+
+    def iter_snapshot_lists(self):
+        """قراءة اللقطة قائمة فرعية تلو الأخرى (آمنة للتشغيل في خيط خلفي).
+
+        مع اللقطة المجزأة يُقرأ الملف الوصفي فقط؛ ملف كل قائمة يُقرأ عند أول حاجة إليها.
+        """
+        manifest = self.journal.read_manifest()
+        if manifest is None:
+            self._migrate = True
+            for submenu, records in self.journal.iter_snapshot():
+                # المهام تبقى كسجلات حتى تُفتح القائمة الفرعية لأول مرة
+                yield submenu, TaskList(records)
+            return
+        self.generation = manifest.get('generation')
+        for entry in manifest['submenus']:
+            self.shards[entry['name']] = entry
+            yield entry['name'], self.shard_task_list(entry)
+
+    def shard_task_list(self, entry):
+        """قائمة مهام لم يُقرأ ملفها بعد (العدد والعدادات من الملف الوصفي)."""
+        submenu, file_name = entry['name'], entry['file']
+        records = LazyRecords(lambda: self._read_shard(submenu, file_name), entry['count'])
+        task_list = TaskList(records, stats=TaskStats.from_dict(entry['stats']))
+        task_list.sort_order = entry.get('sort')
+        return task_list
+
+    def _read_shard(self, submenu, file_name):
+        """قراءة ملف قائمة فرعية وإضافة مهامها إلى الفهارس."""
+        records = self.journal.read_shard(file_name)
+        for task in records:
+            self.task_index[task['id']] = submenu
+            self._index_task(task['id'], task['description'])
+        if self.scheduler is not None:
+            self.scheduler.extend((date_ordinal(task['date']), task['id']) for task in records if task['date'] and not task['completed'])
+        return records
+
+    def register_task_list(self, submenu, task_list):
+        """إضافة قائمة فرعية مقروءة من اللقطة إلى الفهارس."""
+        self.task_lists[submenu] = task_list
+        if not task_list.loaded:
+            return  # تُضاف مهامها إلى الفهارس عند قراءة ملفها
+        for task_id, description in task_list.iter_descriptions():
+            self.task_index[task_id] = submenu
+            self._index_task(task_id, description)
+        if self.scheduler is not None:
+            self.scheduler.extend(task_list.iter_due_entries())
+
+    def finish_loading(self):
+        """إعادة تطبيق سجل العمليات بعد اكتمال قراءة اللقطة.
+
+        تعيد True إذا غيّر السجل البيانات (لتحديث الواجهة).
+        """
+        for op in self.journal.replay():
+            self.apply_operation(op)
+        changed = bool(self.journal.pending)
+        if self._migrate:
+            self._dirty.update(self.task_lists)  # كتابة جميع القوائم في ملفات منفصلة
+            self._migrate = False
+        if changed or self._dirty:
+            self._compact()
+        return changed
+
+    def apply_operation(self, op):
+        """تطبيق عملية من السجل على البيانات في الذاكرة (دون حفظ)."""
+        kind = op.get('op')
+        submenu = op.get('submenu')
+        self._mark_dirty(op)
+        if kind == 'reset':
+            self.task_lists = {}
+            self.task_index = {}
+            self.search_index = None
+            self.scheduler = None
+            self.shards = {}
+        elif kind == 'add_submenu':
+            if submenu not in self.task_lists:
+                self.task_lists[submenu] = self.new_task_list(submenu)
+        elif kind == 'delete_submenu':
+            task_list = self.task_lists.pop(submenu, None)
+            if task_list is not None and self.store:
+                self.store.remove_submenu(submenu)
+            elif task_list is not None:
+                self._forget_task_list(task_list)
+                self.shards.pop(submenu, None)
+        elif kind == 'add':
+            self._apply_add(op)
+        elif kind == 'add_batch':
+            for task in op['tasks']:
+                self._apply_add(task)
+        elif kind == 'complete':
+            owner = self._owner_of(op['id'], submenu)
+            if owner is not None:
+                self.task_lists[owner].mark_task_as_done_by_id(op['id'])
+        elif kind == 'uncomplete':
+            owner = self._owner_of(op['id'], submenu)
+            if owner is not None:
+                self._schedule_task(self.task_lists[owner].mark_task_as_undone_by_id(op['id']))
+        elif kind == 'reschedule':
+            owner = self._owner_of(op['id'], submenu)
+            if owner is not None:
+                self._schedule_task(self.task_lists[owner].reschedule_task_by_id(op['id'], op['date']))
+        elif kind == 'delete':
+            owner = self._owner_of(op['id'], submenu)
+            if owner is not None:
+                self.task_index.pop(op['id'], None)
+                self.task_lists[owner].delete_task_by_id(op['id'])
+                self._unindex_task(op['id'])
+        elif kind == 'sort':
+            if submenu in self.task_lists:
+                self._sort_task_list(self.task_lists[submenu], op['order'])
+
+    def _apply_add(self, task):
+        if self._owner_of(task['id'], task['submenu']) is None:
+            submenu = task['submenu']
+            if submenu not in self.task_lists:
+                self.task_lists[submenu] = self.new_task_list(submenu)
+            node = self.task_lists[submenu].add_task(task['description'], task['priority'], task['date'], task['completed'],
+                                                     task_id=task['id'], before=task.get('before'), repeat=task.get('repeat'))
+            self.task_index[task['id']] = submenu
+            self._index_task(task['id'], task['description'])
+            self._schedule_task(node)
+
+    def _owner_of(self, task_id, hint=None):
+        """اسم القائمة الفرعية للمهمة؛ تُقرأ ملفات القوائم غير المقروءة عند الحاجة فقط.
+
+        hint: القائمة الفرعية المسجلة مع العملية (لا يُبحث في غيرها).
+        """
+        if self.store:
+            return self.task_index.get(task_id)
+        if hint is not None:
+            if hint in self.task_lists:
+                self.task_lists[hint].load()
+            return self.task_index.get(task_id)
+        submenu = self.task_index.get(task_id)
+        if submenu is None:
+            for task_list in list(self.task_lists.values()):
+                if not task_list.loaded:
+                    task_list.load()
+                    submenu = self.task_index.get(task_id)
+                    if submenu is not None:
+                        break
+        return submenu
+
+    def snapshot_data(self):
+        """تجهيز جميع البيانات بصيغة ملف JSON (للتصدير)."""
+        return {key: task_list.to_records() for key, task_list in self.task_lists.items()}
+
+    def _mark_dirty(self, op):
+        if op.get('op') == 'add_batch':
+            self._dirty.update(task['submenu'] for task in op['tasks'])
+        elif op.get('submenu') is not None:
+            self._dirty.add(op['submenu'])
+
+    def shard_update(self, submenus=()):
+        """ملفات القوائم المتغيرة (وsubmenus) مع الملف الوصفي الكامل، لتمريرها إلى TaskJournal.compact."""
+        self._dirty.update(submenus)
+        self._own_generation = uuid.uuid4().hex
+        shards = {}
+        for submenu in self._dirty:
+            task_list = self.task_lists.get(submenu)
+            if task_list is None:
+                continue
+            entry = self.shards.get(submenu) or {'name': submenu, 'file': uuid.uuid4().hex + '.json'}
+            records = task_list.to_records()
+            next_due = min((ordinal for ordinal, _ in task_list.iter_due_entries()), default=0)
+            self.shards[submenu] = dict(entry, count=len(records), sort=task_list.sort_order, version=uuid.uuid4().hex,
+                                        next_due=date_string(next_due), stats=task_list.stats.to_dict())
+            shards[entry['file']] = records
+        self._dirty.clear()
+        return {'submenus': [self.shards[submenu] for submenu in self.task_lists], 'shards': shards,
+                'generation': self.generation, 'new_generation': self._own_generation, 'offset': self.journal.offset}
+
+    def _compact(self):
+        """جدولة ضغط السجل؛ في الوضع المشترك بعد قراءة تغييرات النسخ الأخرى أولًا."""
+        if self.journal.shared:
+            self._unreported |= self.poll_changes()
+        self.persistence.compact(self.shard_update())
+
+    def poll_changes(self):
+        """(الوضع المشترك) تطبيق ما كتبته النسخ الأخرى منذ آخر فحص.
+
+        الفحص المعتاد مقارنة وقت التعديل والحجم فقط. تعيد أسماء القوائم الفرعية التي
+        تغيرت (وNone بعد إعادة ضبط كاملة) لتحديث الواجهة.
+        """
+        if not self.journal or not self.journal.shared:
+            return set()
+        signature = self.journal.signature()
+        # دون انتظار خيط الحفظ: إذا كانت كل كتابة منذ آخر فحص من عملياتنا (وهي مطبقة
+        # في الذاكرة) فلا تغيير من نسخة أخرى. own_writes يسجله خيط الحفظ تحت قفل الملفات.
+        own = self.journal.own_writes
+        if signature == self._signature or own == (self._signature, signature):
+            if own is not None and own[1] == signature:
+                self.journal.own_writes = None  # الكتابات التالية تبدأ من الحالة الحالية
+            self._signature = signature
+            changed, self._unreported = self._unreported, set()
+            return changed
+        self._signature = signature
+        changed = set()
+        reloaded = False
+        with self.journal.locked(shared=True):
+            manifest = self.journal.read_manifest()
+            generation = manifest.get('generation') if manifest else None
+            if generation != self.generation:
+                if generation != self._own_generation:  # ضغط من نسخة أخرى
+                    changed |= self._reload_shards(manifest['submenus'] if manifest else [])
+                    reloaded = True
+                self.generation = generation
+                self.journal.offset = 0  # السجل الجديد يبدأ بعد ما شمله الضغط
+            ops, self.journal.offset = self.journal.read_log(self.journal.offset)
+        for op in ops:
+            if op.get('origin') == self.journal.instance and not reloaded:
+                continue  # عملياتنا مطبقة في الذاكرة مسبقًا
+            self.apply_operation(op)
+            self.journal.pending += self.journal.weight(op)
+            if op.get('op') == 'reset':
+                changed.add(None)
+            elif op.get('op') == 'add_batch':
+                changed.update(task['submenu'] for task in op['tasks'])
+            else:
+                changed.add(op.get('submenu'))
+        changed |= self._unreported
+        self._unreported = set()
+        return changed
+
+    def _reload_shards(self, entries):
+        """استبدال القوائم التي أعادت نسخة أخرى كتابة ملفاتها (حسب version) فقط."""
+        changed = set()
+        task_lists = {}
+        for entry in entries:
+            submenu = entry['name']
+            old = self.task_lists.get(submenu)
+            known = self.shards.get(submenu)
+            if old is not None and known is not None and known.get('version') == entry.get('version'):
+                task_lists[submenu] = old
+                continue
+            if old is not None:
+                self._forget_task_list(old)
+            task_lists[submenu] = self.shard_task_list(entry)
+            changed.add(submenu)
+        for submenu, old in self.task_lists.items():
+            if submenu not in task_lists:
+                # قائمة لم تُضغط بعد؛ تُستعاد من السجل إن كانت ما تزال موجودة
+                self._forget_task_list(old)
+                changed.add(submenu)
+        self.task_lists = task_lists
+        self.shards = {entry['name']: entry for entry in entries}
+        return changed
+
+    def _forget_task_list(self, task_list):
+        if task_list.loaded:
+            for task_id, _ in list(task_list.iter_descriptions()):
+                self.task_index.pop(task_id, None)
+                self._unindex_task(task_id)
+
+    def save_to_json(self, submenu, op, compact=True):
+        """حفظ عملية واحدة في سجل العمليات وضغط السجل عند الحاجة."""
+        if self.store:
+            self.store.commit()
+            return
+        self._mark_dirty(op)
+        self.persistence.append(op)
+        if compact and self.journal.should_compact():
+            self._compact()
+
+    def flush(self):
+        """انتظار كتابة جميع العمليات المعلقة على القرص."""
+        if self.store:
+            self.store.commit()
+        else:
+            self.persistence.flush()
+
+    def close(self):
+        """كتابة ما تبقى وإيقاف خيط الحفظ."""
+        if self.store:
+            self.store.commit()
+        else:
+            self.persistence.close()
+
+    def _record(self, label, detail, ops, undo):
+        """حفظ إجراء في سجل التراجع (undo: العمليات العكسية بترتيب تطبيقها)."""
+        self.undo_stack.append({'label': label, 'detail': detail, 'time': time.time(), 'ops': ops, 'undo': undo})
+        self.redo_stack.clear()
+
+    def _create_submenu(self, submenu):
+        self.task_lists[submenu] = self.new_task_list(submenu)
+        op = {'op': 'add_submenu', 'submenu': submenu}
+        self.save_to_json(submenu, op)
+        return op
+
+    def resolve_submenu(self, submenu):
+        """الاسم المخزن للقائمة الفرعية: الاسم الموجود كما هو، أو مفتاح القائمة المعرّفة مسبقًا.
+
+        قائمة حُفظت سابقًا باسمها المترجم تبقى باسمها وتُضاف إليها المهام (دون ترحيل البيانات).
+        """
+        if submenu in self.task_lists:
+            return submenu
+        key = submenu_key(submenu)
+        if key in self.task_lists or key not in BUILTIN_SUBMENUS:
+            return key
+        for labels in LANGUAGES.values():
+            if labels[key] in self.task_lists:
+                return labels[key]
+        return key
+
+    def resolve_submenus(self, submenus):
+        """الأسماء المخزنة لمجموعة أسماء قوائم فرعية (كما في resolve_submenu)، أو None للجميع."""
+        return None if submenus is None else {self.resolve_submenu(submenu) for submenu in submenus}
+
+    def add_submenu(self, submenu):
+        """إضافة قائمة فرعية جديدة؛ تعيد False إذا كان الاسم فارغًا أو موجودًا."""
+        submenu = self.resolve_submenu(submenu)
+        if not submenu or submenu in self.task_lists:
+            return False
+        op = self._create_submenu(submenu)
+        self._record("Add Submenu", submenu, [op], [{'op': 'delete_submenu', 'submenu': submenu}])
+        return True
+
+    def add_task(self, submenu, description, priority, date, completed=False, task_id=None, repeat=None):
+        """إضافة مهمة جديدة إلى القائمة الفرعية (تُنشأ القائمة إن لم تكن موجودة).
+
+        repeat: قاعدة تكرار (Recurrence أو صيغتها النصية)؛ تُحفظ مهمة واحدة مهما طالت القاعدة.
+        """
+        submenu = self.resolve_submenu(submenu)
+        ops, undo = [], []
+        if submenu not in self.task_lists:
+            ops.append(self._create_submenu(submenu))
+            undo.append({'op': 'delete_submenu', 'submenu': submenu})
+        node = self.task_lists[submenu].add_task(description, priority, date, completed, task_id=task_id,
+                                                 repeat=str(repeat) if repeat else None)
+        self.task_index[node.id] = submenu
+        self._index_task(node.id, node.description)
+        self._schedule_task(node)
+        op = dict(node.to_record(), op='add', submenu=submenu)
+        self.save_to_json(submenu, op)
+        ops.append(op)
+        undo.insert(0, {'op': 'delete', 'submenu': submenu, 'id': node.id})
+        self._record("Add Task", description, ops, undo)
+        return node
+
+    def import_tasks(self, tasks, batch_size=IMPORT_BATCH_SIZE):
+        """إضافة مهام كثيرة (قواميس بأعمدة TASK_FIELDS) على دفعات.
+
+        تُحفظ كل دفعة بعملية واحدة في السجل (أو commit واحد في SQLite) بدل حفظ
+        لكل مهمة. المهام ذات المعرفات الموجودة مسبقًا تُتجاهل. تعيد عدد المهام المضافة.
+
+        إذا توقف الاستيراد بخطأ (صف غير صالح مثلًا) تُحفظ المهام المضافة قبله ويمكن
+        التراجع عنها كإجراء واحد، ثم يُرفع الخطأ.
+        """
+        count = 0
+        batch = []
+        ops, undo, created = [], [], []
+        try:
+            for task in tasks:
+                submenu = self.resolve_submenu(task['submenu'])
+                if task.get('id') and self._owner_of(task['id'], submenu) is not None:
+                    continue
+                if submenu not in self.task_lists:
+                    self.task_lists[submenu] = self.new_task_list(submenu)
+                    created.append({'op': 'delete_submenu', 'submenu': submenu})
+                node = self.task_lists[submenu].add_task(task['description'], task['priority'], task['date'],
+                                                         task['completed'], task_id=task.get('id'), repeat=task.get('repeat'))
+                self.task_index[node.id] = submenu
+                self._index_task(node.id, node.description)
+                self._schedule_task(node)
+                batch.append(dict(node.to_record(), submenu=submenu))
+                undo.append({'op': 'delete', 'submenu': submenu, 'id': node.id})
+                count += 1
+                if len(batch) >= batch_size:
+                    # الضغط يُؤجَّل إلى نهاية الاستيراد حتى لا تُكتب لقطة بعد كل دفعة
+                    ops.append({'op': 'add_batch', 'tasks': batch})
+                    self.save_to_json(None, ops[-1], compact=False)
+                    batch = []
+        finally:
+            if batch:
+                ops.append({'op': 'add_batch', 'tasks': batch})
+                self.save_to_json(None, ops[-1], compact=False)
+            if self.journal and self.journal.should_compact():
+                self._compact()
+            if count:
+                undo.reverse()
+                self._record("Import", str(count), ops, undo + created)
+        return count
+
+    def export_tasks(self):
+        """جميع المهام كقواميس بأعمدة TASK_FIELDS (للتصدير إلى CSV أو JSON Lines)."""
+        for submenu, task_list in self.task_lists.items():
+            for node in task_list:
+                yield dict(node.to_record(), submenu=submenu)
+
+    def mark_task_as_done_by_id(self, task_id, through=None):
+        """تحديد المهمة كمكتملة بواسطة المعرف في قائمتها الفرعية فقط.
+
+        المهمة المتكررة تنتقل إلى تكرارها التالي بعد إنجاز تكرارها الحالي (أو جميع
+        تكراراتها حتى اليوم through دفعةً واحدة)، وتكتمل بعد آخر تكرار.
+        """
+        submenu = self._owner_of(task_id)
+        if submenu is None:
+            return None
+        task_list = self.task_lists[submenu]
+        node = task_list.get_task(task_id)
+        if node is not None and node.recurrence and not node.completed:
+            return self._complete_occurrences(submenu, task_list, node, through)
+        was_completed = node is not None and node.completed
+        node = task_list.mark_task_as_done_by_id(task_id)
+        op = {'op': 'complete', 'submenu': submenu, 'id': task_id}
+        self.save_to_json(submenu, op)
+        if node is not None and not was_completed:
+            self._record("Mark as Done", node.description, [op], [dict(op, op='uncomplete')])
+        return node
+
+    def _complete_occurrences(self, submenu, task_list, node, through):
+        """إنجاز تكرارات مهمة متكررة حتى through بتغيير تاريخها فقط (دون إنشاء مهمة لكل تكرار)."""
+        previous = node.date
+        through = date_ordinal(through) if isinstance(through, str) else through or 0
+        following = node.recurrence.next_after(max(through, node.date_ordinal))
+        ops, undo = [], []
+        final = node.recurrence.end if following is None else following
+        if final != node.date_ordinal:
+            ops.append({'op': 'reschedule', 'submenu': submenu, 'id': node.id, 'date': date_string(final)})
+            undo.append(dict(ops[-1], date=previous))
+        if following is None:  # آخر تكرار
+            ops.append({'op': 'complete', 'submenu': submenu, 'id': node.id})
+            undo.insert(0, dict(ops[-1], op='uncomplete'))
+        for op in ops:
+            self.apply_operation(op)
+            self.save_to_json(submenu, op)
+        self._record("Mark as Done", node.description, ops, undo)
+        return task_list.get_task(node.id)
+
+    def delete_task(self, submenu, description):
+        """حذف مهمة من القائمة الفرعية المحددة بناءً على الوصف."""
+        node = self.task_lists[submenu].find_by_description(description)
+        if node:
+            return self.delete_task_by_id(node.id)
+        return None
+
+    def delete_task_by_id(self, task_id):
+        """حذف مهمة بواسطة المعرف.
+
+        التراجع يعيد المهمة بنفس المعرف قبل المهمة التي كانت تليها (زمن ثابت).
+        """
+        submenu = self._owner_of(task_id)
+        if submenu is None:
+            return None
+        task_list = self.task_lists[submenu]
+        node = task_list.get_task(task_id)
+        if node is None:
+            return None
+        restore = dict(node.to_record(), op='add', submenu=submenu, before=node.next.id if node.next else None)
+        self.task_index.pop(task_id, None)
+        node = task_list.delete_task_by_id(task_id)
+        self._unindex_task(task_id)
+        op = {'op': 'delete', 'submenu': submenu, 'id': task_id}
+        self.save_to_json(submenu, op)
+        self._record("Delete Task", node.description, [op], [restore])
+        return node
+
+    def sort_tasks(self, submenu, order):
+        """فرز مهام القائمة الفرعية وتسجيل عملية الفرز."""
+        task_list = self.task_lists[submenu]
+        previous = task_list.sort_order
+        self._sort_task_list(task_list, order)
+        op = {'op': 'sort', 'submenu': submenu, 'order': order}
+        self.save_to_json(submenu, op)
+        if previous != order:
+            self._record("Sort By", f"{submenu}: {order}", [op], [dict(op, order=previous)])
+
+    def _sort_task_list(self, task_list, order):
+        if order == "date":
+            task_list.sort_by_date()
+        elif order == "priority":
+            task_list.sort_by_priority()
+        elif order == "alphabetical":
+            task_list.sort_alphabetically()
+        elif order is None:
+            task_list.unsort()
+
+    def search(self, search_text):
+        """جميع المهام المطابقة من كل القوائم الفرعية مرتبة حسب التطابق."""
+        for task_id in self.ensure_search_index().search(search_text):
+            submenu = self.task_index.get(task_id)
+            node = self.task_lists[submenu].get_task(task_id) if submenu is not None else None
+            if node:
+                yield node
+
+    def ensure_search_index(self):
+        """بناء فهرس البحث من جميع القوائم الفرعية عند أول استخدام."""
+        if self.search_index is None:
+            self.load_all()
+            self.search_index = SearchIndex()
+            for task_list in self.task_lists.values():
+                for task_id, description in task_list.iter_descriptions():
+                    self.search_index.add(task_id, description)
+        return self.search_index
+
+    def _index_task(self, task_id, description):
+        if self.search_index is not None:
+            self.search_index.add(task_id, description)
+
+    def _unindex_task(self, task_id):
+        if self.search_index is not None:
+            self.search_index.remove(task_id)
+
+    def load_all(self):
+        """قراءة ملفات جميع القوائم الفرعية التي لم تُقرأ بعد."""
+        if not self.store:
+            for task_list in list(self.task_lists.values()):
+                task_list.load()
+
+    def _may_have_due(self, submenu, task_list, until):
+        """هل قد تحتوي القائمة مهام مستحقة حتى until؟ (للقوائم غير المقروءة حسب الملف الوصفي)"""
+        if self.store or task_list.loaded:
+            return True
+        next_due = self.shards.get(submenu, {}).get('next_due')
+        return bool(next_due) and date_ordinal(next_due) <= until
+
+    def find_task(self, task_id):
+        """الحصول على عقدة المهمة بواسطة المعرف من أي قائمة فرعية."""
+        submenu = self.task_submenu(task_id)
+        if submenu is None or submenu not in self.task_lists:
+            return None
+        return self.task_lists[submenu].get_task(task_id)
+
+    def task_submenu(self, task_id):
+        """اسم القائمة الفرعية للمهمة (يُقرأ ملف قائمتها إن لم يُقرأ بعد)، أو None."""
+        return self._owner_of(task_id)
+
+    def ensure_scheduler(self):
+        """بناء كومة مواعيد الاستحقاق من جميع القوائم الفرعية عند أول استخدام.
+
+        القوائم التي لم يُقرأ ملفها تُضاف إلى الكومة عند قراءته.
+        """
+        if self.scheduler is None:
+            if self.store:
+                entries = ((node.date_ordinal, node.id) for node in self.store.tasks_with_status(False))
+            else:
+                entries = (entry for task_list in self.task_lists.values() if task_list.loaded
+                           for entry in task_list.iter_due_entries())
+            self.scheduler = DueScheduler(entries, self.find_task)
+        return self.scheduler
+
+    def _schedule_task(self, node):
+        if self.scheduler is not None:
+            self.scheduler.push(node)
+
+    def pop_due_tasks(self, until=None):
+        """المهام التي حان موعدها منذ آخر فحص (كل مهمة تُعاد مرة واحدة)."""
+        until = today_ordinal() if until is None else until
+        scheduler = self.ensure_scheduler()
+        for submenu, task_list in list(self.task_lists.items()):
+            if not task_list.loaded and self._may_have_due(submenu, task_list, until):
+                task_list.load()
+        return scheduler.pop_due(until)
+
+    def get_tasks_for_submenu(self, submenu):
+        """الحصول على جميع المهام في القائمة الفرعية المحددة."""
+        if submenu in self.task_lists:
+            return self.task_lists[submenu].get_all_tasks()
+        return []
+
+    def iter_tasks_by_status(self, completed):
+        """المهام المنجزة أو غير المنجزة من جميع القوائم الفرعية، مجمعة حسب القائمة."""
+        if self.store:
+            yield from self.store.tasks_with_status(completed)
+            return
+        for task_list in self.task_lists.values():
+            count = task_list.stats.completed if completed else task_list.stats.total - task_list.stats.completed
+            if count:  # العدادات تغني عن قراءة ملف قائمة لا تحتوي المطلوب
+                yield from task_list.tasks_with_status(completed)
+
+    def iter_due_tasks(self, until=None):
+        """المهام المستحقة اليوم أو المتأخرة من جميع القوائم الفرعية، مجمعة حسب القائمة."""
+        until = today_ordinal() if until is None else until
+        if self.store:
+            yield from self.store.due_tasks(until)
+            return
+        for submenu, task_list in self.task_lists.items():
+            if self._may_have_due(submenu, task_list, until):
+                yield from task_list.due_tasks(until)
+
+    def iter_occurrences(self, date_from, date_to=None, submenus=None):
+        """تكرارات المهام بين يومين من جميع القوائم الفرعية (أو submenus) بترتيب التاريخ.
+
+        مولّد (رقم اليوم، القائمة الفرعية، العقدة، منجز؟)؛ تكرارات المهام المتكررة
+        تُحسب عند المرور عليها فقط. التواريخ نص YYYY-MM-DD أو رقم اليوم.
+        """
+        date_from, date_to = TaskQuery._day(date_from), TaskQuery._day(date_to)
+        submenus = self.resolve_submenus(submenus)
+        streams = [self._tag_occurrences(submenu, task_list.iter_occurrences(date_from, date_to))
+                   for submenu, task_list in self.task_lists.items() if submenus is None or submenu in submenus]
+        return heapq.merge(*streams, key=lambda occurrence: occurrence[0])
+
+    @staticmethod
+    def _tag_occurrences(submenu, occurrences):
+        for day, node, done in occurrences:
+            yield day, submenu, node, done
+
+    def occurrence_stats(self, date_from, date_to, submenus=None):
+        """(عدد التكرارات، المنجز منها) بين يومين لنسبة الإنجاز في فترة، دون توليد التكرارات."""
+        date_from, date_to = TaskQuery._day(date_from), TaskQuery._day(date_to)
+        submenus = self.resolve_submenus(submenus)
+        total = completed = 0
+        for submenu, task_list in self.task_lists.items():
+            if submenus is None or submenu in submenus:
+                count, done = task_list.occurrence_counts(date_from, date_to)
+                total += count
+                completed += done
+        return total, completed
+
+    def query(self, query):
+        """تنفيذ TaskQuery؛ تعيد قائمة أزواج (القائمة الفرعية، العقدة).
+
+        المرشحون من أضيق فهرس متاح (فهرس البحث، كومة الاستحقاق، فهرس الحالة)،
+        والقوائم التي لا تطابق عداداتها تُتخطى دون قراءة ملفها. مع الحد والفرز
+        تُختار أول limit نتيجة بكومة (O(n log k)) بدل فرز كل المطابقات. أسماء القوائم
+        الفرعية تُحوّل إلى أسمائها المخزنة كما في add_task.
+        """
+        if query.submenus is not None:
+            query = copy.copy(query)
+            query.submenus = self.resolve_submenus(query.submenus)
+        if self.store:
+            return self.store.query(query)
+        matches = ((submenu, node) for submenu, node in self._query_candidates(query) if query.matches(node))
+        key = query.sort_key()
+        if key is None:
+            return list(itertools.islice(matches, query.limit))
+        if query.limit is not None:
+            return heapq.nsmallest(query.limit, matches, key=lambda item: key(item[1]))
+        return sorted(matches, key=lambda item: key(item[1]))
+
+    def _query_candidates(self, query):
+        if query.text is not None:
+            for node in self.search(query.text):
+                submenu = self.task_index.get(node.id)
+                if query.submenus is None or submenu in query.submenus:
+                    yield submenu, node
+            return
+        for submenu, task_list in list(self.task_lists.items()):
+            if query.submenus is not None and submenu not in query.submenus or not query.may_match(task_list.stats):
+                continue
+            if query.completed is False and query.date_to is not None:
+                nodes = task_list.due_tasks(query.date_to)
+            elif query.completed is not None:
+                nodes = task_list.tasks_with_status(query.completed)
+            else:
+                nodes = task_list
+            for node in nodes:
+                yield submenu, node
+
+    def reset(self):
+        """إعادة ضبط جميع البيانات.
+
+        مع ملف JSON يحتفظ سجل التراجع بالقوائم القديمة نفسها (دون نسخها) لاستعادتها؛
+        مع SQLite تُحذف الصفوف فلا يمكن التراجع ويُمسح السجل.
+        """
+        if self.store:
+            self.store.reset()
+            self.undo_stack.clear()
+            self.redo_stack.clear()
+        else:
+            self._record("Reset", "", [{'op': 'reset'}], [self._restore_point()])
+        self.task_lists = {}
+        self.task_index = self.new_task_index()
+        self.search_index = None
+        self.scheduler = None
+        self.shards = {}
+        self.save_to_json("reset", {'op': 'reset'})
+
+    def _restore_point(self):
+        """مراجع للبيانات الحالية لاستعادتها بعد إعادة الضبط.
+
+        ملفات القوائم تُقرأ أولًا لأن الضغط بعد إعادة الضبط قد يحذفها.
+        """
+        self.load_all()
+        return {'op': 'restore', 'state': (self.task_lists, self.task_index, self.shards)}
+
+    def _restore(self, state):
+        """استعادة بيانات ما قبل إعادة الضبط وكتابتها في سجل العمليات ثم كلقطة جديدة.
+
+        العمليات تُسجل كأي تراجع آخر، فتبقى الاستعادة محفوظة إذا أُلغي الضغط (الوضع
+        المشترك) أو توقف البرنامج قبل اكتماله وأُعيد تشغيل عملية reset من السجل.
+        """
+        self.task_lists, self.task_index, self.shards = state
+        self.search_index = None
+        self.scheduler = None
+        for submenu, task_list in self.task_lists.items():
+            self.save_to_json(submenu, {'op': 'add_submenu', 'submenu': submenu}, compact=False)
+            if task_list.sort_order:  # قبل المهام، فتبقى بترتيبها الحالي
+                self.save_to_json(submenu, {'op': 'sort', 'submenu': submenu, 'order': task_list.sort_order}, compact=False)
+            records = [dict(record, submenu=submenu) for record in task_list.to_records()]
+            if records:
+                self.save_to_json(submenu, {'op': 'add_batch', 'tasks': records}, compact=False)
+        self._compact()
+
+    def undo(self):
+        """التراجع عن آخر إجراء.
+
+        تعيد أسماء القوائم الفرعية التي تغيرت (وNone بعد استعادة كاملة)، أو None
+        إذا لم يوجد ما يُتراجع عنه.
+        """
+        if not self.undo_stack:
+            return None
+        action = self.undo_stack.pop()
+        self.redo_stack.append(action)
+        return self._run_history(action['undo'])
+
+    def redo(self):
+        """إعادة آخر إجراء تم التراجع عنه (نفس قيمة undo)."""
+        if not self.redo_stack:
+            return None
+        action = self.redo_stack.pop()
+        if action['ops'][0]['op'] == 'reset':
+            action['undo'] = [self._restore_point()]
+        self.undo_stack.append(action)
+        return self._run_history(action['ops'])
+
+    def history(self):
+        """الإجراءات من الأقدم إلى الأحدث كأزواج (الإجراء، هل هو منفذ؟)."""
+        return [(action, True) for action in self.undo_stack] + [(action, False) for action in reversed(self.redo_stack)]
+
+    def _run_history(self, ops):
+        """تطبيق عمليات من سجل التراجع وحفظها في سجل العمليات كأي عملية أخرى."""
+        changed = set()
+        for op in ops:
+            kind = op['op']
+            if kind == 'restore':
+                self._restore(op['state'])
+                changed.add(None)
+                continue
+            self.apply_operation(op)
+            self.save_to_json(op.get('submenu'), op, compact=False)
+            if kind == 'reset':
+                changed.add(None)
+            elif kind == 'add_batch':
+                changed.update(task['submenu'] for task in op['tasks'])
+            else:
+                changed.add(op.get('submenu'))
+        if self.journal and self.journal.should_compact():
+            self._compact()
+        return changed
+
+
+# قياس زمن الدوال (Profiler)
+class Profiler:
+    """مؤقتات وعدادات اختيارية حول الدوال الحساسة للأداء.
+
+    لا تُغلّف أي دالة حتى يُستدعى instrument، فلا كلفة على التشغيل العادي.
+    النتائج تُصدّر بصيغة Chrome trace (chrome://tracing أو Perfetto).
+    """
+
+    def __init__(self, max_events=200000, slow_ms=50):
+        self.enabled = False
+        self.events = deque(maxlen=max_events)  # (الاسم، الفئة، البداية، المدة، الخيط)
+        self.counters = {}  # الاسم -> [عدد الاستدعاءات، الزمن الكلي، أطول استدعاء]
+        self.slow_calls = deque(maxlen=100)  # آخر استدعاءات الواجهة البطيئة
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+
+    def instrument(self, owner, names, category):
+        """تغليف دوال صنف (أو وحدة) بمؤقت."""
+        self.enabled = True
+        prefix = getattr(owner, '__name__', type(owner).__name__)
+        for name in names:
+            function = getattr(owner, name)
+            if not hasattr(function, '__wrapped__'):
+                setattr(owner, name, self.wrap(function, f"{prefix}.{name}", category))
+
+    def wrap(self, function, label, category):
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(label, category, start, time.perf_counter() - start)
+        return timed
+
+    def record(self, label, category, start, duration):
+        with self._lock:
+            self.events.append((label, category, start, duration, threading.get_ident()))
+            counter = self.counters.setdefault(label, [0, 0.0, 0.0])
+            counter[0] += 1
+            counter[1] += duration
+            counter[2] = max(counter[2], duration)
+            if category == 'ui' and duration * 1000 >= self.slow_ms:
+                self.slow_calls.append((label, start, duration))
+
+    def summary(self):
+        """(الاسم، عدد الاستدعاءات، الزمن الكلي، أطول استدعاء) مرتبة حسب الزمن الكلي."""
+        with self._lock:
+            rows = [(label, *counter) for label, counter in self.counters.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def chrome_trace(self):
+        with self._lock:
+            events = list(self.events)
+        pid = os.getpid()
+        return {
+            'traceEvents': [
+                {'name': label, 'cat': category, 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6, 'pid': pid, 'tid': tid}
+                for label, category, start, duration, tid in events
+            ],
+            'displayTimeUnit': 'ms',
+            'otherData': {label: {'calls': calls, 'total_ms': total * 1000, 'max_ms': longest * 1000}
+                          for label, calls, total, longest in self.summary()},
+        }
+
+    def export_chrome_trace(self, path):
+        """حفظ الأحداث المسجلة في ملف trace."""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.chrome_trace(), file, ensure_ascii=False)
+
+
+PROFILER = Profiler()
+
+
+def instrument_core(profiler=PROFILER):
+    """تغليف عمليات القائمة والفهارس والحفظ بمؤقتات."""
+    profiler.instrument(TaskList, ['add_task', 'get_all_tasks', 'mark_task_as_done', 'mark_task_as_done_by_id',
+                                   'delete_task', 'delete_task_by_id', 'sorted_view', '_load_pending'], 'tasklist')
+    profiler.instrument(SearchIndex, ['search'], 'index')
+    profiler.instrument(TaskJournal, ['append_many', 'compact', 'read_manifest', 'read_shard'], 'persistence')
+    profiler.instrument(TaskEngine, ['load_from_json', 'register_task_list', 'finish_loading', 'snapshot_data', 'shard_update',
+                                     'ensure_search_index', 'import_tasks'], 'engine')
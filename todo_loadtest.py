@@ -0,0 +1,162 @@
+"""اختبار حمل لخدمة todo_server.py على الجهاز المحلي.
+
+عدد من العملاء المتزامنين (asyncio، اتصال مفتوح لكل عميل) يرسلون مزيجًا من
+القراءات (استعلام، إحصاءات) والتعديلات (إضافة، إكمال، حذف)، ثم تُطبع لكل نوع
+طلب عدد الطلبات وزمن الاستجابة (p50/p95/p99) والإنتاجية الكلية بصيغة JSON.
+
+الاستخدام: python todo_loadtest.py [--clients 50] [--requests 200] [--writes 0.2] [--port 8765] [--spawn]
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+READ_REQUESTS = [
+    ("query", "GET", "/tasks?completed=false&sort=date&limit=20"),
+    ("query_submenu", "GET", "/tasks?submenu=Projects&sort=priority,date&limit=20"),
+    ("search", "GET", "/tasks?search=report&limit=20"),
+    ("stats", "GET", "/stats"),
+]
+
+
+async def request(reader, writer, method, path, payload=None):
+    """(الحالة، الاستجابة) لطلب واحد على اتصال مفتوح."""
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(number, args, latencies, errors):
+    """عميل واحد: args.requests طلبًا متتاليًا على اتصال واحد."""
+    rng = random.Random(args.seed + number)
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    own = []  # معرفات المهام التي أضافها هذا العميل
+    try:
+        for i in range(args.requests):
+            if rng.random() < args.writes:
+                if own and rng.random() < 0.5:
+                    task_id = own.pop(rng.randrange(len(own)))
+                    name, method, path, payload = (("complete", "POST", f"/tasks/{task_id}/complete", None) if rng.random() < 0.5
+                                                   else ("delete", "DELETE", f"/tasks/{task_id}", None))
+                else:
+                    name, method, path = "add", "POST", "/tasks"
+                    payload = {'submenu': "Load test", 'description': f"client {number} task {i}",
+                               'priority': rng.choice(("High", "Medium", "Low")),
+                               'date': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"}
+            else:
+                (name, method, path), payload = rng.choice(READ_REQUESTS), None
+            started = time.perf_counter()
+            status, result = await request(reader, writer, method, path, payload)
+            latencies.setdefault(name, []).append(time.perf_counter() - started)
+            if status >= 400:
+                errors.append(f"{method} {path}: {status} {result}")
+            elif name == "add":
+                own.append(result['id'])
+    finally:
+        writer.close()
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(latencies, errors, elapsed):
+    total = sum(len(values) for values in latencies.values())
+    report = {'requests': total, 'errors': len(errors), 'seconds': round(elapsed, 3),
+              'requests_per_second': round(total / elapsed) if elapsed else None, 'latency_ms': {}}
+    for name, values in sorted(latencies.items()):
+        values.sort()
+        report['latency_ms'][name] = {
+            'count': len(values),
+            'p50': round(percentile(values, 0.50) * 1000, 2),
+            'p95': round(percentile(values, 0.95) * 1000, 2),
+            'p99': round(percentile(values, 0.99) * 1000, 2),
+            'max': round(values[-1] * 1000, 2),
+        }
+    return report
+
+
+async def run(args):
+    latencies, errors = {}, []
+    started = time.perf_counter()
+    await asyncio.gather(*(client(number, args, latencies, errors) for number in range(args.clients)))
+    report = summarize(latencies, errors, time.perf_counter() - started)
+    for error in errors[:10]:
+        print(error, file=sys.stderr)
+    return report
+
+
+def spawn_server(args, directory):
+    """تشغيل todo_server.py على ملف بيانات مؤقت (مع مهام أولية) وانتظار جاهزيته."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    data = os.path.join(directory, "tasks.json")
+    if args.tasks:
+        sys.path.insert(0, here)
+        from todo_bench import generate_tasks
+        from todo_core import TaskEngine
+        engine = TaskEngine(snapshot_path=data)
+        engine.import_tasks(generate_tasks(args.tasks, args.seed))
+        engine.close()
+    server = subprocess.Popen([sys.executable, os.path.join(here, "todo_server.py"), "--data", data,
+                               "--host", args.host, "--port", str(args.port)])
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection((args.host, args.port), timeout=1).close()
+            return server
+        except OSError:
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.kill()
+                raise RuntimeError("server did not start")
+            time.sleep(0.1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="اختبار حمل لخدمة المهام المحلية")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=50, help="عدد العملاء المتزامنين")
+    parser.add_argument("--requests", type=int, default=200, help="عدد الطلبات لكل عميل")
+    parser.add_argument("--writes", type=float, default=0.2, help="نسبة التعديلات بين الطلبات")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spawn", action="store_true", help="تشغيل الخدمة على بيانات مؤقتة ثم إيقافها")
+    parser.add_argument("--tasks", type=int, default=10000, help="(مع --spawn) عدد المهام الأولية")
+    parser.add_argument("--output", help="ملف النتائج (الافتراضي: الطباعة)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        server = spawn_server(args, directory) if args.spawn else None
+        try:
+            report = asyncio.run(run(args))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+    return 1 if report['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
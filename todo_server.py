@@ -0,0 +1,340 @@
+"""خدمة HTTP/JSON محلية فوق TaskEngine (asyncio، دون مكتبات خارجية).
+
+كاتب واحد ينفذ جميع التعديلات بالترتيب من طابور، والقراءات تُخدم من البيانات في
+الذاكرة مباشرة؛ نتيجة كل قراءة تُحفظ حتى التعديل التالي، فالاستعلامات المتكررة
+من لوحات المتابعة لا تُحسب من جديد.
+
+الاستخدام: python todo_server.py [--data tasks.json] [--sqlite PATH] [--shared] [--host 127.0.0.1] [--port 8765]
+
+    GET    /submenus
+    GET    /stats
+    GET    /tasks?submenu=Projects&completed=false&priority=High&from=2024-05-01&to=2024-05-07&sort=date,priority:desc&limit=20
+    GET    /tasks/<id>
+    POST   /tasks                 {"submenu", "description", "priority", "date", "completed", "repeat"}
+    POST   /tasks/<id>/complete[?through=2024-05-31]
+    DELETE /tasks/<id>
+    POST   /undo
+    POST   /redo
+"""
+import sys
+import json
+import signal
+import asyncio
+import argparse
+import contextlib
+from datetime import date
+from urllib.parse import urlsplit, parse_qs
+
+from todo_cli import sort_field, task_to_dict
+from todo_core import (
+    PRIORITY_NAMES, PRIORITY_ORDER, PROFILER, Recurrence, TaskEngine, TaskQuery, TaskStats, SQLiteTaskStore, date_ordinal,
+    date_string, instrument_core
+)
+
+# الفاصل بين فحوص تغييرات النسخ الأخرى في الوضع المشترك (بالثواني)
+SHARED_POLL_SECONDS = 1.0
+
+# أقصى عدد من نتائج القراءة المحفوظة بين تعديلين
+READ_CACHE_SIZE = 256
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_bool(value):
+    if value.lower() in ("1", "true", "yes"):
+        return True
+    if value.lower() in ("0", "false", "no"):
+        return False
+    raise HTTPError(400, f"invalid boolean: {value}")
+
+
+# خدمة المهام (TaskService)
+class TaskService:
+    """توجيه الطلبات إلى TaskEngine: التعديلات عبر كاتب واحد، والقراءات من الذاكرة."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.writes = asyncio.Queue()  # (القوائم المتأثرة، الدالة، المعاملات، future) بترتيب وصولها
+        self.version = 0  # يزيد مع كل دفعة تعديلات غيّرت شيئًا
+        self._reads = {}  # الطلب -> (بايتات الاستجابة، القوائم الفرعية التي تعتمد عليها أو None للجميع)
+
+    async def run_writer(self):
+        """الكاتب الوحيد: ينفذ التعديلات المنتظرة دفعةً واحدة بترتيبها.
+
+        نتائج القراءة المتأثرة تُحذف قبل الرد على أي تعديل في الدفعة، فالعميل الذي
+        يقرأ بعد رد تعديله يرى التعديل دائمًا.
+        """
+        while True:
+            jobs = [await self.writes.get()]
+            while not self.writes.empty():
+                jobs.append(self.writes.get_nowait())
+            changed = set()
+            outcomes = []
+            for affected, action, args, future in jobs:
+                try:
+                    result = action(*args)
+                except Exception as error:
+                    outcomes.append((future, None, error))
+                    continue
+                if result is not None:
+                    changed |= result if affected is None else affected
+                outcomes.append((future, result, None))
+            if changed:
+                self.version += 1
+                self.invalidate(changed)
+            for future, result, error in outcomes:
+                if future.cancelled():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    async def write(self, affected, action, *args):
+        """جدولة تعديل عند الكاتب وانتظار نتيجته.
+
+        affected: القوائم الفرعية التي يغيرها التعديل إن نجح، أو None إذا كانت النتيجة
+        نفسها مجموعة القوائم المتغيرة (كقيمة undo وredo وpoll_changes).
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.writes.put((affected, action, args, future))
+        return await future
+
+    async def write_task(self, action, task_id, *args):
+        """(القائمة الفرعية، العقدة) بعد تعديل مهمة بمعرفها، أو (None، None) إن لم توجد.
+
+        قائمة المهمة تُحدد داخل الكاتب (بعد قراءة ملفها إن لزم)، فتُحذف نتائج
+        القراءة المعتمدة عليها وحدها.
+        """
+        affected = set()  # يملؤه run قبل أن يقرأه الكاتب
+
+        def run():
+            submenu = self.engine.task_submenu(task_id)
+            node = action(task_id, *args)
+            if node is None:
+                return None
+            affected.add(submenu)
+            return submenu, node
+
+        return await self.write(affected, run) or (None, None)
+
+    async def poll_shared_changes(self):
+        """(الوضع المشترك) تطبيق تغييرات النسخ الأخرى عبر الكاتب نفسه."""
+        while True:
+            await asyncio.sleep(SHARED_POLL_SECONDS)
+            await self.write(None, self.engine.poll_changes)
+
+    def read(self, key, compute, submenus=None):
+        """نتيجة قراءة محفوظة منذ آخر تعديل على القوائم التي تعتمد عليها، أو حسابها الآن."""
+        entry = self._reads.get(key)
+        if entry is None:
+            if len(self._reads) >= READ_CACHE_SIZE:
+                self._reads.clear()
+            entry = self._reads[key] = (json.dumps(compute(), ensure_ascii=False).encode('utf-8'), submenus)
+        return entry[0]
+
+    def invalidate(self, changed):
+        """حذف نتائج القراءة المعتمدة على القوائم المتغيرة (None في changed تعني الجميع)."""
+        if None in changed:
+            self._reads.clear()
+            return
+        for key in [key for key, (_, submenus) in self._reads.items() if submenus is None or submenus & changed]:
+            del self._reads[key]
+
+    async def route(self, method, target, body):
+        """(الحالة، الاستجابة) لطلب؛ الاستجابة بايتات جاهزة أو كائن يُحوّل إلى JSON."""
+        url = urlsplit(target)
+        parts = [part for part in url.path.split('/') if part]
+        if method == "GET":
+            if parts == ["submenus"]:
+                return 200, self.read(target, lambda: list(self.engine.task_lists))
+            if parts == ["stats"]:
+                return 200, self.read(target, self.stats)
+            if parts == ["tasks"]:
+                query = self.build_query(parse_qs(url.query))
+                submenus = self.engine.resolve_submenus(query.submenus)
+                return 200, self.read(target, lambda: [task_to_dict(*task) for task in self.engine.query(query)], submenus)
+            if len(parts) == 2 and parts[0] == "tasks":
+                return 200, self.read(target, lambda: self.get_task(parts[1]), {self.engine.task_submenu(parts[1])})
+        elif method == "POST":
+            if parts == ["tasks"]:
+                task = self.parse_task(body)
+                submenu = self.engine.resolve_submenu(task['submenu'])
+                node = await self.write({submenu}, self.engine.add_task, submenu, task['description'], task['priority'],
+                                        task['date'], task['completed'], None, task['repeat'])
+                return 201, task_to_dict(submenu, node)
+            if len(parts) == 3 and parts[0] == "tasks" and parts[2] == "complete":
+                through = parse_qs(url.query).get('through', [None])[-1]
+                if through:
+                    self.parse_date(through)
+                submenu, node = await self.write_task(self.engine.mark_task_as_done_by_id, parts[1], through)
+                return 200, task_to_dict(submenu, self.found(node, parts[1]))
+            if parts in (["undo"], ["redo"]):
+                changed = await self.write(None, getattr(self.engine, parts[0])) or set()
+                return 200, {'changed': sorted(submenu for submenu in changed if submenu is not None), 'reset': None in changed}
+        elif method == "DELETE":
+            if len(parts) == 2 and parts[0] == "tasks":
+                submenu, node = await self.write_task(self.engine.delete_task_by_id, parts[1])
+                return 200, task_to_dict(submenu, self.found(node, parts[1]))
+        else:
+            raise HTTPError(405, method)
+        raise HTTPError(404, url.path)
+
+    @staticmethod
+    def found(node, task_id):
+        if node is None:
+            raise HTTPError(404, f"task not found: {task_id}")
+        return node
+
+    def stats(self):
+        """العدادات المحفوظة لكل قائمة فرعية وإجماليها (دون المرور على المهام)."""
+        overall = TaskStats()
+        submenus = {}
+        for submenu, task_list in self.engine.task_lists.items():
+            overall.merge(task_list.stats)
+            submenus[submenu] = {'total': task_list.stats.total, 'completed': task_list.stats.completed}
+        return dict(overall.to_dict(), completion_rate=round(overall.completion_rate, 2), submenus=submenus)
+
+    def get_task(self, task_id):
+        node = self.found(self.engine.find_task(task_id), task_id)
+        return task_to_dict(self.engine.task_index.get(task_id), node)
+
+    @staticmethod
+    def build_query(params):
+        """TaskQuery من معاملات الرابط (نفس خيارات الأمر list، وsort مفاتيح مفصولة بفواصل)."""
+        def first(name):
+            return params[name][-1] if name in params else None
+
+        try:
+            completed = first('completed')
+            limit = first('limit')
+            return TaskQuery(submenus=params.get('submenu'), priorities=params.get('priority'),
+                             completed=None if completed is None else parse_bool(completed),
+                             date_from=first('from'), date_to=first('to'), text=first('search'),
+                             sort=[sort_field(key) for key in (first('sort') or '').split(',') if key],
+                             limit=None if limit is None else int(limit))
+        except ValueError as error:
+            raise HTTPError(400, str(error))
+
+    @staticmethod
+    def parse_task(body):
+        try:
+            task = json.loads(body or b'{}')
+            if not isinstance(task, dict) or not task.get('submenu') or not task.get('description'):
+                raise ValueError("submenu and description are required")
+            priority = task.get('priority') or ''
+            if not (priority == '' or (isinstance(priority, str) and priority in PRIORITY_ORDER)
+                    or (type(priority) is int and priority in PRIORITY_NAMES)):
+                raise ValueError(f"invalid priority: {priority}")
+            repeat = str(task.get('repeat') or '') or None
+            rule = Recurrence.parse(repeat) if repeat else None  # الصيغة النصية لقاعدة التكرار، مثل "weekly:2024-05-01"
+            if rule is not None and not task.get('date'):
+                task_date = date_string(rule.start)  # المهمة المتكررة تبدأ من أول تكرار لقاعدتها
+            else:
+                task_date = task.get('date', date.today().strftime("%Y-%m-%d")) or ''
+            day = date_ordinal(task_date)  # يرفع ValueError إذا لم يكن التاريخ بصيغة YYYY-MM-DD
+            if rule is not None and not rule.count_between(day, day):
+                raise ValueError(f"{task_date} is not an occurrence of {repeat}")
+        except ValueError as error:
+            raise HTTPError(400, str(error))
+        return {'submenu': task['submenu'], 'description': task['description'], 'priority': priority,
+                'date': task_date, 'completed': bool(task.get('completed', False)), 'repeat': repeat}
+
+    @staticmethod
+    def parse_date(value):
+        try:
+            return date_ordinal(value)
+        except ValueError as error:
+            raise HTTPError(400, str(error))
+
+    async def handle_connection(self, reader, writer):
+        """طلبات اتصال واحد (HTTP/1.1 مع إبقاء الاتصال مفتوحًا)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length') or 0))
+                status, payload = await self.respond(method, target, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                data = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                writer.write((f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                              f"Content-Type: application/json; charset=utf-8\r\n"
+                              f"Content-Length: {len(data)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # اتصال مقطوع أو طلب غير صالح: يُغلق الاتصال
+        finally:
+            writer.close()
+
+    async def respond(self, method, target, body):
+        try:
+            return await self.route(method, target, body)
+        except HTTPError as error:
+            return error.status, {'error': str(error)}
+        except Exception as error:  # خطأ غير متوقع لا يوقف الخدمة
+            return 500, {'error': repr(error)}
+
+
+async def serve(engine, host, port):
+    """تشغيل الخدمة حتى الإيقاف (Ctrl+C أو SIGTERM)."""
+    service = TaskService(engine)
+    tasks = [asyncio.create_task(service.run_writer())]
+    if engine.journal and engine.journal.shared:
+        tasks.append(asyncio.create_task(service.poll_shared_changes()))
+    stop = asyncio.Event()
+    with contextlib.suppress(NotImplementedError, AttributeError):  # لا توجد إشارات POSIX على Windows
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"serving on http://{host}:{port}", file=sys.stderr)
+    async with server:
+        await stop.wait()
+    for task in tasks:
+        task.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="To-Do List Manager (local HTTP/JSON service)")
+    parser.add_argument("--data", default="tasks.json", help="ملف المهام (JSON، أو لقطة ثنائية بامتداد .bin)")
+    parser.add_argument("--sqlite", metavar="PATH", help="استخدام قاعدة SQLite بدل ملف JSON")
+    parser.add_argument("--shared", action="store_true", help="ملفات مشتركة بين عدة نسخ (قفل ودمج العمليات)")
+    parser.add_argument("--profile", metavar="TRACE", help="قياس زمن العمليات وحفظه بصيغة Chrome trace")
+    parser.add_argument("--host", default="127.0.0.1", help="الافتراضي: الجهاز المحلي فقط")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        instrument_core()
+    store = SQLiteTaskStore(args.sqlite) if args.sqlite else None
+    engine = TaskEngine(store, snapshot_path=args.data, shared=args.shared)
+    engine.load_from_json()
+    try:
+        asyncio.run(serve(engine, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.close()
+        if args.profile:
+            PROFILER.export_chrome_trace(args.profile)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())